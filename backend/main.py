@@ -1,46 +1,228 @@
 from typing import List
+import asyncio
+import json
+import os
+import time
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
-import libvirt
 
-from backend.models.router import RouterCreate, RouterInfo
-from backend.models.topology import Topology, TopologyInfo
-from backend.models.lab import LabCreate, LabInfo
-from backend.models.link import Link, LinkCreate
-from backend.services.router_service import RouterService
+from backend.models.router import RouterBatchCreate, RouterCreate
+from backend.models.topology import Topology
+from backend.models.lab import LabCreate, LabQuota, LabSnapshotCreate
+from backend.models.link import LinkCreate
 from backend.services.stats_service import StatsService
 from backend.services.console_service import ConsoleService
 from backend.services.topology_service import TopologyService
 from backend.services.lab_service import LabService
 from backend.services.link_service import LinkService
+from backend.services.config_drive_service import ConfigDriveService
+from backend.services.deploy_service import DeployService
+from backend.services.reconcile_service import ReconcileService
+from backend.services.snapshot_service import SnapshotService
+from backend.services.bundle_service import BundleService, QueueReader
+from backend.services.clone_service import MAX_CLONES, CloneService
+from backend.services.suspend_service import SuspendService
+from backend.services.inventory_cache import InventoryCache
+from backend.services.capacity_service import CapacityService
+from backend.services.batch_service import BatchService
+from backend.services.reclaim_service import ReclaimService
+from backend.services.telemetry_service import TelemetryService
+from backend.services.activity_tracker import ActivityTracker
+from backend.services.memory_manager_service import MemoryManagerService
+from backend.services.cpu_governor_service import CpuGovernorService
+from backend.repositories.database import Database
+from backend.repositories.json_import import import_json_state
+from backend.repositories.lab_repository import LabRepository
+from backend.repositories.topology_repository import TopologyRepository
+from backend.repositories.link_repository import LinkRepository
+from backend.repositories.reclaim_repository import ReclaimRepository
+from backend.repositories.telemetry_repository import TelemetryRepository
+from backend.repositories.cpu_pin_repository import CpuPinRepository
+from backend.services.event_bus import EventBus
+from backend.services.domain_events import DomainEventMonitor, start_event_loop
+from backend.services.dashboard_service import DashboardService, accepts_gzip
+from backend.services import instrumentation
+from backend.services.connection_manager import LibvirtUnavailable, ManagedConnection
+from backend.services.cluster_service import ClusterRouterService, Node, parse_nodes
+from backend.services.router_service import (
+    DEFAULT_NIC_PROFILE, DEFAULT_STORAGE_PROFILE, DISK_BUSES, IMAGES_PATH, NIC_MODELS, NIC_PROFILES,
+    STORAGE_PROFILES
+)
+
+STATS_INTERVAL = 5  # Seconds between stats ticks on /api/events
+LIBVIRT_URI = os.environ.get("VRHOST_LIBVIRT_URI", "qemu:///system")
+LIBVIRT_POOL_SIZE = int(os.environ.get("VRHOST_LIBVIRT_POOL_SIZE", "4"))
+# Cluster mode: "name=uri,name=uri" (e.g. node1=qemu+ssh://host1/system); unset = one local node
+NODES = os.environ.get("VRHOST_NODES")
+DATABASE_PATH = os.environ.get("VRHOST_DATABASE", "/opt/vrhost-lab/data/vrhost.db")
+# Where day-0 config-drive ISOs (and generated router passwords) are kept
+CONFIG_DRIVE_PATH = os.environ.get("VRHOST_CONFIG_DRIVE_PATH", f"{IMAGES_PATH}/config-drives")
+# Read the base images into the page cache at startup (1) so the first boot storm hits memory
+PRELOAD_IMAGES = os.environ.get("VRHOST_PRELOAD_IMAGES") == "1"
+# Seconds between activity samples, and how long a router must be quiet to count as idle
+ACTIVITY_INTERVAL = int(os.environ.get("VRHOST_ACTIVITY_INTERVAL", "30"))
+IDLE_AFTER = int(os.environ.get("VRHOST_IDLE_AFTER", "300"))
+# Share of its memory an idle router keeps (1 = no ballooning)
+BALLOON_FRACTION = float(os.environ.get("VRHOST_BALLOON_FRACTION", "0.5"))
+# CPU share per vCPU an idle router is capped at (0 = no throttling)
+IDLE_CPU_QUOTA = float(os.environ.get("VRHOST_IDLE_CPU_QUOTA", "0.1"))
+# Ceiling on how fast deleted routers' disks are freed in the background (MB/s, 0 = unthrottled)
+RECLAIM_RATE_MB = int(os.environ.get("VRHOST_RECLAIM_RATE_MB", "128"))
+# How long the lifecycle telemetry waits for a started router's SSH to answer
+READY_PROBE_TIMEOUT = int(os.environ.get("VRHOST_READY_PROBE_TIMEOUT", "900"))
+
+
+async def publish_stats(app: FastAPI):
+    """Publish dashboard stats periodically, but only while someone is listening"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(STATS_INTERVAL)
+        if not app.state.event_bus.subscriber_count:
+            continue
+        try:
+            stats = await loop.run_in_executor(
+                None, lambda: app.state.stats_service.get_dashboard_stats(app.state.inventory.domains())
+            )
+            app.state.event_bus.publish("stats", stats)
+        except Exception as e:
+            print(f"⚠ Could not publish stats: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage libvirt connection lifecycle"""
     # Startup
     try:
-        app.state.libvirt_conn = libvirt.open('qemu:///system')
-        app.state.router_service = RouterService(app.state.libvirt_conn)
+        app.state.event_bus = EventBus()
+        start_event_loop()
+        app.state.config_drive_service = ConfigDriveService(CONFIG_DRIVE_PATH)
+        app.state.database = Database(DATABASE_PATH)
+        import_json_state(app.state.database)
+        app.state.lab_service = LabService(LabRepository(app.state.database))
+        app.state.reclaim_service = ReclaimService(
+            ReclaimRepository(app.state.database), rate_mb=RECLAIM_RATE_MB,
+            event_bus=app.state.event_bus
+        )
+        app.state.telemetry = TelemetryService(
+            TelemetryRepository(app.state.database), ready_timeout=READY_PROBE_TIMEOUT
+        )
+        # One node per hypervisor; services see the cluster as a single router service
+        # whose connection aggregates (and routes to) the nodes
+        nodes = [
+            Node(name, uri, pool_size=LIBVIRT_POOL_SIZE,
+                 config_drive_service=app.state.config_drive_service,
+                 reclaimer=app.state.reclaim_service, telemetry=app.state.telemetry)
+            for name, uri in parse_nodes(NODES, LIBVIRT_URI).items()
+        ]
+        app.state.router_service = ClusterRouterService(nodes, lab_service=app.state.lab_service)
+        app.state.libvirt_conn = app.state.router_service.conn
         app.state.stats_service = StatsService(app.state.libvirt_conn)
-        app.state.lab_service = LabService()
-        app.state.console_service = ConsoleService()
-        app.state.topology_service = TopologyService()
-        app.state.link_service = LinkService()
-        print("✓ Connected to libvirt")
+        app.state.console_service = ConsoleService(app.state.router_service)
+        app.state.topology_service = TopologyService(TopologyRepository(app.state.database))
+        app.state.link_service = LinkService(
+            LinkRepository(app.state.database), event_bus=app.state.event_bus
+        )
+        app.state.deploy_service = DeployService(
+            app.state.router_service, app.state.link_service, app.state.lab_service
+        )
+        app.state.reconcile_service = ReconcileService(
+            app.state.router_service, app.state.link_service, app.state.lab_service
+        )
+        app.state.snapshot_service = SnapshotService(
+            app.state.router_service, app.state.lab_service, images_path=IMAGES_PATH
+        )
+        app.state.bundle_service = BundleService(
+            app.state.router_service, app.state.lab_service, app.state.link_service,
+            images_path=IMAGES_PATH
+        )
+        app.state.clone_service = CloneService(
+            app.state.router_service, app.state.lab_service, app.state.link_service,
+            app.state.snapshot_service, images_path=IMAGES_PATH
+        )
+        app.state.suspend_service = SuspendService(
+            app.state.router_service, app.state.lab_service
+        )
+        app.state.inventory = InventoryCache(app.state.libvirt_conn)
+        app.state.capacity_service = CapacityService(
+            app.state.router_service, app.state.lab_service, app.state.stats_service,
+            app.state.inventory
+        )
+        app.state.batch_service = BatchService(
+            app.state.router_service, app.state.lab_service, app.state.capacity_service
+        )
+        app.state.activity_tracker = ActivityTracker(
+            app.state.libvirt_conn, app.state.router_service,
+            interval=ACTIVITY_INTERVAL, idle_after=IDLE_AFTER
+        )
+        app.state.memory_manager = MemoryManagerService(
+            app.state.activity_tracker, idle_fraction=BALLOON_FRACTION
+        )
+        if BALLOON_FRACTION < 1:
+            app.state.activity_tracker.add_listener(app.state.memory_manager.on_sample)
+        app.state.cpu_governor = CpuGovernorService(
+            app.state.activity_tracker, app.state.router_service, app.state.lab_service,
+            CpuPinRepository(app.state.database), idle_quota=IDLE_CPU_QUOTA
+        )
+        if IDLE_CPU_QUOTA > 0:
+            app.state.activity_tracker.add_listener(app.state.cpu_governor.on_sample)
+        app.state.dashboard_service = DashboardService(
+            app.state.router_service, app.state.lab_service, app.state.link_service,
+            app.state.stats_service, app.state.event_bus, app.state.inventory,
+            stats_interval=STATS_INTERVAL
+        )
+        app.state.domain_events = {}
+        for node in nodes:
+            monitor = DomainEventMonitor(
+                ManagedConnection(node.connections, primary=True), app.state.router_service,
+                app.state.lab_service, app.state.link_service, app.state.event_bus, app.state.inventory,
+                telemetry=app.state.telemetry
+            )
+            monitor.start()
+            app.state.domain_events[node.name] = monitor
+
+            def on_connect(monitor=monitor, node=node):
+                """(Re)attach to a node's fresh libvirt connection"""
+                monitor.register()
+                app.state.memory_manager.enable_ksm(node.conn)
+                app.state.inventory.invalidate()
+                app.state.dashboard_service.mark_dirty()
+                app.state.lab_service.migrate_prefix_membership(app.state.router_service)
+
+            node.connections.add_listener(on_connect)
+        # Lifecycle events keep the inventory current; the TTL is only a safety net
+        app.state.inventory.ttl = 60
+        for node in nodes:
+            node.connections.open()
+        app.state.reclaim_service.start()
+        app.state.activity_tracker.start()
+        if PRELOAD_IMAGES:
+            asyncio.get_running_loop().run_in_executor(None, app.state.router_service.preload_base_images)
         print("✓ Link service initialized")
     except Exception as e:
-        print(f"✗ Failed to connect to libvirt: {e}")
+        print(f"✗ Failed to initialize services: {e}")
+
+    stats_task = asyncio.create_task(publish_stats(app))
 
     yield
 
+    stats_task.cancel()
+    if hasattr(app.state, 'reclaim_service'):
+        app.state.reclaim_service.stop()
+    if hasattr(app.state, 'activity_tracker'):
+        app.state.activity_tracker.stop()
+    if hasattr(app.state, 'domain_events'):
+        for monitor in app.state.domain_events.values():
+            monitor.stop()
+
     # Shutdown
     # Cleanup console sessions
     if hasattr(app.state, 'console_service'):
         app.state.console_service.close_all_sessions()
 
-    if hasattr(app.state, 'libvirt_conn'):
-        app.state.libvirt_conn.close()
+    if hasattr(app.state, 'router_service'):
+        for node in app.state.router_service.nodes.values():
+            node.connections.close()
         print("✓ Disconnected from libvirt")
 
 app = FastAPI(
@@ -49,6 +231,7 @@ app = FastAPI(
     version="0.1.0",
     lifespan=lifespan
 )
+app.state.profiler = instrumentation.SlowRequestProfiler.from_env()
 
 # CORS for frontend
 app.add_middleware(
@@ -59,6 +242,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(LibvirtUnavailable)
+async def libvirt_unavailable(request: Request, exc: LibvirtUnavailable):
+    return JSONResponse(status_code=503, content={"detail": f"libvirt unavailable: {exc}"},
+                        headers={"Retry-After": "5"})
+
+@app.middleware("http")
+async def require_libvirt(request: Request, call_next):
+    """Fail fast with 503 while libvirt is down instead of erroring inside the services"""
+    path = request.url.path
+    if path.startswith("/api/") and not path.startswith(("/api/health", "/api/debug")):
+        cluster = getattr(request.app.state, "router_service", None)
+        if cluster is None or not cluster.connected:
+            error = cluster.last_error if cluster else "Services not initialized"
+            return JSONResponse(status_code=503, content={"detail": f"libvirt unavailable: {error}"},
+                                headers={"Retry-After": "5"})
+    return await call_next(request)
+
+@app.middleware("http")
+async def invalidate_inventory(request: Request, call_next):
+    """Any change to routers or labs makes the cached inventory and dashboard stale"""
+    response = await call_next(request)
+    if request.method != "GET" and not request.url.path.startswith("/api/capacity"):
+        inventory = getattr(request.app.state, "inventory", None)
+        if inventory:
+            inventory.invalidate()
+        dashboard = getattr(request.app.state, "dashboard_service", None)
+        if dashboard:
+            dashboard.mark_dirty()
+    return response
+
+@app.middleware("http")
+async def account_calls(request: Request, call_next):
+    """Attribute libvirt/subprocess/sqlite/file calls to the endpoint and report them in headers"""
+    profiler = request.app.state.profiler
+    profile = profiler.start()
+    token = instrumentation.start_request()
+    started_at = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        route = request.scope.get("route")
+        endpoint = f"{request.method} {route.path if route else request.url.path}"
+        stats = instrumentation.finish_request(token, endpoint, elapsed_ms)
+        if profile:
+            profiler.finish(profile, endpoint, elapsed_ms)
+
+    totals = stats.totals()
+    timings = [f'{kind};dur={entry["ms"]:.2f};desc="{entry["count"]} calls"'
+               for kind, entry in sorted(totals.items())]
+    response.headers["Server-Timing"] = ", ".join(timings + [f"total;dur={elapsed_ms:.2f}"])
+    response.headers["X-Libvirt-Calls"] = str(totals.get("libvirt", {}).get("count", 0))
+    return response
+
+def ndjson_progress(event_bus: EventBus, job: str, events):
+    """Stream job progress as NDJSON and mirror each step onto the event bus"""
+    for event in events:
+        event_bus.publish("job", {"job": job, **event})
+        yield json.dumps(event) + "\n"
+
 @app.get("/")
 async def root():
     return {
@@ -70,33 +313,132 @@ async def root():
 
 @app.get("/api/health")
 async def health_check(request: Request):
-    """Health check endpoint"""
-    try:
-        conn = request.app.state.libvirt_conn
-        domains = conn.listAllDomains()
-        return {
-            "status": "healthy",
-            "libvirt_connected": True,
-            "total_vms": len(domains)
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "error": str(e)
-        }
+    """Health check endpoint (connection state only, no per-domain calls)"""
+    cluster = getattr(request.app.state, "router_service", None)
+    if cluster is None:
+        return {"status": "unhealthy", "libvirt_connected": False, "error": "Services not initialized"}
+    health = cluster.health()
+    return {
+        "status": "healthy" if health["connected"] else "unhealthy",
+        "libvirt_connected": health["connected"],
+        "nodes": health["nodes"]
+    }
+
+@app.get("/api/nodes")
+async def list_nodes(request: Request):
+    """Hypervisor nodes with their free memory, as the placement scheduler sees them"""
+    return {"nodes": request.app.state.router_service.capacity()}
+
+@app.get("/api/debug/profile")
+async def get_profile():
+    """Per-endpoint request latency and libvirt/subprocess/sqlite/file call histograms"""
+    return {"buckets_ms": instrumentation.BUCKETS_MS, "endpoints": instrumentation.registry.to_dict()}
+
+@app.delete("/api/debug/profile")
+async def reset_profile():
+    """Start the call accounting over"""
+    instrumentation.registry.reset()
+    return {"success": True, "message": "Profile counters reset"}
+
+@app.get("/api/debug/profile/slow")
+async def get_slow_profiles(request: Request):
+    """cProfile output of sampled requests slower than VRHOST_PROFILE_SLOW_MS"""
+    profiler = request.app.state.profiler
+    return {
+        "enabled": profiler.slow_ms is not None,
+        "slow_ms": profiler.slow_ms,
+        "sample": profiler.sample,
+        "profiles": list(profiler.profiles)
+    }
+
+@app.get("/api/events")
+async def stream_events(request: Request):
+    """Server-sent events: a state snapshot, then router/link/stats/job deltas as they happen"""
+    loop = asyncio.get_running_loop()
+    bus = request.app.state.event_bus
+    # Subscribe before building the snapshot so no change falls in between
+    queue = bus.subscribe()
+
+    def sse(event_type: str, payload) -> str:
+        return f"event: {event_type}\ndata: {json.dumps(payload)}\n\n"
+
+    async def generate():
+        try:
+            snapshot = await loop.run_in_executor(None, request.app.state.dashboard_service.state)
+            yield sse("snapshot", snapshot)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event["type"] == "resync":
+                    # This client fell behind and missed events: start it over
+                    snapshot = await loop.run_in_executor(None, request.app.state.dashboard_service.state)
+                    yield sse("snapshot", snapshot)
+                else:
+                    yield sse(event["type"], event)
+        finally:
+            bus.unsubscribe(queue)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/dashboard")
+async def get_dashboard(request: Request):
+    """Routers, links and stats in one versioned snapshot (ETag / If-None-Match, gzip)"""
+    dashboard = request.app.state.dashboard_service
+    snapshot = dashboard.peek()
+    if snapshot is None:
+        snapshot = await asyncio.get_running_loop().run_in_executor(
+            None, instrumentation.bind_context(dashboard.get)
+        )
+
+    headers = {"ETag": snapshot["etag"], "Cache-Control": "no-cache", "Vary": "Accept-Encoding",
+               "X-Dashboard-Version": str(snapshot["version"])}
+    if_none_match = request.headers.get("if-none-match", "")
+    if snapshot["etag"] in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(snapshot["gzip"], media_type="application/json", headers=headers)
+    return Response(snapshot["body"], media_type="application/json", headers=headers)
 
 # ============================================
 # Router Management
 # ============================================
 
+def split_param(value: str = None) -> List[str]:
+    """Comma-separated query parameter as a list"""
+    return [v.strip() for v in value.split(",") if v.strip()] if value else []
+
 @app.get("/api/routers", response_model=dict)
-async def list_routers(request: Request):
-    """List all routers"""
+async def list_routers(state: str = None, router_type: str = None, lab: str = None,
+                       node: str = None, prefix: str = None, fields: str = None, cursor: str = None,
+                       limit: int = None, request: Request = None):
+    """List routers, filtered by state/type/lab/node/name prefix, with field selection and cursor paging"""
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
     try:
-        routers = request.app.state.router_service.list_routers()
+        router_types = [request.app.state.router_service.normalize_router_type(t)
+                        for t in split_param(router_type)]
+        index = await asyncio.get_running_loop().run_in_executor(
+            None, instrumentation.bind_context(request.app.state.dashboard_service.index), "routers"
+        )
+        result = index.query(
+            filters={"state": split_param(state), "router_type": router_types, "lab": split_param(lab),
+                     "node": split_param(node)},
+            prefix=prefix, cursor=cursor, limit=limit, fields=split_param(fields)
+        )
         return {
-            "routers": routers,
-            "count": len(routers)
+            "routers": result["items"],
+            "count": len(result["items"]),
+            "total": result["total"],
+            "next_cursor": result["next_cursor"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -104,32 +446,76 @@ async def list_routers(request: Request):
 @app.post("/api/routers")
 async def create_router(router: RouterCreate, request: Request):
     """Create a new router"""
+    if router.storage_profile and router.storage_profile not in STORAGE_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown storage profile: {router.storage_profile}")
+    try:
+        request.app.state.router_service.nic_env(router.router_type, router.vcpus, router.nic_profile, router.nic_model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if router.lab and "error" in request.app.state.lab_service.get_lab(router.lab):
+        raise HTTPException(status_code=404, detail=f"Lab '{router.lab}' not found")
+
+    # The footprint stays reserved against the lab's quota until the router is a member
+    with request.app.state.capacity_service.reserve(
+        router.lab, [request.app.state.router_service.footprint(router.router_type, router.ram_gb, router.vcpus)]
+    ) as quota:
+        if not quota["success"]:
+            raise HTTPException(status_code=409, detail=quota["message"])
+        try:
+            result = request.app.state.router_service.create_router(
+                name=router.name,
+                ip=router.ip,
+                router_type=router.router_type,
+                ram=router.ram_gb,
+                vcpus=router.vcpus,
+                node=router.node,
+                lab=router.lab,
+                storage_profile=router.storage_profile,
+                nic_profile=router.nic_profile,
+                nic_model=router.nic_model
+            )
+
+            if result["success"]:
+                if router.lab:
+                    request.app.state.lab_service.add_router(router.lab, router.name)
+                return result
+            else:
+                raise HTTPException(status_code=500, detail=result["message"])
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/routers/batch")
+async def create_routers(batch: RouterBatchCreate, request: Request):
+    """Create many routers at once: validate all, prepare all disks, define in parallel"""
+    if not batch.routers:
+        raise HTTPException(status_code=400, detail="No routers given")
+    if batch.max_parallel < 1:
+        raise HTTPException(status_code=400, detail="max_parallel must be at least 1")
+    service = request.app.state.batch_service
+    reservations = []
     try:
-        result = request.app.state.router_service.create_router(
-            name=router.name,
-            ip=router.ip,
-            router_type=router.router_type,
-            ram=router.ram_gb,
-            vcpus=router.vcpus
+        errors = service.validate(batch.routers, reservations)
+        if errors:
+            raise HTTPException(status_code=400, detail={"message": "Batch rejected, nothing was created",
+                                                         "errors": errors})
+        return await asyncio.get_running_loop().run_in_executor(
+            None, instrumentation.bind_context(service.create), batch.routers, batch.max_parallel
         )
-
-        if result["success"]:
-            return result
-        else:
-            raise HTTPException(status_code=500, detail=result["message"])
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        for reservation in reservations:
+            request.app.state.capacity_service.release(reservation)
 
 @app.delete("/api/routers/{name}")
 async def delete_router(name: str, request: Request):
     """Delete a router"""
     try:
-        # Delete associated links first
-        deleted_links = request.app.state.link_service.delete_router_links(name)
-
         result = request.app.state.router_service.delete_router(name)
 
         if result["success"]:
+            # Links and lab membership go together, in one transaction
+            with request.app.state.database.transaction():
+                deleted_links = request.app.state.link_service.delete_router_links(name)
+                request.app.state.lab_service.remove_router(name)
             result["deleted_links"] = deleted_links
             return result
         else:
@@ -137,6 +523,33 @@ async def delete_router(name: str, request: Request):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/storage-profiles")
+async def list_storage_profiles():
+    """Disk I/O profiles routers can be created with, and the disk bus used per device type"""
+    return {"default": DEFAULT_STORAGE_PROFILE, "profiles": STORAGE_PROFILES, "disk_buses": DISK_BUSES}
+
+@app.get("/api/nic-profiles")
+async def list_nic_profiles():
+    """NIC profiles routers can be created with, and the NIC model used per device type"""
+    return {"default": DEFAULT_NIC_PROFILE, "profiles": NIC_PROFILES, "models": NIC_MODELS}
+
+@app.get("/api/reclaim")
+async def get_reclaim_status(request: Request):
+    """Background disk/network cleanup of deleted routers: queue and bytes reclaimed"""
+    return request.app.state.reclaim_service.status()
+
+@app.get("/api/telemetry/lifecycle")
+async def get_lifecycle_telemetry(router_type: str = None, days: int = 30, request: Request = None):
+    """Per-type histograms of create-to-defined/running/ready and boot-to-ready latencies"""
+    if router_type:
+        router_type = request.app.state.router_service.normalize_router_type(router_type)
+    return request.app.state.telemetry.lifecycle(router_type, days)
+
+@app.get("/api/telemetry/lifecycle/{name}")
+async def get_router_lifecycle(name: str, request: Request):
+    """A router's recent lifecycle transitions and the latencies measured from them"""
+    return request.app.state.telemetry.timeline(name)
+
 @app.get("/api/routers/{name}/console")
 async def get_console_info(name: str):
     """Get console access information for a router"""
@@ -150,7 +563,13 @@ async def get_console_info(name: str):
 @app.post("/api/routers/{name}/start")
 async def start_router(name: str, request: Request):
     """Start a stopped router"""
-    result = request.app.state.router_service.start_router(name)
+    lab = request.app.state.lab_service.get_router_lab(name)
+    router = request.app.state.router_service.get_router_summary(name)
+    starting = [router] if router and router["state"] != "running" else []
+    with request.app.state.capacity_service.reserve(lab, starting, running_only=True) as quota:
+        if not quota["success"]:
+            raise HTTPException(status_code=409, detail=quota["message"])
+        result = request.app.state.router_service.start_router(name)
     if result["success"]:
         # Update link status - PASS router_service to check both routers
         request.app.state.link_service.update_links_for_router(
@@ -216,13 +635,25 @@ async def stop_all_routers(force: bool = False, request: Request = None):
 # ============================================
 
 @app.get("/api/links")
-async def list_links(lab: str = None, request: Request = None):
-    """Get all network links, optionally filtered by lab"""
+async def list_links(lab: str = None, router: str = None, status: str = None, prefix: str = None,
+                     fields: str = None, cursor: str = None, limit: int = None,
+                     request: Request = None):
+    """Get network links, filtered by lab/router/status/id prefix, with field selection and cursor paging"""
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
     try:
-        links = request.app.state.link_service.list_links(lab=lab)
+        index = await asyncio.get_running_loop().run_in_executor(
+            None, instrumentation.bind_context(request.app.state.dashboard_service.index), "links"
+        )
+        result = index.query(
+            filters={"lab": split_param(lab), "router": split_param(router), "status": split_param(status)},
+            prefix=prefix, cursor=cursor, limit=limit, fields=split_param(fields)
+        )
         return {
-            "links": links,
-            "count": len(links)
+            "links": result["items"],
+            "count": len(result["items"]),
+            "total": result["total"],
+            "next_cursor": result["next_cursor"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -281,29 +712,28 @@ async def get_router_links(name: str, request: Request):
 @app.get("/api/stats")
 async def get_stats(request: Request):
     """Get simplified system statistics for dashboard"""
-    system_stats = request.app.state.stats_service.get_system_stats()
-
-    # Calculate percentages
-    memory_percent = 0
-    if system_stats.get('resources'):
-        memory_used = system_stats['resources']['memory_used_mb']
-        memory_total = system_stats['resources']['memory_total_mb']
-        memory_percent = (memory_used / memory_total * 100) if memory_total > 0 else 0
-
-    cpu_percent = system_stats.get('disk', {}).get('used_percent', 0)
-
-    return {
-        "running_routers": system_stats.get('vms', {}).get('running', 0),
-        "total_routers": system_stats.get('vms', {}).get('total', 0),
-        "cpu_percent": cpu_percent,
-        "memory_percent": memory_percent
-    }
+    return request.app.state.stats_service.get_dashboard_stats()
 
 @app.get("/api/stats/system")
 async def get_system_stats(request: Request):
     """Get overall system statistics"""
     return request.app.state.stats_service.get_system_stats()
 
+@app.get("/api/stats/memory")
+async def get_memory_savings(request: Request):
+    """Memory saved by KSM page sharing and by ballooning idle routers down"""
+    return {
+        **request.app.state.stats_service.get_memory_savings(),
+        "manager": request.app.state.memory_manager.status()
+    }
+
+@app.get("/api/activity")
+async def get_activity(request: Request):
+    """Per-router CPU use, NIC traffic and idle time from the last activity sample"""
+    tracker = request.app.state.activity_tracker
+    return {"interval": tracker.interval, "idle_after": tracker.idle_after, "routers": tracker.routers,
+            "cpu": request.app.state.cpu_governor.status()}
+
 @app.get("/api/stats/routers/{name}")
 async def get_router_stats(name: str, request: Request):
     """Get real-time statistics for a specific router"""
@@ -312,6 +742,11 @@ async def get_router_stats(name: str, request: Request):
         raise HTTPException(status_code=404, detail=result["error"])
     return result
 
+@app.post("/api/capacity/plan")
+async def plan_capacity(topology: Topology, request: Request):
+    """Check whether a topology fits in host memory now, and what to suspend if it does not"""
+    return request.app.state.capacity_service.plan(topology)
+
 # ============================================
 # Topology Management
 # ============================================
@@ -327,7 +762,8 @@ async def save_topology(topology: Topology, request: Request):
     result = request.app.state.topology_service.save_topology(
         name=topology.name,
         description=topology.description,
-        routers=[r.dict() for r in topology.routers]
+        routers=[r.dict() for r in topology.routers],
+        links=[l.dict() for l in topology.links]
     )
 
     if result["success"]:
@@ -343,6 +779,63 @@ async def load_topology(name: str, request: Request):
         raise HTTPException(status_code=404, detail=result["error"])
     return result
 
+@app.post("/api/topologies/{name}/deploy")
+async def deploy_topology(name: str, request: Request, max_parallel: int = 4, wait_ready: bool = True):
+    """Deploy a saved topology in parallel, streaming per-step progress as NDJSON"""
+    if max_parallel < 1:
+        raise HTTPException(status_code=400, detail="max_parallel must be at least 1")
+    result = request.app.state.topology_service.load_topology(name)
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+
+    try:
+        topology = Topology(**result)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid topology: {e}")
+
+    router_service = request.app.state.router_service
+    capacity_service = request.app.state.capacity_service
+    quota = capacity_service.hold(topology.name, [
+        router_service.footprint(r.router_type, r.ram_gb, r.vcpus)
+        for r in topology.routers if not router_service.router_exists(r.name)
+    ])
+    if not quota["success"]:
+        raise HTTPException(status_code=409, detail=quota["message"])
+
+    # Held until the stream ends, so a concurrent create can't take the same headroom
+    events = capacity_service.held_while(
+        quota, request.app.state.deploy_service.deploy(topology, max_parallel, wait_ready)
+    )
+    # Sync generator: Starlette iterates it in a worker thread, keeping the event loop free
+    return StreamingResponse(
+        ndjson_progress(request.app.state.event_bus, f"deploy:{name}", events),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/api/topologies/{name}/reconcile")
+async def reconcile_topology(name: str, dry_run: bool = True, prune: bool = False,
+                             max_parallel: int = 4, request: Request = None):
+    """Apply only the difference between a saved topology and the live lab"""
+    result = request.app.state.topology_service.load_topology(name)
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+
+    try:
+        topology = Topology(**result)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid topology: {e}")
+
+    service = request.app.state.reconcile_service
+    if dry_run:
+        actions = service.plan(topology, prune)
+        return {"topology": name, "dry_run": True, "actions": actions, "count": len(actions)}
+
+    events = service.reconcile(topology, prune, max_parallel)
+    return StreamingResponse(
+        ndjson_progress(request.app.state.event_bus, f"reconcile:{name}", events),
+        media_type="application/x-ndjson"
+    )
+
 @app.delete("/api/topologies/{name}")
 async def delete_topology(name: str, request: Request):
     """Delete a saved topology"""
@@ -364,12 +857,27 @@ async def list_labs(request: Request):
 @app.post("/api/labs")
 async def create_lab(lab: LabCreate, request: Request):
     """Create a new lab"""
-    result = request.app.state.lab_service.create_lab(lab.name, lab.description)
+    result = request.app.state.lab_service.create_lab(
+        lab.name, lab.description,
+        quota={"max_vcpus": lab.max_vcpus, "max_memory_mb": lab.max_memory_mb, "max_disk_gb": lab.max_disk_gb}
+    )
     if result["success"]:
         return result
     else:
         raise HTTPException(status_code=500, detail=result["message"])
 
+@app.put("/api/labs/{name}/quota")
+async def set_lab_quota(name: str, quota: LabQuota, request: Request):
+    """Set a lab's vCPU, RAM and disk budget"""
+    result = request.app.state.lab_service.set_quota(name, quota.dict())
+    if result["success"]:
+        result["usage"] = request.app.state.capacity_service.lab_usage(
+            name, include_disk=quota.max_disk_gb is not None
+        )
+        return result
+    else:
+        raise HTTPException(status_code=404, detail=result["message"])
+
 @app.get("/api/labs/{name}")
 async def get_lab(name: str, request: Request):
     """Get lab details"""
@@ -400,20 +908,47 @@ async def start_lab(name: str, request: Request):
     started = []
     failed = []
 
-    for router in routers:
-        if router['state'] != 'running':
-            result = request.app.state.router_service.start_router(router['name'])
-            if result['success']:
-                started.append(router['name'])
-                # Update link status - PASS router_service to check both routers
-                request.app.state.link_service.update_links_for_router(
-                    router['name'], "running", request.app.state.router_service
-                )
-            else:
-                failed.append({"name": router['name'], "error": result['message']})
-
+    with request.app.state.capacity_service.reserve(
+        name, [r for r in routers if r['state'] != 'running'], running_only=True
+    ) as quota:
+        if not quota["success"]:
+            raise HTTPException(status_code=409, detail=quota["message"])
+        for router in routers:
+            if router['state'] != 'running':
+                result = request.app.state.router_service.start_router(router['name'])
+                if result['success']:
+                    started.append(router['name'])
+                    # Update link status - PASS router_service to check both routers
+                    request.app.state.link_service.update_links_for_router(
+                        router['name'], "running", request.app.state.router_service
+                    )
+                else:
+                    failed.append({"name": router['name'], "error": result['message']})
+
+    # Someone is using the lab again: no idle CPU caps on any of its routers
+    request.app.state.cpu_governor.release([router['name'] for router in routers])
     return {"success": True, "started": started, "failed": failed}
 
+@app.post("/api/labs/{name}/pin")
+async def pin_lab(name: str, request: Request):
+    """Pin every vCPU of a lab to its own host CPU on one NUMA cell (never throttled while pinned)"""
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        None, instrumentation.bind_context(request.app.state.cpu_governor.pin_lab), name
+    )
+    if not result["success"]:
+        raise HTTPException(status_code=404 if "not found" in result["message"] else 409,
+                            detail=result["message"])
+    return result
+
+@app.delete("/api/labs/{name}/pin")
+async def unpin_lab(name: str, request: Request):
+    """Undo a lab's CPU pinning"""
+    result = request.app.state.cpu_governor.unpin_lab(name)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    return result
+
 @app.post("/api/labs/{name}/stop")
 async def stop_lab(name: str, force: bool = False, request: Request = None):
     """Stop all routers in a lab"""
@@ -435,6 +970,135 @@ async def stop_lab(name: str, force: bool = False, request: Request = None):
 
     return {"success": True, "stopped": stopped, "failed": failed}
 
+@app.post("/api/labs/{name}/suspend")
+async def suspend_lab(name: str, request: Request):
+    """Save every running router of a lab to disk (managed-save) and free its RAM"""
+    result = await asyncio.get_running_loop().run_in_executor(
+        None, instrumentation.bind_context(request.app.state.suspend_service.suspend_lab), name
+    )
+    for router in result.get("routers", []):
+        if router.get("saved"):
+            request.app.state.link_service.update_links_for_router(
+                router["name"], "stopped", request.app.state.router_service
+            )
+    if result["success"]:
+        return result
+    else:
+        raise HTTPException(status_code=404 if "routers" not in result else 500, detail=result["message"])
+
+@app.post("/api/labs/{name}/resume")
+async def resume_lab(name: str, request: Request):
+    """Restore a suspended lab from its saved state"""
+    loop = asyncio.get_running_loop()
+    service = request.app.state.suspend_service
+    # Only routers with saved state are restored; stopped ones stay stopped and cost nothing
+    saved = await loop.run_in_executor(None, instrumentation.bind_context(service.saved_routers), name)
+    with request.app.state.capacity_service.reserve(name, saved, running_only=True) as quota:
+        if not quota["success"]:
+            raise HTTPException(status_code=409, detail=quota["message"])
+        result = await loop.run_in_executor(None, instrumentation.bind_context(service.resume_lab), name)
+    for router in result.get("routers", []):
+        if router.get("restored"):
+            request.app.state.link_service.update_links_for_router(
+                router["name"], "running", request.app.state.router_service
+            )
+    if result["success"]:
+        return result
+    else:
+        raise HTTPException(status_code=404 if "routers" not in result else 500, detail=result["message"])
+
+@app.get("/api/labs/{name}/snapshots")
+async def list_lab_snapshots(name: str, request: Request):
+    """List snapshots of a lab"""
+    snapshots = request.app.state.snapshot_service.list_lab_snapshots(name)
+    return {"lab": name, "snapshots": snapshots, "count": len(snapshots)}
+
+@app.post("/api/labs/{name}/snapshots")
+async def create_lab_snapshot(name: str, snapshot: LabSnapshotCreate, request: Request):
+    """Take a coordinated disk + memory snapshot of every router in a lab"""
+    result = await asyncio.get_running_loop().run_in_executor(
+        None, instrumentation.bind_context(request.app.state.snapshot_service.create_lab_snapshot),
+        name, snapshot.name, snapshot.description, snapshot.include_memory
+    )
+    if result["success"]:
+        return result
+    else:
+        raise HTTPException(status_code=500, detail=result["message"])
+
+@app.post("/api/labs/{name}/snapshots/{snapshot}/restore")
+async def restore_lab_snapshot(name: str, snapshot: str, request: Request):
+    """Restore every router in a lab to a snapshot"""
+    result = await asyncio.get_running_loop().run_in_executor(
+        None, instrumentation.bind_context(request.app.state.snapshot_service.restore_lab_snapshot), name, snapshot
+    )
+    if not result["success"]:
+        raise HTTPException(status_code=501 if result.get("unsupported") else 500, detail=result["message"])
+
+    # Routers may now be running or stopped depending on the snapshot
+    for router in request.app.state.lab_service.get_lab_routers(name, request.app.state.router_service):
+        request.app.state.link_service.update_links_for_router(
+            router['name'], router['state'], request.app.state.router_service
+        )
+    return result
+
+@app.delete("/api/labs/{name}/snapshots/{snapshot}")
+async def delete_lab_snapshot(name: str, snapshot: str, request: Request):
+    """Delete a lab snapshot and merge its overlays"""
+    result = await asyncio.get_running_loop().run_in_executor(
+        None, instrumentation.bind_context(request.app.state.snapshot_service.delete_lab_snapshot), name, snapshot
+    )
+    if result["success"]:
+        return result
+    else:
+        raise HTTPException(status_code=501 if result.get("unsupported") else 500, detail=result["message"])
+
+@app.post("/api/labs/{name}/clone")
+async def clone_lab(name: str, count: int = 1, prefix: str = None, request: Request = None):
+    """Create linked clones of a lab (thin overlays, renamed domains, remapped links)"""
+    if not 1 <= count <= MAX_CLONES:
+        raise HTTPException(status_code=400, detail=f"count must be between 1 and {MAX_CLONES}")
+    result = await asyncio.get_running_loop().run_in_executor(
+        None, instrumentation.bind_context(request.app.state.clone_service.clone_lab), name, count, prefix
+    )
+    if result["success"]:
+        return result
+    else:
+        raise HTTPException(status_code=400 if "clones" not in result else 500, detail=result["message"])
+
+@app.get("/api/labs/{name}/export")
+async def export_lab(name: str, request: Request):
+    """Stream a lab bundle: lab JSON, links, domain XML and qcow2 overlays (no base images)"""
+    plan = request.app.state.bundle_service.prepare_export(name)
+    if not plan["success"]:
+        raise HTTPException(status_code=400, detail=plan["message"])
+
+    return StreamingResponse(
+        request.app.state.bundle_service.stream_export(plan),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{name}.vrlab.tar.gz"'}
+    )
+
+@app.post("/api/labs/import")
+async def import_lab(request: Request):
+    """Import a lab bundle streamed as the raw request body"""
+    loop = asyncio.get_running_loop()
+    reader = QueueReader()
+    job = loop.run_in_executor(
+        None, instrumentation.bind_context(request.app.state.bundle_service.import_bundle), reader
+    )
+
+    # Feed the body to the importer as it arrives; it decompresses and writes concurrently
+    async for chunk in request.stream():
+        if chunk and not await loop.run_in_executor(None, reader.feed, chunk):
+            break
+    await loop.run_in_executor(None, reader.feed, None)
+
+    result = await job
+    if result["success"]:
+        return result
+    else:
+        raise HTTPException(status_code=400, detail=result["message"])
+
 # ============================================
 # Console Management
 # ============================================
@@ -450,6 +1114,7 @@ async def create_console_session(name: str, request: Request):
 
         # Create console session
         session = request.app.state.console_service.create_session(name)
+        request.app.state.activity_tracker.touch(name)
 
         return {
             "success": True,
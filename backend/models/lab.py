@@ -1,9 +1,18 @@
 from pydantic import BaseModel
 from typing import List, Optional
 
+class LabQuota(BaseModel):
+    """Resource budget of a lab (None = unlimited)"""
+    max_vcpus: Optional[int] = None
+    max_memory_mb: Optional[int] = None
+    max_disk_gb: Optional[int] = None
+
 class LabCreate(BaseModel):
     name: str
     description: Optional[str] = ""
+    max_vcpus: Optional[int] = None
+    max_memory_mb: Optional[int] = None
+    max_disk_gb: Optional[int] = None
 
 class LabInfo(BaseModel):
     name: str
@@ -11,3 +20,8 @@ class LabInfo(BaseModel):
     router_count: int
     running_count: int
     created_at: str
+
+class LabSnapshotCreate(BaseModel):
+    name: Optional[str] = None  # Defaults to snap-<timestamp>
+    description: Optional[str] = ""
+    include_memory: bool = True  # Capture RAM of running routers for an instant restore
@@ -16,6 +16,14 @@ class RouterCreate(BaseModel):
     ram_gb: int = 4
     vcpus: int = 2
     lab: Optional[str] = None  # Lab assignment
+    node: Optional[str] = None  # Hypervisor node (default: chosen by the scheduler)
+    storage_profile: Optional[str] = None  # legacy, native, io_uring (default: VRHOST_STORAGE_PROFILE)
+    nic_profile: Optional[str] = None  # legacy, vhost, vhost-jumbo (default: VRHOST_NIC_PROFILE)
+    nic_model: Optional[str] = None  # Override the device type's NIC model (virtio, e1000, ...)
+
+class RouterBatchCreate(BaseModel):
+    routers: List[RouterCreate]
+    max_parallel: int = 4  # Domains defined at the same time
 
 class RouterInfo(BaseModel):
     name: str
@@ -25,5 +33,6 @@ class RouterInfo(BaseModel):
     id: Optional[int] = None
     router_type: Optional[str] = "vsrx"
     lab: Optional[str] = None
+    node: Optional[str] = None
     interfaces: List[RouterInterface] = []
     ip: Optional[str] = None
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from backend.models.link import LinkCreate
 
 class TopologyRouter(BaseModel):
     name: str
@@ -12,6 +13,7 @@ class Topology(BaseModel):
     name: str
     description: Optional[str] = ""
     routers: List[TopologyRouter]
+    links: List[LinkCreate] = []
 
 class TopologyInfo(BaseModel):
     name: str
@@ -0,0 +1,29 @@
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from backend.repositories.database import Database
+
+
+class CpuPinRepository:
+    """Host CPUs reserved for pinned labs"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def all(self) -> Dict[str, Dict]:
+        """lab -> {"node", "cell", "cpus"}"""
+        rows = self.db.execute("SELECT * FROM cpu_pins ORDER BY lab")
+        return {row["lab"]: {"node": row["node"], "cell": row["cell"], "cpus": json.loads(row["cpus"])}
+                for row in rows}
+
+    def save(self, lab: str, node: Optional[str], cell: int, cpus: List[int]):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cpu_pins (lab, node, cell, cpus, pinned_at) VALUES (?, ?, ?, ?, ?)",
+                (lab, node, cell, json.dumps(cpus), datetime.now().isoformat())
+            )
+
+    def delete(self, lab: str):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM cpu_pins WHERE lab = ?", (lab,))
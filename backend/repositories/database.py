@@ -0,0 +1,179 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from backend.services import instrumentation
+
+# Every schema change appends a step; PRAGMA user_version records how many were applied
+SCHEMA = [
+    """
+    CREATE TABLE meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    CREATE TABLE labs (
+        name TEXT PRIMARY KEY,
+        description TEXT NOT NULL DEFAULT '',
+        quota TEXT NOT NULL DEFAULT '{}',
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    CREATE TABLE lab_routers (
+        router TEXT PRIMARY KEY,
+        lab TEXT NOT NULL REFERENCES labs(name) ON DELETE CASCADE
+    );
+    CREATE INDEX lab_routers_lab ON lab_routers(lab);
+    CREATE TABLE topologies (
+        name TEXT PRIMARY KEY,
+        description TEXT NOT NULL DEFAULT '',
+        router_count INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT,
+        document TEXT NOT NULL
+    );
+    CREATE TABLE links (
+        id TEXT PRIMARY KEY,
+        source_router TEXT NOT NULL,
+        source_interface TEXT NOT NULL,
+        target_router TEXT NOT NULL,
+        target_interface TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'down',
+        lab TEXT
+    );
+    CREATE INDEX links_source ON links(source_router);
+    CREATE INDEX links_target ON links(target_router);
+    CREATE INDEX links_lab ON links(lab);
+    """,
+    """
+    CREATE TABLE reclaim_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        router TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        target TEXT NOT NULL,
+        uri TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        bytes INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        created_at TEXT NOT NULL,
+        finished_at TEXT
+    );
+    CREATE INDEX reclaim_jobs_status ON reclaim_jobs(status);
+    """,
+    """
+    CREATE TABLE lifecycle_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        router TEXT NOT NULL,
+        router_type TEXT,
+        event TEXT NOT NULL,
+        monotonic REAL NOT NULL,
+        boot_id TEXT NOT NULL,
+        recorded_at TEXT NOT NULL
+    );
+    CREATE INDEX lifecycle_events_router ON lifecycle_events(router);
+    CREATE INDEX lifecycle_events_recorded_at ON lifecycle_events(recorded_at);
+    """,
+    """
+    CREATE TABLE cpu_pins (
+        lab TEXT PRIMARY KEY REFERENCES labs(name) ON DELETE CASCADE,
+        node TEXT,
+        cell INTEGER NOT NULL,
+        cpus TEXT NOT NULL,
+        pinned_at TEXT NOT NULL
+    );
+    """,
+]
+
+
+class Database:
+    """SQLite state store in WAL mode, shared by all repositories.
+
+    Each thread gets its own connection (readers never block in WAL mode). Writes
+    go through transaction(), which serializes writers in-process and takes the
+    database write lock up front with BEGIN IMMEDIATE. Transactions nest: an inner
+    transaction() joins the outer one, so several repositories can change state
+    atomically; after_commit() defers side effects (events) until the outermost
+    transaction has committed.
+    """
+
+    def __init__(self, path: str = "/opt/vrhost-lab/data/vrhost.db"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._migrate()
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            self._local.depth = 0
+            self._local.after_commit = []
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block atomically: commit on success, roll back on any exception"""
+        conn = self.connection()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        with instrumentation.timed("sqlite:transaction"), self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.depth = 1
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+            finally:
+                self._local.depth = 0
+                callbacks, self._local.after_commit = self._local.after_commit, []
+        # Only reached on commit: callbacks of a rolled-back transaction were dropped above
+        for callback in callbacks:
+            callback()
+
+    def after_commit(self, callback: Callable[[], None]):
+        """Run callback once the current transaction commits (right away outside one)"""
+        self.connection()
+        if self._local.depth:
+            self._local.after_commit.append(callback)
+        else:
+            callback()
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """Run a single read (or an autocommitted write)"""
+        with instrumentation.timed("sqlite:execute"):
+            return self.connection().execute(sql, params)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _migrate(self):
+        """Apply schema steps this database has not seen yet"""
+        with self.transaction() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for step, script in enumerate(SCHEMA[version:], start=version + 1):
+                for statement in script.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {step}")
@@ -0,0 +1,77 @@
+import json
+import os
+from datetime import datetime
+
+from backend.repositories.database import Database
+
+
+def _read_json_dir(path: str):
+    if not os.path.isdir(path):
+        return
+    for filename in sorted(os.listdir(path)):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(path, filename)) as f:
+                document = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Skipping {filename}: {e}")
+            continue
+        if isinstance(document, dict) and document.get("name"):
+            yield document
+        else:
+            print(f"⚠ Skipping {filename}: no name")
+
+
+def import_json_state(db: Database, labs_path: str = "/opt/vrhost-lab/labs",
+                      topologies_path: str = "/opt/vrhost-lab/topologies",
+                      data_dir: str = "/opt/vrhost-lab/data") -> bool:
+    """One-time import of the JSON-file state into the database (the files are left in place)"""
+    if db.get_meta("json_imported"):
+        return False
+
+    labs = topologies = links = 0
+    with db.transaction() as conn:
+        for lab in _read_json_dir(labs_path):
+            conn.execute(
+                "INSERT OR IGNORE INTO labs (name, description, quota, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (lab["name"], lab.get("description") or "", json.dumps(lab.get("quota") or {}),
+                 lab.get("created_at", ""), lab.get("updated_at", lab.get("created_at", "")))
+            )
+            for router in lab.get("routers", []):
+                conn.execute("INSERT OR IGNORE INTO lab_routers (router, lab) VALUES (?, ?)",
+                             (router, lab["name"]))
+            labs += 1
+
+        for topology in _read_json_dir(topologies_path):
+            conn.execute(
+                "INSERT OR IGNORE INTO topologies (name, description, router_count, created_at, document) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (topology["name"], topology.get("description") or "", len(topology.get("routers", [])),
+                 topology.get("created_at"), json.dumps(topology))
+            )
+            topologies += 1
+
+        links_file = os.path.join(data_dir, "links.json")
+        if os.path.exists(links_file):
+            with open(links_file) as f:
+                for link in json.load(f).values():
+                    conn.execute(
+                        "INSERT OR IGNORE INTO links (id, source_router, source_interface, target_router, "
+                        "target_interface, status, lab) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (link["id"], link["source_router"], link["source_interface"], link["target_router"],
+                         link["target_interface"], link.get("status", "down"), link.get("lab"))
+                    )
+                    links += 1
+
+        # Installs that already ran the prefix-membership migration keep their assignments
+        if os.path.exists(os.path.join(labs_path, ".membership-migrated")):
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('prefix_membership_migrated', ?)",
+                         (datetime.now().isoformat(),))
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', ?)",
+                     (datetime.now().isoformat(),))
+
+    if labs or topologies or links:
+        print(f"✓ Imported {labs} lab(s), {topologies} topolog(ies) and {links} link(s) from JSON files")
+    return True
@@ -0,0 +1,87 @@
+import json
+from typing import Dict, List, Optional
+
+from backend.repositories.database import Database
+
+
+class LabRepository:
+    """Labs, their quotas and their member routers"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    @staticmethod
+    def _row_to_lab(row) -> Dict:
+        return {
+            "name": row["name"],
+            "description": row["description"],
+            "quota": json.loads(row["quota"]),
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def exists(self, name: str) -> bool:
+        return self.db.execute("SELECT 1 FROM labs WHERE name = ?", (name,)).fetchone() is not None
+
+    def get(self, name: str) -> Optional[Dict]:
+        """A lab with its member routers"""
+        row = self.db.execute("SELECT * FROM labs WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        lab = self._row_to_lab(row)
+        lab["routers"] = self.routers(name)
+        return lab
+
+    def list(self) -> List[Dict]:
+        """All labs with their member routers, by name"""
+        labs = [self._row_to_lab(row) for row in self.db.execute("SELECT * FROM labs ORDER BY name")]
+        members = self.members()
+        for lab in labs:
+            lab["routers"] = members.get(lab["name"], [])
+        return labs
+
+    def create(self, lab: Dict):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO labs (name, description, quota, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (lab["name"], lab.get("description") or "", json.dumps(lab.get("quota") or {}),
+                 lab["created_at"], lab.get("updated_at", lab["created_at"]))
+            )
+            for router in lab.get("routers", []):
+                conn.execute("INSERT OR REPLACE INTO lab_routers (router, lab) VALUES (?, ?)",
+                             (router, lab["name"]))
+
+    def update_quota(self, name: str, quota: Dict, updated_at: str) -> bool:
+        with self.db.transaction() as conn:
+            cursor = conn.execute("UPDATE labs SET quota = ?, updated_at = ? WHERE name = ?",
+                                  (json.dumps(quota), updated_at, name))
+            return cursor.rowcount > 0
+
+    def delete(self, name: str) -> bool:
+        """Delete a lab; its membership rows cascade"""
+        with self.db.transaction() as conn:
+            return conn.execute("DELETE FROM labs WHERE name = ?", (name,)).rowcount > 0
+
+    def routers(self, name: str) -> List[str]:
+        rows = self.db.execute("SELECT router FROM lab_routers WHERE lab = ? ORDER BY router", (name,))
+        return [row["router"] for row in rows]
+
+    def members(self) -> Dict[str, List[str]]:
+        """Lab name -> member routers, for every lab"""
+        members: Dict[str, List[str]] = {}
+        for row in self.db.execute("SELECT lab, router FROM lab_routers ORDER BY router"):
+            members.setdefault(row["lab"], []).append(row["router"])
+        return members
+
+    def router_lab(self, router: str) -> Optional[str]:
+        row = self.db.execute("SELECT lab FROM lab_routers WHERE router = ?", (router,)).fetchone()
+        return row["lab"] if row else None
+
+    def add_router(self, name: str, router: str):
+        """Assign a router to a lab, moving it out of any previous lab"""
+        with self.db.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO lab_routers (router, lab) VALUES (?, ?)", (router, name))
+
+    def remove_router(self, router: str) -> bool:
+        with self.db.transaction() as conn:
+            return conn.execute("DELETE FROM lab_routers WHERE router = ?", (router,)).rowcount > 0
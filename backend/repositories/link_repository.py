@@ -0,0 +1,59 @@
+from typing import Dict, List, Optional
+
+from backend.repositories.database import Database
+
+COLUMNS = ("id", "source_router", "source_interface", "target_router", "target_interface", "status", "lab")
+
+
+class LinkRepository:
+    """Links between routers, indexed by endpoint and lab"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def get(self, link_id: str) -> Optional[Dict]:
+        row = self.db.execute("SELECT * FROM links WHERE id = ?", (link_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, lab: Optional[str] = None) -> List[Dict]:
+        if lab:
+            rows = self.db.execute("SELECT * FROM links WHERE lab = ? ORDER BY id", (lab,))
+        else:
+            rows = self.db.execute("SELECT * FROM links ORDER BY id")
+        return [dict(row) for row in rows]
+
+    def for_router(self, router: str) -> List[Dict]:
+        """Links with the router at either end (one index lookup per side)"""
+        rows = self.db.execute(
+            "SELECT * FROM links WHERE source_router = ? "
+            "UNION SELECT * FROM links WHERE target_router = ? ORDER BY id",
+            (router, router)
+        )
+        return [dict(row) for row in rows]
+
+    def insert(self, link: Dict) -> bool:
+        """Add a link; False if one with the same id already exists"""
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO links ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                tuple(link.get(column) for column in COLUMNS)
+            )
+            return cursor.rowcount > 0
+
+    def delete(self, link_id: str) -> bool:
+        with self.db.transaction() as conn:
+            return conn.execute("DELETE FROM links WHERE id = ?", (link_id,)).rowcount > 0
+
+    def delete_for_router(self, router: str) -> int:
+        with self.db.transaction() as conn:
+            return conn.execute(
+                "DELETE FROM links WHERE source_router = ? OR target_router = ?", (router, router)
+            ).rowcount
+
+    def set_status(self, statuses: Dict[str, str]) -> int:
+        """Update the status of several links in one transaction"""
+        with self.db.transaction() as conn:
+            return sum(
+                conn.execute("UPDATE links SET status = ? WHERE id = ?", (status, link_id)).rowcount
+                for link_id, status in statuses.items()
+            )
@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from backend.repositories.database import Database
+
+
+class ReclaimRepository:
+    """Disk and network cleanup left behind by deleted routers"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def add(self, router: str, jobs: List[Dict]) -> int:
+        """Queue cleanup jobs ({"kind", "target", "uri"}) for a router in one transaction"""
+        now = datetime.now().isoformat()
+        with self.db.transaction() as conn:
+            for job in jobs:
+                conn.execute(
+                    "INSERT INTO reclaim_jobs (router, kind, target, uri, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (router, job["kind"], job["target"], job.get("uri"), now)
+                )
+        return len(jobs)
+
+    def next_pending(self) -> Optional[Dict]:
+        """Oldest job not done yet"""
+        row = self.db.execute(
+            "SELECT * FROM reclaim_jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+        ).fetchone()
+        return dict(row) if row else None
+
+    def pending_files(self, router: str) -> List[str]:
+        """Files of a router still waiting to be reclaimed"""
+        rows = self.db.execute(
+            "SELECT target FROM reclaim_jobs WHERE router = ? AND kind = 'file' AND status = 'pending'",
+            (router,)
+        )
+        return [row["target"] for row in rows]
+
+    def finish(self, job_id: int, status: str, reclaimed: int = 0, error: Optional[str] = None):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE reclaim_jobs SET status = ?, bytes = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, reclaimed, error, datetime.now().isoformat(), job_id)
+            )
+
+    def summary(self) -> Dict:
+        """Job counts per status and total bytes reclaimed"""
+        counts = {row["status"]: row["count"] for row in self.db.execute(
+            "SELECT status, COUNT(*) AS count FROM reclaim_jobs GROUP BY status"
+        )}
+        reclaimed = self.db.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM reclaim_jobs WHERE status = 'done'"
+        ).fetchone()[0]
+        return {"counts": counts, "reclaimed_bytes": reclaimed}
+
+    def recent(self, limit: int = 50) -> List[Dict]:
+        rows = self.db.execute("SELECT * FROM reclaim_jobs ORDER BY id DESC LIMIT ?", (limit,))
+        return [dict(row) for row in rows]
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from backend.repositories.database import Database
+
+
+class TelemetryRepository:
+    """Timestamped router lifecycle transitions"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def add(self, router: str, router_type: Optional[str], event: str, monotonic: float, boot_id: str):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO lifecycle_events (router, router_type, event, monotonic, boot_id, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (router, router_type, event, monotonic, boot_id, datetime.now().isoformat())
+            )
+
+    def router_type(self, router: str) -> Optional[str]:
+        """Type last recorded for a router"""
+        row = self.db.execute(
+            "SELECT router_type FROM lifecycle_events WHERE router = ? AND router_type IS NOT NULL "
+            "ORDER BY id DESC LIMIT 1", (router,)
+        ).fetchone()
+        return row["router_type"] if row else None
+
+    def since(self, recorded_after: str) -> List[Dict]:
+        """Every transition recorded after a point in time, oldest first"""
+        rows = self.db.execute(
+            "SELECT * FROM lifecycle_events WHERE recorded_at >= ? ORDER BY id", (recorded_after,)
+        )
+        return [dict(row) for row in rows]
+
+    def for_router(self, router: str, limit: int = 200) -> List[Dict]:
+        """A router's most recent transitions, oldest first"""
+        rows = self.db.execute(
+            "SELECT * FROM lifecycle_events WHERE router = ? ORDER BY id DESC LIMIT ?", (router, limit)
+        )
+        return [dict(row) for row in reversed(rows.fetchall())]
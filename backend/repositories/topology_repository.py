@@ -0,0 +1,39 @@
+import json
+from typing import Dict, List, Optional
+
+from backend.repositories.database import Database
+
+
+class TopologyRepository:
+    """Saved topologies: listing columns plus the full JSON document"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def exists(self, name: str) -> bool:
+        return self.db.execute("SELECT 1 FROM topologies WHERE name = ?", (name,)).fetchone() is not None
+
+    def get(self, name: str) -> Optional[Dict]:
+        row = self.db.execute("SELECT document FROM topologies WHERE name = ?", (name,)).fetchone()
+        return json.loads(row["document"]) if row else None
+
+    def list(self) -> List[Dict]:
+        """Listing metadata only - documents are never parsed"""
+        rows = self.db.execute(
+            "SELECT name, description, router_count, created_at FROM topologies ORDER BY name"
+        )
+        return [dict(row) for row in rows]
+
+    def save(self, topology: Dict):
+        """Insert or replace a topology"""
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO topologies (name, description, router_count, created_at, document) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (topology["name"], topology.get("description") or "", len(topology.get("routers", [])),
+                 topology.get("created_at"), json.dumps(topology))
+            )
+
+    def delete(self, name: str) -> bool:
+        with self.db.transaction() as conn:
+            return conn.execute("DELETE FROM topologies WHERE name = ?", (name,)).rowcount > 0
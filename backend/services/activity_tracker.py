@@ -0,0 +1,118 @@
+import threading
+import time
+from typing import Callable, Dict, List
+
+import libvirt
+
+DOMAIN_STATS = (libvirt.VIR_DOMAIN_STATS_STATE | libvirt.VIR_DOMAIN_STATS_CPU_TOTAL |
+                libvirt.VIR_DOMAIN_STATS_VCPU | libvirt.VIR_DOMAIN_STATS_INTERFACE |
+                libvirt.VIR_DOMAIN_STATS_BALLOON)
+
+
+class ActivityTracker:
+    """Which routers are in use, from CPU-time and NIC-byte deltas between samples.
+
+    Every interval one getAllDomainStats call covers all running domains. A
+    router is active while its CPU use (busy vCPU fraction) or NIC traffic is
+    above the thresholds, or for idle_after seconds after that, or after an
+    explicit touch() (console opened, lab started). vQFX PFEs busy-poll their
+    vCPUs whether or not traffic flows, so they only count through their RE.
+    Listeners get the routers' activity and the raw per-domain stats after every
+    sample.
+    """
+
+    def __init__(self, conn, router_service, interval: int = 30, cpu_threshold: float = 0.10,
+                 net_threshold_bps: int = 50_000, idle_after: int = 300):
+        self.conn = conn
+        self.router_service = router_service
+        self.interval = interval
+        self.cpu_threshold = cpu_threshold
+        self.net_threshold_bps = net_threshold_bps
+        self.idle_after = idle_after
+
+        self.routers: Dict[str, Dict] = {}
+        self.domains: Dict[str, tuple] = {}
+        self._previous: Dict[str, Dict] = {}
+        self._last_active: Dict[str, float] = {}
+        self._listeners: List[Callable[[Dict, Dict], None]] = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def add_listener(self, callback: Callable[[Dict, Dict], None]):
+        """callback(routers, domains) after every sample; domains maps name -> (domain, stats)"""
+        self._listeners.append(callback)
+
+    def start(self):
+        threading.Thread(target=self._worker, name="activity", daemon=True).start()
+
+    def stop(self):
+        self._stopping.set()
+
+    def touch(self, router: str):
+        """Count a router as in use right now"""
+        with self._lock:
+            self._last_active[router] = time.monotonic()
+            if router in self.routers:
+                self.routers[router]["active"] = True
+
+    def is_active(self, router: str) -> bool:
+        entry = self.routers.get(router)
+        return entry is None or entry["active"]  # Unknown routers are not acted on
+
+    def lab_active(self, routers: List[str]) -> bool:
+        return any(self.routers.get(router, {}).get("active") for router in routers)
+
+    def _router_of(self, domain_name: str) -> str:
+        if self.router_service._is_vqfx_component(domain_name):
+            return self.router_service._get_vqfx_base_name(domain_name)
+        return domain_name
+
+    @staticmethod
+    def _net_bytes(stats: Dict) -> int:
+        return sum(stats.get(f"net.{i}.rx.bytes", 0) + stats.get(f"net.{i}.tx.bytes", 0)
+                   for i in range(stats.get("net.count", 0)))
+
+    def sample(self) -> Dict[str, Dict]:
+        """Take one sample and update every router's activity"""
+        now = time.monotonic()
+        domains = {domain.name(): (domain, stats) for domain, stats in self.conn.getAllDomainStats(
+            DOMAIN_STATS, libvirt.VIR_CONNECT_GET_ALL_DOMAINS_STATS_ACTIVE)}
+
+        current, routers = {}, {}
+        for name, (domain, stats) in domains.items():
+            current[name] = {"at": now, "cpu_ns": stats.get("cpu.time", 0), "net_bytes": self._net_bytes(stats)}
+            router = routers.setdefault(self._router_of(name), {"cpu": 0.0, "net_bps": 0, "domains": []})
+            router["domains"].append(name)
+            previous = self._previous.get(name)
+            if previous is None or name.endswith("-pfe"):
+                continue
+            elapsed = now - previous["at"]
+            vcpus = max(1, stats.get("vcpu.current", 1))
+            cpu = max(0, current[name]["cpu_ns"] - previous["cpu_ns"]) / 1e9 / elapsed / vcpus
+            router["cpu"] = max(router["cpu"], round(cpu, 3))
+            router["net_bps"] += int(max(0, current[name]["net_bytes"] - previous["net_bytes"]) / elapsed)
+
+        with self._lock:
+            for name, router in routers.items():
+                busy = router["cpu"] >= self.cpu_threshold or router["net_bps"] >= self.net_threshold_bps
+                if busy or name not in self._last_active:
+                    self._last_active[name] = now
+                router["idle_seconds"] = int(now - self._last_active[name])
+                router["active"] = now - self._last_active[name] < self.idle_after
+            self._previous = current
+            self.routers = routers
+            self.domains = domains
+        return routers
+
+    def _worker(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                routers = self.sample()
+            except Exception as e:
+                print(f"⚠ Activity sample failed: {e}")
+                continue
+            for listener in self._listeners:
+                try:
+                    listener(routers, self.domains)
+                except Exception as e:
+                    print(f"⚠ Activity listener failed: {e}")
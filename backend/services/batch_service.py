@@ -0,0 +1,190 @@
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+from backend.services.connection_manager import LibvirtUnavailable
+from backend.services.router_service import STORAGE_PROFILES
+from backend.services.task_graph import parallel_map
+
+NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+
+class BatchService:
+    """Create many routers in one request.
+
+    The whole batch is validated before anything is touched (names, types,
+    resources, base images, lab quotas); then each lab is placed on one node,
+    every qcow2 overlay is created in one pass on its router's node, and the mk*
+    scripts only define the domains (DISK_PREPARED=1, NO_WAIT=1), several at a
+    time.
+    """
+
+    def __init__(self, router_service, lab_service, capacity_service, max_parallel: int = 4):
+        self.router_service = router_service
+        self.lab_service = lab_service
+        self.capacity_service = capacity_service
+        self.max_parallel = max_parallel
+
+    def validate(self, routers: List, reservations: Optional[List[int]] = None) -> List[Dict]:
+        """Problems with the batch, one entry per offending router (empty when valid)
+
+        With a reservations list, each lab's additions are held against its quota
+        and the hold ids appended; the caller releases them once the batch is done.
+        """
+        errors = []
+        seen = set()
+        additions: Dict[str, List[Dict]] = {}
+
+        for router in routers:
+            problems = []
+            router_type = self.router_service.normalize_router_type(router.router_type)
+            if not NAME_PATTERN.match(router.name):
+                problems.append("invalid name")
+            elif router.name.endswith(("-re", "-pfe")):
+                problems.append("names ending in -re/-pfe are reserved for vQFX components")
+            if router.name in seen:
+                problems.append("duplicate name in batch")
+            seen.add(router.name)
+            overlays = self.router_service.overlay_paths(router.name, router_type)
+            if not overlays:
+                problems.append(f"unsupported router type: {router.router_type}")
+            if router.storage_profile and router.storage_profile not in STORAGE_PROFILES:
+                problems.append(f"unknown storage profile: {router.storage_profile}")
+            try:
+                self.router_service.nic_env(router.router_type, router.vcpus, router.nic_profile, router.nic_model)
+            except ValueError as e:
+                problems.append(str(e))
+            if router.ram_gb < 1 or router.vcpus < 1:
+                problems.append("ram_gb and vcpus must be at least 1")
+            for base in sorted(set(overlays.values())):
+                if not os.path.exists(base):
+                    problems.append(f"base image missing: {base}")
+            if not problems and self.router_service.router_exists(router.name):
+                problems.append("already exists")
+            if router.lab:
+                if "error" in self.lab_service.get_lab(router.lab):
+                    problems.append(f"lab '{router.lab}' not found")
+                else:
+                    additions.setdefault(router.lab, []).append(
+                        self.router_service.footprint(router.router_type, router.ram_gb, router.vcpus)
+                    )
+            if problems:
+                errors.append({"name": router.name, "errors": problems})
+
+        for lab, lab_additions in additions.items():
+            if reservations is None:
+                quota = self.capacity_service.check_lab_quota(lab, lab_additions)
+            else:
+                quota = self.capacity_service.hold(lab, lab_additions)
+                if quota["reservation"] is not None:
+                    reservations.append(quota["reservation"])
+            if not quota["success"]:
+                errors.append({"name": None, "lab": lab, "errors": [quota["message"]]})
+        return errors
+
+    def _place(self, routers: List) -> Dict[str, Dict]:
+        """router name -> {"node"} or {"error"}; each lab is placed once for all its routers"""
+        lab_memory: Dict[str, int] = {}
+        lab_requested: Dict[str, str] = {}
+        for router in routers:
+            if router.lab:
+                lab_memory[router.lab] = lab_memory.get(router.lab, 0) + self.router_service.footprint(
+                    router.router_type, router.ram_gb, router.vcpus)["memory_mb"]
+                if router.node:
+                    lab_requested.setdefault(router.lab, router.node)
+
+        lab_nodes = {}
+        for lab, memory_mb in lab_memory.items():
+            try:
+                lab_nodes[lab] = {"node": self.router_service.place_lab(lab, memory_mb, node=lab_requested.get(lab))}
+            except (ValueError, LibvirtUnavailable) as e:
+                lab_nodes[lab] = {"error": str(e)}
+
+        placement = {}
+        for router in routers:
+            if router.lab and not router.node:
+                placement[router.name] = lab_nodes[router.lab]
+                continue
+            try:
+                memory_mb = self.router_service.footprint(router.router_type, router.ram_gb, router.vcpus)["memory_mb"]
+                placement[router.name] = {"node": self.router_service.place(memory_mb, node=router.node).name}
+            except (ValueError, LibvirtUnavailable) as e:
+                placement[router.name] = {"error": str(e)}
+        return placement
+
+    def _create(self, router, node: str) -> Dict:
+        started_at = time.monotonic()
+        result = self.router_service.create_router(
+            name=router.name,
+            ip=router.ip,
+            router_type=router.router_type,
+            ram=router.ram_gb,
+            vcpus=router.vcpus,
+            node=node,
+            lab=router.lab,
+            disk_prepared=True,
+            wait=False,
+            storage_profile=router.storage_profile,
+            nic_profile=router.nic_profile,
+            nic_model=router.nic_model
+        )
+        if result["success"] and router.lab:
+            self.lab_service.add_router(router.lab, router.name)
+        return {
+            "name": router.name,
+            "success": result["success"],
+            "message": result["message"],
+            "node": result.get("node"),
+            "day0_password": result.get("day0_password"),
+            "elapsed_seconds": round(time.monotonic() - started_at, 2)
+        }
+
+    def create(self, routers: List, max_parallel: int = None) -> Dict:
+        """Prepare every disk, then define the domains in parallel; per-router results"""
+        started_at = time.monotonic()
+        results = {router.name: None for router in routers}
+
+        # Warm the page cache with the base images while the overlays are created
+        self.router_service.preload_base_images([router.router_type for router in routers])
+
+        # The whole lab goes to one node so its links stay local, like a topology deploy
+        placement = self._place(routers)
+
+        # One pass over all overlays before any virt-install runs
+        ready = []
+        for router in routers:
+            if "error" in placement[router.name]:
+                results[router.name] = {"name": router.name, "success": False,
+                                        "message": placement[router.name]["error"]}
+                continue
+            prepared = self.router_service.prepare_disks(router.name, router.router_type,
+                                                         router.storage_profile,
+                                                         node=placement[router.name]["node"])
+            if prepared["success"]:
+                ready.append(router)
+            else:
+                results[router.name] = {"name": router.name, "success": False,
+                                        "message": prepared["message"]}
+        disks_seconds = round(time.monotonic() - started_at, 2)
+
+        created = parallel_map(lambda router: self._create(router, placement[router.name]["node"]), ready,
+                               max_workers=max_parallel or self.max_parallel)
+        for router, result in zip(ready, created):
+            if "name" not in result:
+                result = {"name": router.name, **result}
+            if not result["success"]:
+                # Leave nothing half-made behind: the script never got to own the overlay
+                for path in self.router_service.overlay_paths(router.name, router.router_type):
+                    if os.path.exists(path) and not self.router_service.router_exists(router.name):
+                        os.remove(path)
+            results[router.name] = result
+
+        failed = sum(1 for result in results.values() if not result["success"])
+        return {
+            "success": failed == 0,
+            "message": f"Created {len(routers) - failed} of {len(routers)} routers",
+            "results": list(results.values()),
+            "disks_seconds": disks_seconds,
+            "elapsed_seconds": round(time.monotonic() - started_at, 2)
+        }
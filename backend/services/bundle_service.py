@@ -0,0 +1,519 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import queue
+import tarfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import libvirt
+
+from backend.models.link import LinkCreate
+from backend.services import instrumentation
+from backend.services.batch_service import NAME_PATTERN
+from backend.services.router_service import BASE_IMAGES
+
+BUNDLE_FORMAT = 1
+CHUNK_SIZE = 1024 * 1024
+MANAGEMENT_BRIDGE = "br0"
+
+# What an imported domain definition may contain. Anything that reaches host
+# resources (host devices and files, kernels, emulators, qemu passthrough) is
+# either rejected outright or not copied over.
+DOMAIN_ELEMENTS = {"title", "description", "memory", "currentMemory", "vcpu", "cputune", "iothreads",
+                   "memoryBacking", "os", "features", "cpu", "clock", "on_poweroff", "on_reboot",
+                   "on_crash", "pm", "devices"}
+OS_ELEMENTS = {"type", "boot", "bootmenu", "smbios"}
+DEVICE_ELEMENTS = {"disk", "interface", "serial", "console", "channel", "input", "graphics", "video",
+                   "controller", "memballoon", "rng", "watchdog"}
+REJECTED_DEVICES = {"hostdev", "filesystem", "redirdev", "smartcard", "shmem"}
+DISK_ELEMENTS = {"driver", "target", "address", "boot", "serial"}
+INTERFACE_ELEMENTS = {"mac", "model", "driver", "address", "mtu", "link", "vlan", "boot"}
+
+
+class _QueueWriter(io.RawIOBase):
+    """Write side of a bounded pipe between the tar producer thread and the HTTP response"""
+
+    def __init__(self, chunks: "queue.Queue", cancelled: threading.Event):
+        self.chunks = chunks
+        self.cancelled = cancelled
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        while True:
+            if self.cancelled.is_set():
+                raise BrokenPipeError("Export cancelled by client")
+            try:
+                self.chunks.put(bytes(data), timeout=1)
+                return len(data)
+            except queue.Full:
+                continue
+
+
+class QueueReader(io.RawIOBase):
+    """Read side of a bounded pipe fed with request body chunks"""
+
+    def __init__(self, maxsize: int = 16):
+        self.chunks: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self.buffer = b""
+        self.eof = False
+        self.abandoned = threading.Event()
+
+    def feed(self, chunk: Optional[bytes]) -> bool:
+        """Add a chunk (None marks end of stream); False once the consumer has stopped reading"""
+        while not self.abandoned.is_set():
+            try:
+                self.chunks.put(chunk, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def readable(self):
+        return True
+
+    def readinto(self, target) -> int:
+        while not self.buffer and not self.eof:
+            chunk = self.chunks.get()
+            if chunk is None:
+                self.eof = True
+            else:
+                self.buffer = chunk
+        size = min(len(target), len(self.buffer))
+        target[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+
+class _HashingReader:
+    """File wrapper that hashes everything read through it"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        self.sha256.update(data)
+        return data
+
+
+class BundleService:
+    """Stream a lab (JSON, links, domain XML and qcow2 overlays) to and from a .tar.gz bundle"""
+
+    def __init__(self, router_service, lab_service, link_service,
+                 images_path: str = "/var/lib/libvirt/images", compresslevel: int = 6):
+        self.router_service = router_service
+        self.lab_service = lab_service
+        self.link_service = link_service
+        self.images_path = images_path
+        self.compresslevel = compresslevel
+
+    @staticmethod
+    def _backing_chain(path: str) -> List[Dict]:
+        """qemu-img's view of an image and everything below it"""
+        result = instrumentation.run(
+            ["qemu-img", "info", "--force-share", "--backing-chain", "--output=json", path],
+            capture_output=True, text=True, timeout=30, check=True
+        )
+        return json.loads(result.stdout)
+
+    # ----------------------------------------
+    # Export
+    # ----------------------------------------
+
+    def prepare_export(self, lab_name: str) -> Dict:
+        """Validate a lab for export and build its manifest (before any bytes are streamed)"""
+        lab = self.lab_service.get_lab(lab_name)
+        if "error" in lab:
+            return {"success": False, "message": lab["error"]}
+
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "lab": lab_name,
+            "exported_at": datetime.now().isoformat(),
+            "routers": []
+        }
+        files = []
+
+        for router in self.lab_service.get_lab_routers(lab_name, self.router_service):
+            entry = {"name": router["name"], "router_type": router["router_type"], "domains": []}
+            for domain in self.router_service.get_domains(router["name"]):
+                if domain.isActive():
+                    return {"success": False,
+                            "message": f"{domain.name()} is running - stop the lab before exporting"}
+
+                xml = domain.XMLDesc(libvirt.VIR_DOMAIN_XML_INACTIVE)
+                disks = []
+                for disk in ET.fromstring(xml).findall("./devices/disk[@device='disk']"):
+                    source = disk.find("source")
+                    if source is None or not source.get("file"):
+                        continue
+                    overlay = source.get("file")
+                    chain = self._backing_chain(overlay)
+                    if len(chain) > 2:
+                        return {"success": False,
+                                "message": f"{domain.name()} has snapshot overlays - delete lab "
+                                           f"snapshots before exporting"}
+                    backing = chain[1]["filename"] if len(chain) == 2 else None
+                    member = f"disks/{os.path.basename(overlay)}"
+                    disks.append({
+                        "target": disk.find("target").get("dev"),
+                        "member": member,
+                        "backing_file": os.path.basename(backing) if backing else None,
+                        "backing_format": chain[1].get("format", "qcow2") if backing else None
+                    })
+                    files.append((member, overlay))
+
+                entry["domains"].append({"name": domain.name(), "disks": disks})
+                files.append((f"domains/{domain.name()}.xml", xml.encode()))
+            manifest["routers"].append(entry)
+
+        links = self.link_service.list_links(lab=lab_name)
+        return {"success": True, "manifest": manifest, "lab": lab, "links": links, "files": files}
+
+    def _write_bundle(self, plan: Dict, fileobj):
+        """Produce the tar.gz stream; checksums go last since they are computed while streaming"""
+        checksums = {}
+
+        def add_bytes(tar, name: str, data: bytes):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+            checksums[name] = hashlib.sha256(data).hexdigest()
+
+        with gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=self.compresslevel) as gz:
+            with tarfile.open(fileobj=gz, mode="w|") as tar:
+                add_bytes(tar, "manifest.json", json.dumps(plan["manifest"], indent=2).encode())
+                add_bytes(tar, "lab.json", json.dumps(plan["lab"], indent=2).encode())
+                add_bytes(tar, "links.json", json.dumps(plan["links"], indent=2).encode())
+
+                for member, source in plan["files"]:
+                    if isinstance(source, bytes):
+                        add_bytes(tar, member, source)
+                        continue
+                    with open(source, "rb") as f:
+                        info = tar.gettarinfo(fileobj=f, arcname=member)
+                        reader = _HashingReader(f)
+                        tar.addfile(info, reader)
+                        checksums[member] = reader.sha256.hexdigest()
+
+                add_bytes(tar, "checksums.json", json.dumps(checksums, indent=2).encode())
+
+    def stream_export(self, plan: Dict) -> Iterator[bytes]:
+        """Yield the compressed bundle as it is produced, without staging it on disk"""
+        chunks: "queue.Queue" = queue.Queue(maxsize=16)
+        cancelled = threading.Event()
+        done = object()
+        failure = []
+
+        def produce():
+            try:
+                writer = io.BufferedWriter(_QueueWriter(chunks, cancelled), buffer_size=CHUNK_SIZE)
+                self._write_bundle(plan, writer)
+                writer.flush()
+            except Exception as e:
+                failure.append(e)
+            finally:
+                while not cancelled.is_set():
+                    try:
+                        chunks.put(done, timeout=1)
+                        break
+                    except queue.Full:
+                        continue
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is done:
+                    break
+                yield chunk
+            if failure:
+                raise failure[0]
+        finally:
+            # Client went away (or we finished): unblock and stop the producer
+            cancelled.set()
+            producer.join(timeout=5)
+
+    # ----------------------------------------
+    # Import
+    # ----------------------------------------
+
+    @staticmethod
+    def _find_base_image(basename: str) -> Optional[str]:
+        """The installed base image with this file name; overlays may only be rebased onto BASE_IMAGES"""
+        for images in BASE_IMAGES.values():
+            for base in images.values():
+                if os.path.basename(base) == basename and os.path.exists(base):
+                    return base
+        return None
+
+    def _ensure_internal_network(self, conn, network_name: str) -> bool:
+        """Recreate a vQFX RE↔PFE network referenced by an imported domain; True if it was created"""
+        try:
+            conn.networkLookupByName(network_name)
+            return False
+        except libvirt.libvirtError:
+            pass
+        switch_name = network_name[:-len("-internal")]
+        network = conn.networkDefineXML(
+            f"<network><name>{network_name}</name>"
+            f"<bridge name='virbr-{switch_name}' stp='on' delay='0'/></network>"
+        )
+        network.create()
+        network.setAutostart(1)
+        return True
+
+    def _rollback(self, conn, domains: List[str], networks: List[str], paths: List[str]):
+        """Undo a failed import: its domains, networks and disks (final and temporary)"""
+        for name in domains:
+            try:
+                conn.lookupByName(name).undefine()
+            except libvirt.libvirtError as e:
+                print(f"⚠ Could not undefine {name} after failed import: {e}")
+        for name in networks:
+            try:
+                network = conn.networkLookupByName(name)
+                if network.isActive():
+                    network.destroy()
+                network.undefine()
+            except libvirt.libvirtError as e:
+                print(f"⚠ Could not remove network {name} after failed import: {e}")
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _keep_children(element, allowed):
+        for child in list(element):
+            if child.tag not in allowed:
+                element.remove(child)
+
+    def _sanitize_domain(self, xml: str, name: str, router: str, disk_paths: Dict[str, str]) -> str:
+        """Rebuild an imported domain from the parts a lab router needs (whitelist)"""
+        root = ET.fromstring(xml)
+        if root.tag != "domain" or root.get("type") not in ("kvm", "qemu"):
+            raise ValueError(f"{name}: not a kvm/qemu domain definition")
+        metadata = root.find("metadata")
+        if metadata is not None:
+            root.remove(metadata)
+        for element in root.iter():
+            if element.tag.startswith("{"):
+                raise ValueError(f"{name}: namespaced element {element.tag} is not allowed")
+            if element.tag in REJECTED_DEVICES:
+                raise ValueError(f"{name}: <{element.tag}> devices are not allowed")
+
+        self._keep_children(root, DOMAIN_ELEMENTS)
+        ET.SubElement(root, "name").text = name
+        os_element = root.find("os")
+        if os_element is not None:
+            self._keep_children(os_element, OS_ELEMENTS)
+
+        devices = root.find("devices")
+        if devices is None:
+            raise ValueError(f"{name}: no devices")
+        self._keep_children(devices, DEVICE_ELEMENTS)
+        for device in list(devices):
+            if device.tag == "disk":
+                keep = self._sanitize_disk(device, name, disk_paths)
+            elif device.tag == "interface":
+                keep = self._sanitize_interface(device, name, router)
+            elif device.tag in ("serial", "console"):
+                keep = device.get("type") == "pty"
+                self._keep_children(device, {"target", "address"})
+            elif device.tag == "channel":
+                # Guest agent socket: libvirt picks the path
+                keep = device.get("type") == "unix"
+                self._keep_children(device, {"target", "address"})
+            elif device.tag == "graphics":
+                keep = device.get("type") in ("vnc", "spice")
+                device.attrib = {"type": device.get("type"), "autoport": "yes",
+                                 "listen": device.get("listen", "127.0.0.1")}
+                self._keep_children(device, set())
+            elif device.tag == "input":
+                keep = device.get("type") in ("mouse", "tablet", "keyboard")
+            elif device.tag == "rng":
+                backend = device.find("backend")
+                keep = (backend is not None and backend.get("model") == "random"
+                        and (backend.text or "").strip() in ("/dev/urandom", "/dev/random"))
+            else:
+                keep = True
+            if not keep:
+                devices.remove(device)
+        return ET.tostring(root, encoding="unicode")
+
+    @staticmethod
+    def _sanitize_disk(disk, name: str, disk_paths: Dict[str, str]) -> bool:
+        """Point a bundled disk at its local overlay; other media are dropped"""
+        if disk.get("device") in ("cdrom", "floppy"):
+            # Config-drive ISOs live outside the bundle
+            return False
+        target = disk.find("target")
+        if disk.get("device", "disk") != "disk" or target is None or target.get("dev") not in disk_paths:
+            raise ValueError(f"{name}: disk {target.get('dev') if target is not None else '?'} is not in the bundle")
+        BundleService._keep_children(disk, DISK_ELEMENTS)
+        disk.set("type", "file")
+        driver = disk.find("driver")
+        if driver is not None:
+            driver.set("name", "qemu")
+            driver.set("type", "qcow2")
+        ET.SubElement(disk, "source", {"file": disk_paths[target.get("dev")]})
+        return True
+
+    @staticmethod
+    def _sanitize_interface(interface, name: str, router: str) -> bool:
+        """Only the management bridge and the router's own vQFX internal network"""
+        source = interface.find("source")
+        kind = interface.get("type")
+        if kind == "bridge" and source is not None and source.get("bridge") == MANAGEMENT_BRIDGE:
+            attrs = {"bridge": MANAGEMENT_BRIDGE}
+        elif kind == "network" and source is not None and source.get("network") == f"{router}-internal":
+            attrs = {"network": f"{router}-internal"}
+        else:
+            raise ValueError(f"{name}: interfaces may only use bridge {MANAGEMENT_BRIDGE} "
+                             f"or network {router}-internal")
+        BundleService._keep_children(interface, INTERFACE_ELEMENTS)
+        ET.SubElement(interface, "source", attrs)
+        return True
+
+    def import_bundle(self, fileobj: QueueReader) -> Dict:
+        """Stream-decompress a bundle, verify checksums, rebase overlays and define the lab"""
+        try:
+            return self._import_bundle(fileobj)
+        finally:
+            fileobj.abandoned.set()
+
+    def _import_bundle(self, fileobj) -> Dict:
+        manifest = lab = None
+        links: List[Dict] = []
+        domain_xml: Dict[str, str] = {}
+        written: Dict[str, str] = {}
+        digests: Dict[str, str] = {}
+        checksums: Optional[Dict] = None
+        defined: List[str] = []
+        networks: List[str] = []
+        conn = self.router_service.conn
+
+        try:
+            with gzip.GzipFile(fileobj=fileobj, mode="rb") as gz, tarfile.open(fileobj=gz, mode="r|") as tar:
+                for member in tar:
+                    if not member.isfile():
+                        continue
+                    f = tar.extractfile(member)
+
+                    if member.name.startswith("disks/"):
+                        if manifest is None:
+                            raise ValueError("Bundle does not start with a manifest")
+                        expected = {d["member"] for r in manifest["routers"]
+                                    for dom in r["domains"] for d in dom["disks"]}
+                        if member.name not in expected:
+                            raise ValueError(f"Unexpected bundle member: {member.name}")
+                        target_path = os.path.join(self.images_path, os.path.basename(member.name))
+                        tmp_path = f"{target_path}.import"
+                        written[member.name] = tmp_path
+                        sha256 = hashlib.sha256()
+                        with open(tmp_path, "wb") as out:
+                            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                                sha256.update(chunk)
+                                out.write(chunk)
+                        digests[member.name] = sha256.hexdigest()
+                        continue
+
+                    data = f.read()
+                    digests[member.name] = hashlib.sha256(data).hexdigest()
+                    if member.name == "manifest.json":
+                        manifest = json.loads(data)
+                        if manifest.get("format") != BUNDLE_FORMAT:
+                            raise ValueError(f"Unsupported bundle format: {manifest.get('format')}")
+                        self._check_conflicts(manifest)
+                    elif member.name == "lab.json":
+                        lab = json.loads(data)
+                    elif member.name == "links.json":
+                        links = json.loads(data)
+                    elif member.name.startswith("domains/") and member.name.endswith(".xml"):
+                        domain_xml[os.path.basename(member.name)[:-4]] = data.decode()
+                    elif member.name == "checksums.json":
+                        checksums = json.loads(data)
+
+            if manifest is None or lab is None or checksums is None:
+                raise ValueError("Bundle is incomplete")
+            for name, digest in checksums.items():
+                if digests.get(name) != digest:
+                    raise ValueError(f"Checksum mismatch for {name}")
+
+            # The whole lab goes on one node, like a deploy
+            memory_mb = sum(int(ET.fromstring(xml).findtext("memory", "0")) for xml in domain_xml.values()) // 1024
+            conn = self.router_service.nodes[self.router_service.place_lab(lab["name"], memory_mb)].conn
+
+            for router in manifest["routers"]:
+                if not NAME_PATTERN.match(router["name"]):
+                    raise ValueError(f"Invalid router name: {router['name']}")
+                for domain in router["domains"]:
+                    if domain["name"] not in (router["name"], f"{router['name']}-re", f"{router['name']}-pfe"):
+                        raise ValueError(f"Domain {domain['name']} does not belong to router {router['name']}")
+                    disk_paths = {}
+                    for disk in domain["disks"]:
+                        tmp_path = written[disk["member"]]
+                        if disk["backing_file"]:
+                            base = self._find_base_image(disk["backing_file"])
+                            if base is None:
+                                raise ValueError(f"{disk['backing_file']} is not a base image installed on this host")
+                            instrumentation.run(
+                                ["qemu-img", "rebase", "-u", "-F", disk["backing_format"],
+                                 "-b", base, tmp_path],
+                                capture_output=True, text=True, timeout=30, check=True
+                            )
+                        final_path = tmp_path[:-len(".import")]
+                        os.replace(tmp_path, final_path)
+                        written[disk["member"]] = final_path
+                        disk_paths[disk["target"]] = final_path
+                    xml = self._sanitize_domain(domain_xml[domain["name"]], domain["name"],
+                                                router["name"], disk_paths)
+                    internal = f"{router['name']}-internal"
+                    uses_internal = ET.fromstring(xml).find("./devices/interface[@type='network']") is not None
+                    if uses_internal and self._ensure_internal_network(conn, internal):
+                        networks.append(internal)
+                    conn.defineXML(xml)
+                    defined.append(domain["name"])
+        except Exception as e:
+            self._rollback(conn, defined, networks, list(written.values()))
+            return {"success": False, "message": f"Import failed: {e}"}
+
+        self.lab_service.create_lab(lab["name"], lab.get("description", ""))
+        for router in manifest["routers"]:
+            self.lab_service.add_router(lab["name"], router["name"])
+        for link in links:
+            self.link_service.create_link(LinkCreate(**link), self.router_service)
+
+        routers = [r["name"] for r in manifest["routers"]]
+        return {
+            "success": True,
+            "message": f"Lab '{lab['name']}' imported with {len(routers)} router(s)",
+            "routers": routers,
+            "links": len(links)
+        }
+
+    def _check_conflicts(self, manifest: Dict):
+        """Refuse to overwrite an existing lab, domain or disk"""
+        if "error" not in self.lab_service.get_lab(manifest["lab"]):
+            raise ValueError(f"Lab '{manifest['lab']}' already exists")
+        for router in manifest["routers"]:
+            for domain in router["domains"]:
+                try:
+                    self.router_service.conn.lookupByName(domain["name"])
+                    raise ValueError(f"Domain {domain['name']} already exists")
+                except libvirt.libvirtError:
+                    pass
+                for disk in domain["disks"]:
+                    if os.path.exists(os.path.join(self.images_path, os.path.basename(disk["member"]))):
+                        raise ValueError(f"Disk {disk['member']} already exists")
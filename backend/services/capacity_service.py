@@ -0,0 +1,212 @@
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import libvirt
+
+from backend.models.topology import Topology
+from backend.services.snapshot_service import SnapshotService
+
+
+class CapacityService:
+    """Lab resource quotas and "does this fit?" planning against host memory.
+
+    A quota check followed by a create is not atomic on its own: hold() checks
+    and reserves the additions under a per-lab lock, and every later check of
+    that lab counts them until release(), once the routers exist (or failed).
+    """
+
+    def __init__(self, router_service, lab_service, stats_service, inventory,
+                 reserve_mb: int = 2048):
+        self.router_service = router_service
+        self.lab_service = lab_service
+        self.stats_service = stats_service
+        self.inventory = inventory
+        self.reserve_mb = reserve_mb  # Kept free for the host itself
+        self._lab_locks: Dict[str, threading.Lock] = {}
+        self._reservations: Dict[int, Dict] = {}  # id -> {"lab", "running_only", "vcpus", "memory_mb"}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _disk_usage_gb(self, router_names: List[str]) -> float:
+        """Space actually allocated by the routers' writable disks (thin overlays grow over time)"""
+        allocated = 0
+        for name in router_names:
+            try:
+                domains = self.router_service.get_domains(name)
+            except libvirt.libvirtError:
+                continue
+            for domain in domains:
+                for disk in SnapshotService.get_disks(domain):
+                    if disk["readonly"] or not disk["source"]:
+                        continue
+                    try:
+                        allocated += os.stat(disk["source"]).st_blocks * 512
+                    except OSError:
+                        pass
+        return round(allocated / (1024 ** 3), 2)
+
+    def lab_usage(self, lab_name: str, running_only: bool = False,
+                  include_disk: bool = False) -> Dict:
+        """vCPUs and memory of a lab's routers (all of them, or only the running ones)"""
+        routers = self.lab_service.get_lab_routers(lab_name, self.router_service)
+        counted = [r for r in routers if not running_only or r["state"] in ("running", "partial")]
+        usage = {
+            "vcpus": sum(r["vcpus"] for r in counted),
+            "memory_mb": sum(r["memory_mb"] for r in counted)
+        }
+        if include_disk:
+            usage["disk_gb"] = self._disk_usage_gb([r["name"] for r in routers])
+        return usage
+
+    def _reserved(self, lab_name: str, running_only: bool) -> Dict:
+        """Footprints held for a lab; created routers start, so they count against running quotas too"""
+        with self._lock:
+            held = [r for r in self._reservations.values()
+                    if r["lab"] == lab_name and (running_only or not r["running_only"])]
+        return {"vcpus": sum(r["vcpus"] for r in held), "memory_mb": sum(r["memory_mb"] for r in held)}
+
+    def check_lab_quota(self, lab_name: str, additions: List[Dict] = None,
+                        running_only: bool = False) -> Dict:
+        """Would the lab stay within its budget after adding these footprints?"""
+        lab = self.lab_service.get_lab(lab_name)
+        quota = lab.get("quota") or {}
+        if "error" in lab or not quota:
+            return {"success": True, "message": "No quota"}
+
+        usage = self.lab_usage(lab_name, running_only, include_disk="max_disk_gb" in quota)
+        reserved = self._reserved(lab_name, running_only)
+        wanted = {
+            "vcpus": usage["vcpus"] + reserved["vcpus"] + sum(a["vcpus"] for a in additions or []),
+            "memory_mb": usage["memory_mb"] + reserved["memory_mb"] + sum(a["memory_mb"] for a in additions or [])
+        }
+
+        exceeded = []
+        if "max_vcpus" in quota and wanted["vcpus"] > quota["max_vcpus"]:
+            exceeded.append(f"{wanted['vcpus']} vCPUs > {quota['max_vcpus']}")
+        if "max_memory_mb" in quota and wanted["memory_mb"] > quota["max_memory_mb"]:
+            exceeded.append(f"{wanted['memory_mb']} MB RAM > {quota['max_memory_mb']} MB")
+        # Disk is checked on what is already allocated: new overlays start empty
+        if "max_disk_gb" in quota and usage["disk_gb"] > quota["max_disk_gb"]:
+            exceeded.append(f"{usage['disk_gb']} GB disk > {quota['max_disk_gb']} GB")
+
+        if exceeded:
+            return {"success": False, "message": f"Lab '{lab_name}' quota exceeded: {', '.join(exceeded)}",
+                    "usage": usage, "quota": quota}
+        return {"success": True, "message": "Within quota", "usage": usage, "quota": quota}
+
+    def hold(self, lab_name: Optional[str], additions: List[Dict], running_only: bool = False) -> Dict:
+        """check_lab_quota, and on success reserve the additions until release(result["reservation"])"""
+        if not lab_name or not additions:
+            return {"success": True, "message": "Nothing to reserve", "reservation": None}
+        with self._lock:
+            lab_lock = self._lab_locks.setdefault(lab_name, threading.Lock())
+        with lab_lock:
+            result = self.check_lab_quota(lab_name, additions, running_only)
+            result["reservation"] = None
+            if result["success"]:
+                result["reservation"] = next(self._ids)
+                with self._lock:
+                    self._reservations[result["reservation"]] = {
+                        "lab": lab_name,
+                        "running_only": running_only,
+                        "vcpus": sum(a["vcpus"] for a in additions),
+                        "memory_mb": sum(a["memory_mb"] for a in additions)
+                    }
+        return result
+
+    def release(self, reservation: Optional[int]):
+        with self._lock:
+            self._reservations.pop(reservation, None)
+
+    @contextmanager
+    def reserve(self, lab_name: Optional[str], additions: List[Dict],
+                running_only: bool = False) -> Iterator[Dict]:
+        """hold() for the duration of a block"""
+        result = self.hold(lab_name, additions, running_only)
+        try:
+            yield result
+        finally:
+            self.release(result["reservation"])
+
+    def held_while(self, result: Dict, events: Iterator) -> Iterator:
+        """Pass a streamed operation's events through, releasing the hold when it ends"""
+        try:
+            yield from events
+        finally:
+            self.release(result["reservation"])
+
+    def plan(self, topology: Topology) -> Dict:
+        """Does a topology fit in its node's memory now, and which labs would have to be suspended if not.
+
+        A lab is placed on a single node, so the fit is checked against the node
+        the scheduler would pick for it, not the cluster's summed free memory.
+        """
+        started_at = time.perf_counter()
+
+        # Routers that are already running cost nothing extra
+        needed_mb = 0
+        needed_vcpus = 0
+        new_routers = []
+        for router in topology.routers:
+            existing = self.inventory.router(router.name)
+            if existing and existing["active"]:
+                continue
+            if existing:
+                needed_mb += existing["memory_mb"]
+                needed_vcpus += existing["vcpus"]
+            else:
+                footprint = self.router_service.footprint(router.router_type, router.ram_gb, router.vcpus)
+                needed_mb += footprint["memory_mb"]
+                needed_vcpus += footprint["vcpus"]
+                new_routers.append(footprint)
+
+        host = self.stats_service.get_host_memory()
+        node = self.router_service.place(lab=topology.name)
+        available_mb = node.free_memory_mb() - self.reserve_mb
+        deficit_mb = needed_mb - available_mb
+
+        # Greedy, largest running lab first: fewest labs suspended to cover the deficit.
+        # Only routers on the chosen node free memory there.
+        suggestions = []
+        if deficit_mb > 0:
+            candidates = []
+            for lab_name, members in self.lab_service.members.items():
+                if lab_name == topology.name:
+                    continue
+                running_mb = 0
+                for member in members:
+                    entry = self.inventory.router(member)
+                    if entry and entry["active"] and self.router_service.node_of(member) == node.name:
+                        running_mb += entry["memory_mb"]
+                if running_mb:
+                    candidates.append({"lab": lab_name, "memory_mb": running_mb})
+
+            covered = 0
+            for candidate in sorted(candidates, key=lambda c: c["memory_mb"], reverse=True):
+                if covered >= deficit_mb:
+                    break
+                suggestions.append(candidate)
+                covered += candidate["memory_mb"]
+            if covered < deficit_mb:
+                suggestions = []
+
+        quota = self.check_lab_quota(topology.name, new_routers)
+        fits = deficit_mb <= 0 and quota["success"]
+        return {
+            "topology": topology.name,
+            "node": node.name,
+            "fits": fits,
+            "needed_memory_mb": needed_mb,
+            "needed_vcpus": needed_vcpus,
+            "available_memory_mb": max(available_mb, 0),
+            "host_memory": host,
+            "deficit_mb": max(deficit_mb, 0),
+            "suspend": suggestions,
+            "can_fit_by_suspending": deficit_mb > 0 and bool(suggestions),
+            "quota": quota,
+            "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 2)
+        }
@@ -0,0 +1,260 @@
+import json
+import os
+import subprocess
+import threading
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import libvirt
+
+from backend.models.link import LinkCreate
+from backend.services.task_graph import parallel_map
+from backend.services import instrumentation
+
+MAX_CLONES = 16
+GUEST_AGENT_CHANNEL = "org.qemu.guest_agent.0"
+
+
+class CloneService:
+    """Linked clones of a whole lab: thin qcow2 overlays over a frozen copy of each source disk.
+
+    A clone's disk holds the source's configuration, management address
+    included, so labs whose routers were given a day-0 management IP (a config
+    drive) are refused: every clone would boot with the same address on br0.
+    """
+
+    def __init__(self, router_service, lab_service, link_service, snapshot_service,
+                 images_path: str = "/var/lib/libvirt/images", max_parallel: int = 8):
+        self.router_service = router_service
+        self.lab_service = lab_service
+        self.link_service = link_service
+        self.snapshot_service = snapshot_service
+        self.images_path = images_path
+        self.max_parallel = max_parallel
+        self._network_lock = threading.Lock()
+
+    @staticmethod
+    def _rename(name: str, source_lab: str, target_lab: str) -> str:
+        """lab-r1 → lab01-r1; members without the lab prefix get one (r1 → lab01-r1)"""
+        if not name.startswith(f"{source_lab}-"):
+            return f"{target_lab}-{name}"
+        return f"{target_lab}-{name[len(source_lab) + 1:]}"
+
+    @staticmethod
+    def _has_own_data(path: str) -> bool:
+        """Whether anything was written to an overlay itself (not just read through it)"""
+        result = instrumentation.run(
+            ["qemu-img", "map", "--force-share", "--output=json", path],
+            capture_output=True, text=True, timeout=30, check=True
+        )
+        return any(extent["depth"] == 0 for extent in json.loads(result.stdout))
+
+    def _day0_drive(self, domain) -> Optional[str]:
+        """Config drive attached to a domain (set when it was created with a management IP)"""
+        for disk in self.snapshot_service.get_disks(domain):
+            if disk["device"] == "cdrom" and disk["source"]:
+                return disk["source"]
+        return None
+
+    def _frozen_base(self, domain, disks: List[Dict]) -> Optional[Dict[str, str]]:
+        """The files frozen by the last clone, if the source has not changed since"""
+        if domain.isActive() or not domain.hasCurrentSnapshot(0):
+            return None
+        if not domain.snapshotCurrent(0).getName().startswith("clone-base-"):
+            return None
+        frozen = {}
+        for disk in disks:
+            chain = self.router_service.backing_chain(disk["source"])
+            if not chain or self._has_own_data(disk["source"]):
+                return None
+            frozen[disk["target"]] = chain[0]
+        return frozen
+
+    def _snapshot_consistent(self, domain, tag: str) -> Dict:
+        """Disk-only snapshot of a quiet source: quiesced by the guest agent when it
+        answers, otherwise with the domain paused for the instant it takes"""
+        description = "Linked-clone base"
+        if not domain.isActive():
+            return self.snapshot_service.snapshot_domain(domain, tag, description, include_memory=False)
+
+        root = ET.fromstring(domain.XMLDesc(0))
+        agent = root.find(f"./devices/channel/target[@name='{GUEST_AGENT_CHANNEL}']")
+        if agent is not None and agent.get("state") == "connected":
+            result = self.snapshot_service.snapshot_domain(
+                domain, tag, description, include_memory=False,
+                extra_flags=libvirt.VIR_DOMAIN_SNAPSHOT_CREATE_QUIESCE
+            )
+            if result["success"]:
+                return result
+
+        domain.suspend()
+        try:
+            return self.snapshot_service.snapshot_domain(domain, tag, description, include_memory=False)
+        finally:
+            domain.resume()
+
+    def _freeze_source(self, domain, tag: str) -> Dict:
+        """Put a fresh overlay on the source so its current disk becomes an immutable backing file
+        (or reuse the last one if the source has not changed since)"""
+        disks = [d for d in self.snapshot_service.get_disks(domain)
+                 if d["device"] == "disk" and not d["readonly"] and d["source"]]
+        try:
+            frozen = self._frozen_base(domain, disks)
+            if frozen:
+                return {"success": True, "domain": domain.name(), "disks": frozen, "reused": True}
+            result = self._snapshot_consistent(domain, tag)
+        except (libvirt.libvirtError, subprocess.CalledProcessError) as e:
+            return {"success": False, "domain": domain.name(),
+                    "message": getattr(e, "stderr", None) or str(e)}
+        result["disks"] = {d["target"]: d["source"] for d in disks}
+        return result
+
+    def _clone_domain(self, job: Dict) -> Dict:
+        """Create a clone's overlays and define its domain"""
+        root = ET.fromstring(job["xml"])
+        root.find("name").text = job["name"]
+        uuid = root.find("uuid")
+        if uuid is not None:
+            root.remove(uuid)
+
+        # The overlays sit on the frozen files, so a clone lives on its source's node
+        conn = self.router_service.nodes[job["node"]].conn
+        overlays = []
+        try:
+            devices = root.find("devices")
+            for disk in list(devices.findall("disk")):
+                target = disk.find("target").get("dev")
+                if target in job["disks"]:
+                    overlay = os.path.join(self.images_path, f"{job['name']}-{target}.qcow2"
+                                           if len(job["disks"]) > 1 else f"{job['name']}.qcow2")
+                    instrumentation.run(
+                        ["qemu-img", "create", "-q", "-f", "qcow2", "-F", "qcow2",
+                         "-b", job["disks"][target], overlay],
+                        capture_output=True, text=True, timeout=30, check=True
+                    )
+                    overlays.append(overlay)
+                    disk.find("source").set("file", overlay)
+                    driver = disk.find("driver")
+                    if driver is not None:
+                        driver.set("type", "qcow2")
+                elif disk.get("device") == "cdrom":
+                    # An empty drive; sources with a config drive are refused up front
+                    devices.remove(disk)
+
+            for interface in devices.findall("interface"):
+                mac = interface.find("mac")
+                if mac is not None:
+                    interface.remove(mac)
+                source = interface.find("source")
+                network = source.get("network") if source is not None else None
+                if network and network.endswith("-internal"):
+                    clone_network = network.replace(job["source_base"], job["target_base"], 1)
+                    self._ensure_network(conn, clone_network)
+                    source.set("network", clone_network)
+
+            conn.defineXML(ET.tostring(root, encoding="unicode"))
+            return {"success": True, "domain": job["name"]}
+        except (libvirt.libvirtError, subprocess.CalledProcessError) as e:
+            # Nothing refers to the overlays of a clone that was never defined
+            for overlay in overlays:
+                try:
+                    os.remove(overlay)
+                except OSError:
+                    pass
+            return {"success": False, "domain": job["name"],
+                    "message": getattr(e, "stderr", None) or str(e)}
+
+    def _ensure_network(self, conn, network_name: str):
+        """Isolated RE↔PFE network for a cloned vQFX (libvirt picks the bridge name)"""
+        # RE and PFE of the same switch are cloned concurrently and share this network
+        with self._network_lock:
+            try:
+                conn.networkLookupByName(network_name)
+            except libvirt.libvirtError:
+                network = conn.networkDefineXML(f"<network><name>{network_name}</name></network>")
+                network.create()
+                network.setAutostart(1)
+
+    def clone_lab(self, lab_name: str, count: int, prefix: Optional[str] = None) -> Dict:
+        """Create count linked clones of a lab, named <prefix>01, <prefix>02, ..."""
+        if "error" in self.lab_service.get_lab(lab_name):
+            return {"success": False, "message": f"Lab '{lab_name}' not found"}
+        if not 1 <= count <= MAX_CLONES:
+            return {"success": False, "message": f"count must be between 1 and {MAX_CLONES}"}
+
+        prefix = prefix or lab_name
+        targets = [f"{prefix}{i:02d}" for i in range(1, count + 1)]
+        existing = [t for t in targets if "error" not in self.lab_service.get_lab(t)]
+        if existing:
+            return {"success": False, "message": f"Lab(s) already exist: {', '.join(existing)}"}
+
+        routers = self.lab_service.get_lab_routers(lab_name, self.router_service)
+        if not routers:
+            return {"success": False, "message": f"Lab '{lab_name}' has no routers"}
+
+        # Freeze each source disk once; every clone overlays the same frozen files
+        tag = datetime.now().strftime("clone-base-%Y%m%d-%H%M%S")
+        sources = []
+        for router in routers:
+            for domain in self.router_service.get_domains(router["name"]):
+                sources.append({"router": router["name"], "domain": domain,
+                                "node": self.router_service.node_of(router["name"]),
+                                "xml": domain.XMLDesc(libvirt.VIR_DOMAIN_XML_INACTIVE)})
+        addressed = sorted({s["router"] for s in sources if self._day0_drive(s["domain"])})
+        if addressed:
+            return {"success": False,
+                    "message": f"Cannot clone lab '{lab_name}': {', '.join(addressed)} have a day-0 "
+                               f"management IP that every clone would reuse"}
+        frozen = parallel_map(lambda s: self._freeze_source(s["domain"], tag), sources, self.max_parallel)
+        failed = [r for r in frozen if not r["success"]]
+        if failed:
+            return {"success": False, "message": "Could not freeze source disks", "failed": failed}
+
+        jobs = []
+        for target in targets:
+            for source, freeze in zip(sources, frozen):
+                jobs.append({
+                    "lab": target,
+                    "node": source["node"],
+                    "name": self._rename(source["domain"].name(), lab_name, target),
+                    "source_base": source["router"],
+                    "target_base": self._rename(source["router"], lab_name, target),
+                    "xml": source["xml"],
+                    "disks": freeze["disks"]
+                })
+
+        results = parallel_map(self._clone_domain, jobs, self.max_parallel)
+
+        links = self.link_service.list_links(lab=lab_name)
+        cloned = {r["domain"] for r in results if r["success"]}
+        clones: List[Dict] = []
+        for target in targets:
+            self.lab_service.create_lab(target, f"Clone of {lab_name}")
+            # Routers added to the clone later join it on the same node
+            self.router_service.place_lab(target, node=sources[0]["node"])
+            remap = {r["name"]: self._rename(r["name"], lab_name, target) for r in routers}
+            for clone_name in remap.values():
+                # A vQFX clone counts once both of its halves were defined
+                if clone_name in cloned or {f"{clone_name}-re", f"{clone_name}-pfe"} <= cloned:
+                    self.lab_service.add_router(target, clone_name)
+
+            # Links to routers outside the lab keep pointing at the shared router
+            for link in links:
+                self.link_service.create_link(LinkCreate(
+                    source_router=remap.get(link["source_router"], link["source_router"]),
+                    source_interface=link["source_interface"],
+                    target_router=remap.get(link["target_router"], link["target_router"]),
+                    target_interface=link["target_interface"],
+                    lab=target
+                ))
+            clones.append({"lab": target, "routers": list(remap.values())})
+
+        failed = [r for r in results if not r["success"]]
+        return {
+            "success": not failed,
+            "message": f"Created {count} clone(s) of '{lab_name}'" if not failed
+                       else f"{len(failed)} domain(s) failed to clone",
+            "clones": clones,
+            "failed": failed
+        }
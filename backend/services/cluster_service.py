@@ -0,0 +1,357 @@
+import threading
+from typing import Dict, List, Optional
+
+import libvirt
+
+from backend.services import instrumentation
+from backend.services.connection_manager import ConnectionManager, LibvirtUnavailable, ManagedConnection
+from backend.services.router_service import RouterService
+from backend.services.stats_service import StatsService
+from backend.services.task_graph import parallel_map
+
+
+def parse_nodes(spec: Optional[str], default_uri: str) -> Dict[str, str]:
+    """"name=uri,name=uri" (VRHOST_NODES) as an ordered dict; one 'local' node when unset"""
+    if not spec:
+        return {"local": default_uri}
+    nodes = {}
+    for entry in spec.split(","):
+        if entry.strip():
+            name, _, uri = entry.strip().partition("=")
+            if not uri:
+                raise ValueError(f"Node entry needs name=uri: {entry!r}")
+            nodes[name.strip()] = uri.strip()
+    return nodes
+
+
+class Node:
+    """One hypervisor: its connection pool, router service and stats"""
+
+    def __init__(self, name: str, uri: str, pool_size: int = 4, config_drive_service=None,
+                 reclaimer=None, telemetry=None):
+        self.name = name
+        self.uri = uri
+        self.connections = ConnectionManager(uri, pool_size=pool_size)
+        self.conn = instrumentation.InstrumentedConnection(ManagedConnection(self.connections))
+        self.router_service = RouterService(self.conn, config_drive_service=config_drive_service,
+                                            uri=uri, reclaimer=reclaimer, telemetry=telemetry)
+        self.stats_service = StatsService(self.conn)
+
+    def free_memory_mb(self) -> int:
+        """Host RAM available for new guests"""
+        try:
+            return self.stats_service.get_host_memory()["available_mb"]
+        except libvirt.libvirtError:
+            # Drivers without node memory stats: total minus what running guests were given
+            total_mb = self.conn.getInfo()[1]
+            used_kib = sum(d.info()[2] for d in self.conn.listAllDomains(libvirt.VIR_CONNECT_LIST_DOMAINS_ACTIVE))
+            return total_mb - int(used_kib / 1024)
+
+
+class ClusterConnection:
+    """virConnect-like view over every node.
+
+    Domain listing and host totals are aggregated and lookups go to the node
+    that holds the domain; everything else (defining domains and networks) goes
+    to the first node.
+    """
+
+    def __init__(self, cluster: "ClusterRouterService"):
+        self._cluster = cluster
+
+    def listAllDomains(self, flags: int = 0) -> List:
+        domains = []
+        for node in self._cluster.connected_nodes():
+            domains.extend(node.conn.listAllDomains(flags))
+        return domains
+
+    def lookupByName(self, name: str):
+        node = self._cluster.locate(name)
+        if node is None:
+            raise libvirt.libvirtError(f"Domain not found: no domain with matching name '{name}'")
+        return node.conn.lookupByName(name)
+
+    def getInfo(self) -> List:
+        infos = [node.conn.getInfo() for node in self._cluster.connected_nodes()]
+        if not infos:
+            raise LibvirtUnavailable("No hypervisor node is connected")
+        info = list(infos[0])
+        info[1] = sum(i[1] for i in infos)  # memory MB
+        info[2] = sum(i[2] for i in infos)  # CPUs
+        return info
+
+    def getMemoryStats(self, cell: int, flags: int = 0) -> Dict:
+        totals: Dict[str, int] = {}
+        for node in self._cluster.connected_nodes():
+            for key, value in node.conn.getMemoryStats(cell, flags).items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def getAllDomainStats(self, stats: int = 0, flags: int = 0) -> List:
+        records = []
+        for node in self._cluster.connected_nodes():
+            records.extend(node.conn.getAllDomainStats(stats, flags))
+        return records
+
+    def getMemoryParameters(self, flags: int = 0) -> Dict:
+        """KSM counters summed over the nodes; settings as on the first node"""
+        merged: Dict = {}
+        for node in self._cluster.connected_nodes():
+            for key, value in node.conn.getMemoryParameters(flags).items():
+                if key not in merged:
+                    merged[key] = value
+                elif key.startswith("shm_pages_") and key != "shm_pages_to_scan" or key == "shm_full_scans":
+                    merged[key] += value
+        return merged
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__["_cluster"].default.conn, name)
+
+
+class ClusterRouterService:
+    """RouterService over several hypervisor nodes.
+
+    Per-router calls are routed to the node holding the router (found by lookup
+    and remembered); listings are merged, with a "node" field on every entry.
+    New routers go to the requested node, to the node already hosting their lab
+    (links stay local), or else to the node with the most free memory. Helpers
+    that do not depend on a node are served by the first node's RouterService.
+    """
+
+    def __init__(self, nodes: List[Node], lab_service=None):
+        self.nodes: Dict[str, Node] = {node.name: node for node in nodes}
+        self.default = nodes[0]
+        self.lab_service = lab_service
+        self.conn = ClusterConnection(self)
+        self._locations: Dict[str, str] = {}
+        self._lab_nodes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.default.router_service, name)
+
+    @property
+    def connected(self) -> bool:
+        return any(node.connections.connected for node in self.nodes.values())
+
+    @property
+    def last_error(self) -> Optional[str]:
+        errors = [f"{name}: {node.connections.last_error}" for name, node in self.nodes.items()
+                  if node.connections.last_error]
+        return "; ".join(errors) or None
+
+    def connected_nodes(self) -> List[Node]:
+        return [node for node in self.nodes.values() if node.connections.connected]
+
+    def health(self) -> Dict:
+        return {
+            "connected": self.connected,
+            "nodes": {name: node.connections.health() for name, node in self.nodes.items()}
+        }
+
+    # ---- Locating routers ----
+
+    def locate(self, name: str) -> Optional[Node]:
+        """Node holding a router or domain (None if no node has it)"""
+        node = self.nodes.get(self._locations.get(name))
+        if node is not None and node.connections.connected:
+            return node
+        for node in self.connected_nodes():
+            if node.router_service.router_exists(name):
+                with self._lock:
+                    self._locations[name] = node.name
+                return node
+        return None
+
+    def _owner(self, name: str) -> Node:
+        """Node to send a per-router call to; unknown routers go to the first node so
+        the caller gets its usual 'not found' result"""
+        if len(self.nodes) == 1:
+            return self.default
+        return self.locate(name) or self.default
+
+    def node_of(self, name: str) -> Optional[str]:
+        node = self.locate(name)
+        return node.name if node else None
+
+    def uri_for(self, name: str) -> str:
+        return self._owner(name).uri
+
+    # ---- Placement ----
+
+    def capacity(self) -> List[Dict]:
+        """Per-node view used by the scheduler"""
+        nodes = []
+        for name, node in self.nodes.items():
+            entry = {"name": name, "uri": node.uri, "connected": node.connections.connected}
+            if entry["connected"]:
+                try:
+                    entry["free_memory_mb"] = node.free_memory_mb()
+                    entry["routers"] = sum(1 for n in self._locations.values() if n == name)
+                except (libvirt.libvirtError, LibvirtUnavailable) as e:
+                    entry["connected"] = False
+                    entry["error"] = str(e)
+            nodes.append(entry)
+        return nodes
+
+    def _lab_node(self, lab: str) -> Optional[str]:
+        """Node pinned for a lab, or the node of any of its existing routers"""
+        if lab in self._lab_nodes:
+            return self._lab_nodes[lab]
+        if self.lab_service:
+            for router in self.lab_service.members.get(lab, []):
+                node = self.node_of(router)
+                if node:
+                    return node
+        return None
+
+    def place(self, memory_mb: int = 0, lab: Optional[str] = None, node: Optional[str] = None) -> Node:
+        """Pick the node for new routers"""
+        if node:
+            if node not in self.nodes:
+                raise ValueError(f"Unknown node: {node}")
+            return self.nodes[node]
+        if lab:
+            pinned = self._lab_node(lab)
+            if pinned and self.nodes[pinned].connections.connected:
+                return self.nodes[pinned]
+
+        candidates = [entry for entry in self.capacity() if entry["connected"]]
+        if not candidates:
+            raise LibvirtUnavailable("No hypervisor node is connected")
+        best = max(candidates, key=lambda entry: entry["free_memory_mb"])
+        if memory_mb and best["free_memory_mb"] < memory_mb:
+            print(f"⚠ No node has {memory_mb} MB free; placing on {best['name']} "
+                  f"({best['free_memory_mb']} MB free)")
+        return self.nodes[best["name"]]
+
+    def place_lab(self, lab: str, memory_mb: int = 0, node: Optional[str] = None) -> str:
+        """Choose (and pin) one node for a whole lab so its links stay local"""
+        target = self.place(memory_mb, lab=lab, node=node)
+        with self._lock:
+            self._lab_nodes[lab] = target.name
+        return target.name
+
+    # ---- Aggregated calls ----
+
+    def _each_node(self, fn) -> List:
+        nodes = self.connected_nodes()
+        if len(nodes) <= 1:
+            return [fn(node) for node in nodes]
+        return parallel_map(fn, nodes, max_workers=len(nodes))
+
+    def list_routers(self) -> List[Dict]:
+        def node_routers(node):
+            routers = node.router_service.list_routers()
+            for router in routers:
+                router["node"] = node.name
+            return routers
+
+        routers = []
+        for result in self._each_node(node_routers):
+            if isinstance(result, dict):
+                print(f"⚠ Could not list routers on a node: {result.get('message')}")
+                continue
+            routers.extend(result)
+        with self._lock:
+            self._locations.update({router["name"]: router["node"] for router in routers})
+        return routers
+
+    def start_all_routers(self) -> Dict:
+        return self._merge(self._each_node(lambda node: node.router_service.start_all_routers()), "started")
+
+    def stop_all_routers(self, force: bool = False) -> Dict:
+        return self._merge(self._each_node(lambda node: node.router_service.stop_all_routers(force)), "stopped")
+
+    @staticmethod
+    def _merge(results: List[Dict], key: str) -> Dict:
+        merged = {"success": True, key: [], "failed": []}
+        for result in results:
+            merged[key].extend(result.get(key, []))
+            merged["failed"].extend(result.get("failed", []))
+            if "message" in result and not result.get("success", True):
+                merged["failed"].append({"name": None, "error": result["message"]})
+        merged["count"] = len(merged[key])
+        return merged
+
+    # ---- Per-router calls ----
+
+    def create_router(self, name: str, ip: str = None, router_type: str = "juniper",
+                      ram: int = 4, vcpus: int = 2, node: Optional[str] = None,
+                      lab: Optional[str] = None, **options) -> Dict:
+        """Create a router on the node chosen by the scheduler"""
+        try:
+            target = self.place(self.footprint(router_type, ram, vcpus)["memory_mb"], lab=lab, node=node)
+        except (ValueError, LibvirtUnavailable) as e:
+            return {"success": False, "message": str(e)}
+        result = target.router_service.create_router(name, ip, router_type, ram, vcpus, **options)
+        if result["success"]:
+            with self._lock:
+                self._locations[name] = target.name
+                if lab:
+                    self._lab_nodes.setdefault(lab, target.name)
+        result["node"] = target.name
+        return result
+
+    def prepare_disks(self, name: str, router_type: str, storage_profile: Optional[str] = None,
+                      node: Optional[str] = None) -> Dict:
+        """Create a router's overlays on the node it will be defined on"""
+        target = self.nodes.get(node) if node else self.default
+        if target is None:
+            return {"success": False, "message": f"Unknown node: {node}"}
+        return target.router_service.prepare_disks(name, router_type, storage_profile)
+
+    def delete_router(self, name: str) -> Dict:
+        result = self._owner(name).router_service.delete_router(name)
+        if result["success"]:
+            with self._lock:
+                self._locations.pop(name, None)
+        return result
+
+    def get_router_summary(self, name: str) -> Optional[Dict]:
+        node = self.locate(name)
+        if node is None:
+            return None
+        summary = node.router_service.get_router_summary(name)
+        if summary is None:
+            with self._lock:
+                self._locations.pop(name, None)
+            return None
+        summary["node"] = node.name
+        return summary
+
+    def get_router_details(self, name: str) -> Dict:
+        node = self._owner(name)
+        details = node.router_service.get_router_details(name)
+        if "error" not in details:
+            details["node"] = node.name
+        return details
+
+    def router_exists(self, name: str) -> bool:
+        if len(self.nodes) == 1:
+            return self.default.router_service.router_exists(name)
+        # Always a fresh scan: the remembered location may be stale
+        with self._lock:
+            self._locations.pop(name, None)
+        return self.locate(name) is not None
+
+    def get_domains(self, name: str) -> List:
+        return self._owner(name).router_service.get_domains(name)
+
+    def start_router(self, name: str) -> Dict:
+        return self._owner(name).router_service.start_router(name)
+
+    def stop_router(self, name: str, force: bool = False) -> Dict:
+        return self._owner(name).router_service.stop_router(name, force)
+
+    def restart_router(self, name: str) -> Dict:
+        return self._owner(name).router_service.restart_router(name)
+
+    def resize_router(self, name: str, ram_gb: int, vcpus: int) -> Dict:
+        return self._owner(name).router_service.resize_router(name, ram_gb, vcpus)
+
+    def power_cycle_router(self, name: str, timeout: int = 120) -> Dict:
+        return self._owner(name).router_service.power_cycle_router(name, timeout)
+
+    def wait_for_ready(self, name: str, *args, **kwargs) -> Dict:
+        return self._owner(name).router_service.wait_for_ready(name, *args, **kwargs)
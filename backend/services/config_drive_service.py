@@ -0,0 +1,208 @@
+import ipaddress
+import os
+import secrets
+import shutil
+import tempfile
+from typing import Dict, Optional
+
+from backend.services import instrumentation
+
+# Junos day-0 config, read by vSRX from /config/juniper.conf on an attached ISO
+JUNOS_TEMPLATE = """system {{
+    host-name {name};
+    root-authentication {{
+        encrypted-password "{password_hash}";
+    }}
+    login {{
+        user admin {{
+            class super-user;
+            authentication {{
+                encrypted-password "{password_hash}";
+            }}
+        }}
+    }}
+    services {{
+        ssh {{
+            root-login deny;
+        }}
+        netconf {{
+            ssh;
+        }}
+    }}
+}}
+interfaces {{
+    fxp0 {{
+        unit 0 {{
+            family inet {{
+                address {address};
+            }}
+        }}
+    }}
+}}
+routing-options {{
+    static {{
+        route 0.0.0.0/0 next-hop {gateway};
+    }}
+}}
+"""
+
+# IOS-XE day-0 config, read by CSR1000v from iosxe_config.txt on an attached ISO
+IOSXE_TEMPLATE = """hostname {name}
+!
+username admin privilege 15 secret {password}
+ip domain name vrhost.lab
+crypto key generate rsa modulus 2048
+ip ssh version 2
+!
+interface GigabitEthernet1
+ ip address {ip} {netmask}
+ no shutdown
+!
+ip route 0.0.0.0 0.0.0.0 {gateway}
+!
+line vty 0 4
+ login local
+ transport input ssh
+!
+end
+"""
+
+
+class ConfigDriveService:
+    """Render day-0 startup configs and package them as config-drive ISOs.
+
+    Routers log in as admin. The password is VRHOST_DAY0_PASSWORD when the
+    operator sets one; otherwise every router gets its own random password,
+    returned once by build_config_drive and kept (root-only) under
+    <storage_path>/credentials/<name>. Each router has its own ISO,
+    <storage_path>/<name>.iso (root-only too: the IOS-XE config holds the
+    password in clear), removed with remove() when the router is deleted.
+    """
+
+    def __init__(self, storage_path: str = "/var/lib/libvirt/images/config-drives",
+                 password: Optional[str] = None):
+        self.storage_path = storage_path
+        self.password = password or os.environ.get("VRHOST_DAY0_PASSWORD") or None
+
+    def _get_platform(self, router_type: str) -> Optional[str]:
+        """Map a router type to the config-drive format it understands"""
+        router_type = router_type.lower()
+        if router_type in ["juniper", "vsrx"]:
+            return "junos"
+        if router_type in ["cisco", "csr1000v", "csr"]:
+            return "iosxe"
+        # vQFX and IOSvL2 images do not read a config drive at boot
+        return None
+
+    @staticmethod
+    def _get_junos_password_hash(password: str) -> str:
+        """SHA-512 crypt hash of a day-0 password"""
+        salt = secrets.token_hex(8)
+        result = instrumentation.run(
+            ["openssl", "passwd", "-6", "-salt", salt, password],
+            capture_output=True,
+            text=True,
+            timeout=10,
+            check=True
+        )
+        return result.stdout.strip()
+
+    def _store_password(self, name: str, password: str):
+        """Keep a router's generated password where only root can read it"""
+        credentials = os.path.join(self.storage_path, "credentials")
+        os.makedirs(credentials, mode=0o700, exist_ok=True)
+        path = os.path.join(credentials, name)
+        fd = os.open(f"{path}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(f"admin {password}\n")
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def _parse_address(ip: str) -> ipaddress.IPv4Interface:
+        """Parse a management address, defaulting to /24 like mkjuniper does"""
+        if "/" not in ip:
+            ip = f"{ip}/24"
+        return ipaddress.IPv4Interface(ip)
+
+    def render_config(self, name: str, ip: str, router_type: str, password: str,
+                      gateway: Optional[str] = None) -> Optional[Dict]:
+        """Render the startup config for a router, or None if the platform has no config drive"""
+        platform = self._get_platform(router_type)
+        if platform is None or not ip:
+            return None
+
+        interface = self._parse_address(ip)
+        # Default gateway is the first host of the management subnet (10.10.50.1 for the lab bridge)
+        gateway = gateway or str(next(interface.network.hosts()))
+
+        if platform == "junos":
+            return {
+                "platform": platform,
+                "filename": "config/juniper.conf",
+                "content": JUNOS_TEMPLATE.format(
+                    name=name,
+                    address=interface.with_prefixlen,
+                    gateway=gateway,
+                    password_hash=self._get_junos_password_hash(password)
+                )
+            }
+
+        return {
+            "platform": platform,
+            "filename": "iosxe_config.txt",
+            "content": IOSXE_TEMPLATE.format(
+                name=name,
+                ip=str(interface.ip),
+                netmask=str(interface.netmask),
+                gateway=gateway,
+                password=password
+            )
+        }
+
+    def build_config_drive(self, name: str, ip: str, router_type: str,
+                           gateway: Optional[str] = None) -> Optional[Dict]:
+        """Build this router's config-drive ISO ({"path", "password"}); password is the
+        generated one (None when VRHOST_DAY0_PASSWORD is used)"""
+        if self._get_platform(router_type) is None or not ip:
+            return None
+        generated = None if self.password else secrets.token_urlsafe(12)
+        rendered = self.render_config(name, ip, router_type, self.password or generated, gateway)
+        os.makedirs(self.storage_path, exist_ok=True)
+        if generated:
+            self._store_password(name, generated)
+
+        iso_path = os.path.join(self.storage_path, f"{name}.iso")
+        staging_dir = tempfile.mkdtemp(prefix="vrhost-day0-")
+        try:
+            config_file = os.path.join(staging_dir, rendered["filename"])
+            os.makedirs(os.path.dirname(config_file), exist_ok=True)
+            with instrumentation.timed("file:write"), open(config_file, 'w') as f:
+                f.write(rendered["content"])
+
+            # Build under a temp name and rename, so a half-written ISO is never attached;
+            # created 0600 first, genisoimage keeps the mode of the file it overwrites
+            tmp_path = f"{iso_path}.{os.getpid()}.tmp"
+            os.close(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600))
+            os.chmod(tmp_path, 0o600)
+            instrumentation.run(
+                ["genisoimage", "-quiet", "-l", "-r", "-J", "-V", "config-2",
+                 "-o", tmp_path, staging_dir],
+                capture_output=True,
+                text=True,
+                timeout=30,
+                check=True
+            )
+            os.replace(tmp_path, iso_path)
+            print(f"✓ Built config drive for {name}: {iso_path}")
+            return {"path": iso_path, "password": generated}
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def remove(self, name: str):
+        """Drop a deleted router's ISO and stored password"""
+        for path in (os.path.join(self.storage_path, f"{name}.iso"),
+                     os.path.join(self.storage_path, "credentials", name)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
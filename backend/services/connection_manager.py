@@ -0,0 +1,202 @@
+import itertools
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import libvirt
+
+
+class LibvirtUnavailable(Exception):
+    """libvirtd is not reachable right now (a reconnect is in progress)"""
+
+
+class ConnectionManager:
+    """Keep a small pool of libvirt connections alive across libvirtd restarts.
+
+    Every connection gets keepalive probes and a close callback. When one drops,
+    the whole pool is marked down and a background thread reopens it with
+    exponential backoff, then runs the on-connect listeners (re-registering event
+    callbacks, invalidating caches). Threads are spread over the pool, each
+    sticking to one connection; the first connection also carries event callbacks.
+    """
+
+    def __init__(self, uri: str, pool_size: int = 4, keepalive_interval: int = 5,
+                 keepalive_count: int = 3, max_backoff: float = 30.0):
+        self.uri = uri
+        self.pool_size = pool_size
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_count = keepalive_count
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._pool: List[libvirt.virConnect] = []
+        self._generation = 0
+        self._local = threading.local()
+        self._next_slot = itertools.count()
+        self._listeners: List[Callable[[], None]] = []
+        self._reconnecting = False
+        self._closed = False
+
+        self.connected_at: Optional[float] = None
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def connected(self) -> bool:
+        return bool(self._pool)
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Run after every successful (re)connect, from the connecting thread"""
+        self._listeners.append(callback)
+
+    def _open_one(self) -> libvirt.virConnect:
+        conn = libvirt.open(self.uri)
+        try:
+            conn.setKeepAlive(self.keepalive_interval, self.keepalive_count)
+        except libvirt.libvirtError:
+            pass  # Local drivers without keepalive support (e.g. test:///)
+        try:
+            conn.registerCloseCallback(self._on_close, None)
+        except libvirt.libvirtError:
+            pass
+        return conn
+
+    def _connect(self) -> bool:
+        """Open a fresh pool; True if it worked"""
+        pool = []
+        try:
+            for _ in range(self.pool_size):
+                pool.append(self._open_one())
+        except libvirt.libvirtError as e:
+            self.last_error = str(e)
+            for conn in pool:
+                conn.close()
+            return False
+
+        with self._lock:
+            self._pool = pool
+            self._generation += 1
+            self.connected_at = time.time()
+            self.last_error = None
+
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                print(f"⚠ Reconnect listener failed: {e}")
+        return True
+
+    def open(self) -> bool:
+        """Connect now, or keep retrying in the background if libvirtd is down"""
+        if self._connect():
+            print(f"✓ Connected to libvirt ({self.uri}, {self.pool_size} connections)")
+            return True
+        print(f"⚠ libvirt unavailable ({self.last_error}), retrying in the background")
+        self._start_reconnect()
+        return False
+
+    def _on_close(self, conn, reason, opaque):
+        # Runs on the libvirt event thread
+        with self._lock:
+            if conn not in self._pool:
+                return
+            stale, self._pool = self._pool, []
+        self.last_error = f"Connection closed (reason {reason})"
+        print(f"⚠ libvirt connection lost: {self.last_error}")
+        for other in stale:
+            if other is not conn:
+                try:
+                    other.close()
+                except libvirt.libvirtError:
+                    pass
+        self._start_reconnect()
+
+    def _start_reconnect(self):
+        with self._lock:
+            if self._reconnecting or self._closed:
+                return
+            self._reconnecting = True
+        threading.Thread(target=self._reconnect_loop, name="libvirt-reconnect", daemon=True).start()
+
+    def _reconnect_loop(self):
+        delay = 1.0
+        try:
+            while not self._closed:
+                time.sleep(delay * random.uniform(0.8, 1.2))
+                if self._connect():
+                    self.reconnects += 1
+                    print(f"✓ Reconnected to libvirt ({self.uri})")
+                    return
+                delay = min(delay * 2, self.max_backoff)
+        finally:
+            with self._lock:
+                self._reconnecting = False
+
+    def primary(self) -> libvirt.virConnect:
+        """The connection carrying event callbacks"""
+        pool = self._pool
+        if not pool:
+            raise LibvirtUnavailable(self.last_error or "Not connected to libvirt")
+        return pool[0]
+
+    def connection(self) -> libvirt.virConnect:
+        """This thread's connection from the pool"""
+        pool = self._pool
+        if not pool:
+            raise LibvirtUnavailable(self.last_error or "Not connected to libvirt")
+        if getattr(self._local, "generation", None) != self._generation:
+            self._local.slot = next(self._next_slot) % len(pool)
+            self._local.generation = self._generation
+        return pool[self._local.slot]
+
+    def health(self) -> Dict:
+        """Connection state without any round trip that scales with the number of domains"""
+        pool = self._pool
+        alive = 0
+        for conn in pool:
+            try:
+                alive += conn.isAlive() == 1
+            except libvirt.libvirtError:
+                pass
+        return {
+            "connected": bool(pool) and alive == len(pool),
+            "uri": self.uri,
+            "pool_size": len(pool),
+            "alive": alive,
+            "connected_at": self.connected_at,
+            "reconnects": self.reconnects,
+            "reconnecting": self._reconnecting,
+            "last_error": self.last_error
+        }
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            pool, self._pool = self._pool, []
+        for conn in pool:
+            try:
+                conn.unregisterCloseCallback()
+            except libvirt.libvirtError:
+                pass
+            try:
+                conn.close()
+            except libvirt.libvirtError:
+                pass
+
+
+class ManagedConnection:
+    """Stand-in for a virConnect that always resolves to a live pooled connection.
+
+    Services keep this object for their lifetime; after a reconnect their next
+    call simply lands on the new connection.
+    """
+
+    def __init__(self, manager: ConnectionManager, primary: bool = False):
+        self._manager = manager
+        self._primary = primary
+
+    def __getattr__(self, name):
+        manager = self.__dict__["_manager"]
+        conn = manager.primary() if self.__dict__["_primary"] else manager.connection()
+        return getattr(conn, name)
@@ -3,8 +3,11 @@ import secrets
 import time
 from typing import Dict, Optional
 
+from backend.services import instrumentation
+
 class ConsoleService:
-    def __init__(self):
+    def __init__(self, router_service):
+        self.router_service = router_service
         self.sessions: Dict[str, dict] = {}
         self.base_port = 7681
         self.next_port = self.base_port
@@ -33,26 +36,26 @@ class ConsoleService:
         """Kill any existing ttyd and virsh console processes for this router"""
         try:
             # Kill processes for base name
-            subprocess.run(
+            instrumentation.run(
                 ['pkill', '-9', '-f', f'ttyd.*virsh console {router_name}'],
                 stderr=subprocess.DEVNULL,
                 timeout=2
             )
             
-            subprocess.run(
+            instrumentation.run(
                 ['pkill', '-9', '-f', f'virsh console {router_name}'],
                 stderr=subprocess.DEVNULL,
                 timeout=2
             )
             
             # Also kill processes for -re variant (vQFX)
-            subprocess.run(
+            instrumentation.run(
                 ['pkill', '-9', '-f', f'ttyd.*virsh console {router_name}-re'],
                 stderr=subprocess.DEVNULL,
                 timeout=2
             )
             
-            subprocess.run(
+            instrumentation.run(
                 ['pkill', '-9', '-f', f'virsh console {router_name}-re'],
                 stderr=subprocess.DEVNULL,
                 timeout=2
@@ -80,20 +83,8 @@ class ConsoleService:
         # For vQFX switches, connect to the RE (Routing Engine)
         # Check if this is a vQFX by looking for {name}-re domain
         actual_domain = router_name
-        try:
-            import libvirt
-            conn = libvirt.open('qemu:///system')
-            try:
-                # Try to find domain with -re suffix (vQFX)
-                conn.lookupByName(f"{router_name}-re")
-                actual_domain = f"{router_name}-re"
-            except libvirt.libvirtError:
-                # Not a vQFX, use regular name
-                pass
-            finally:
-                conn.close()
-        except Exception:
-            pass
+        if self.router_service.router_exists(f"{router_name}-re"):
+            actual_domain = f"{router_name}-re"
 
         # Generate new session
         token = secrets.token_urlsafe(16)
@@ -108,7 +99,7 @@ class ConsoleService:
                 '-i', '0.0.0.0',
                 '-t', 'fontSize=14',
                 '-t', 'theme={"background": "#1e293b", "foreground": "#e5e7eb"}',
-                'virsh', 'console', actual_domain
+                'virsh', '-c', self.router_service.uri_for(router_name), 'console', actual_domain
             ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
             # Store session info
@@ -0,0 +1,193 @@
+import threading
+import xml.etree.ElementTree as ET
+from typing import Dict, List
+
+import libvirt
+
+VCPU_PERIOD_US = 100000
+
+
+class CpuGovernorService:
+    """Keep idle routers from eating host CPU, and give busy labs dedicated cores.
+
+    On each activity sample, every domain of a router that is idle, in a lab
+    nobody is using, gets a CFS quota of idle_quota of a CPU per vCPU (vQFX
+    PFEs spin at 100% even with no traffic). The quota is lifted as soon as the
+    router or any router of its lab becomes active again, or when the lab is
+    started. Labs pinned with pin_lab() get one host CPU per vCPU on a single
+    NUMA cell and are never throttled; pins are stored so a restart neither
+    hands their CPUs to another lab nor starts throttling them.
+    """
+
+    def __init__(self, tracker, router_service, lab_service, repository, idle_quota: float = 0.1):
+        self.tracker = tracker
+        self.router_service = router_service
+        self.lab_service = lab_service
+        self.repository = repository
+        self.idle_quota = idle_quota
+        self._throttled = None  # Unknown until the first sample lifts any leftover quotas
+        self._pinned: Dict[str, Dict] = repository.all()  # lab -> {"node", "cell", "cpus"}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _set_quota(domain, quota_us: int):
+        domain.setSchedulerParametersFlags(
+            {"vcpu_period": VCPU_PERIOD_US, "vcpu_quota": quota_us}, libvirt.VIR_DOMAIN_AFFECT_LIVE
+        )
+
+    def on_sample(self, routers: Dict, domains: Dict):
+        """Throttle idle domains, unthrottle active ones"""
+        lab_of = {router: lab for lab, members in self.lab_service.members.items() for router in members}
+        active_labs = {lab for router, lab in lab_of.items() if routers.get(router, {}).get("active")}
+        quota_us = int(VCPU_PERIOD_US * self.idle_quota)
+
+        with self._lock:
+            first = self._throttled is None
+            throttled = set() if first else self._throttled
+            for name, (domain, _) in domains.items():
+                router = self.tracker._router_of(name)
+                lab = lab_of.get(router)
+                idle = (not routers.get(router, {}).get("active", True)
+                        and lab not in active_labs and lab not in self._pinned)
+                try:
+                    if idle and name not in throttled:
+                        self._set_quota(domain, quota_us)
+                        throttled.add(name)
+                    elif not idle and (name in throttled or first):
+                        self._set_quota(domain, -1)
+                        throttled.discard(name)
+                except libvirt.libvirtError as e:
+                    print(f"⚠ Could not set CPU quota of {name}: {e}")
+            self._throttled = {name for name in throttled if name in domains}
+
+    def release(self, routers: List[str]) -> int:
+        """Lift quotas right away (a lab is being used again)"""
+        released = 0
+        for router in routers:
+            self.tracker.touch(router)
+            for name in list(self._throttled or ()):
+                if self.tracker._router_of(name) != router:
+                    continue
+                try:
+                    self._set_quota(self.router_service.conn.lookupByName(name), -1)
+                    released += 1
+                except libvirt.libvirtError as e:
+                    print(f"⚠ Could not lift CPU quota of {name}: {e}")
+                with self._lock:
+                    self._throttled.discard(name)
+        return released
+
+    # ---- NUMA pinning ----
+
+    @staticmethod
+    def numa_cells(conn) -> Dict[int, List[int]]:
+        """NUMA cell -> host CPU ids, from the node's capabilities"""
+        cells = {}
+        root = ET.fromstring(conn.getCapabilities())
+        for cell in root.findall("./host/topology/cells/cell"):
+            cells[int(cell.get("id"))] = [int(cpu.get("id")) for cpu in cell.findall("./cpus/cpu")]
+        if not cells:
+            # No topology in the capabilities: one cell holding every CPU
+            cells[0] = list(range(conn.getInfo()[2]))
+        return cells
+
+    def _lab_domains(self, routers: List[str]):
+        """A lab's domains and the connection of the node holding them"""
+        domains = [domain for router in routers if self.router_service.router_exists(router)
+                   for domain in self.router_service.get_domains(router)]
+        node = self.router_service.node_of(routers[0]) if domains else None
+        conn = self.router_service.nodes[node].conn if node else self.router_service.conn
+        return domains, node, conn
+
+    @staticmethod
+    def _pin(domain, vcpu_cpus: List[List[int]], emulator_cpus: List[int], host_cpus: int):
+        """Pin each vCPU to its CPU and the emulator threads to a CPU set (persistently, and live if running)"""
+        flags = libvirt.VIR_DOMAIN_AFFECT_CONFIG
+        if domain.isActive():
+            flags |= libvirt.VIR_DOMAIN_AFFECT_LIVE
+        for vcpu, cpus in enumerate(vcpu_cpus):
+            domain.pinVcpuFlags(vcpu, tuple(i in cpus for i in range(host_cpus)), flags)
+        domain.pinEmulator(tuple(i in emulator_cpus for i in range(host_cpus)), flags)
+
+    def _unpin(self, domains, conn):
+        """Let domains float over all host CPUs again"""
+        host_cpus = max(max(cpus) for cpus in self.numa_cells(conn).values()) + 1
+        everywhere = list(range(host_cpus))
+        for domain in domains:
+            self._pin(domain, [everywhere] * domain.info()[3], everywhere, host_cpus)
+
+    def pin_lab(self, lab: str) -> Dict:
+        """Give every vCPU of a lab its own host CPU, all on the NUMA cell with the most free CPUs"""
+        routers = self.lab_service.members.get(lab)
+        if routers is None:
+            return {"success": False, "message": f"Lab '{lab}' not found"}
+        domains, node, conn = self._lab_domains(routers)
+        if not domains:
+            return {"success": False, "message": f"Lab '{lab}' has no routers"}
+
+        with self._lock:
+            self._pinned.pop(lab, None)
+            # Pins of deleted labs were dropped with them (cpu_pins cascades)
+            self._pinned = {name: pin for name, pin in self._pinned.items() if name in self.lab_service.members}
+            taken = {cpu for pin in self._pinned.values() if pin["node"] == node for cpu in pin["cpus"]}
+            cells = self.numa_cells(conn)
+            free = {cell: [cpu for cpu in cpus if cpu not in taken] for cell, cpus in cells.items()}
+            needed = sum(domain.info()[3] for domain in domains)
+            cell = max(free, key=lambda c: len(free[c]))
+            if len(free[cell]) < needed:
+                return {"success": False,
+                        "message": f"Lab '{lab}' needs {needed} CPUs; at most {len(free[cell])} are free on one NUMA cell"}
+
+            host_cpus = max(max(cpus) for cpus in cells.values()) + 1
+            cpus = iter(free[cell])
+            assigned = []
+            pinned = []
+            try:
+                for domain in domains:
+                    vcpu_cpus = [[next(cpus)] for _ in range(domain.info()[3])]
+                    # Emulator threads stay on the same cell, next to their vCPUs
+                    pinned.append(domain)
+                    self._pin(domain, vcpu_cpus, cells[cell], host_cpus)
+                    assigned.extend(cpu for cpu_set in vcpu_cpus for cpu in cpu_set)
+                    if domain.isActive():
+                        self._set_quota(domain, -1)
+                self.repository.save(lab, node, cell, assigned)
+            except Exception as e:
+                # All or nothing: a half-pinned lab would hold CPUs no other lab knows are taken
+                try:
+                    self._unpin(pinned, conn)
+                except libvirt.libvirtError as undo_error:
+                    print(f"⚠ Could not unpin lab '{lab}' after a failed pin: {undo_error}")
+                self.repository.delete(lab)
+                if self._throttled:
+                    # Quotas may have been lifted: let the next sample apply them again
+                    self._throttled -= {domain.name() for domain in pinned}
+                failed = pinned[-1].name() if pinned else lab
+                return {"success": False, "message": f"Could not pin {failed}: {e}"}
+            self._pinned[lab] = {"node": node, "cell": cell, "cpus": assigned}
+            if self._throttled:
+                self._throttled -= {domain.name() for domain in domains}
+
+        return {"success": True, "message": f"Pinned {len(assigned)} vCPUs of lab '{lab}' to NUMA cell {cell}",
+                "node": node, "cell": cell, "cpus": assigned}
+
+    def unpin_lab(self, lab: str) -> Dict:
+        """Let a lab's vCPUs float over all host CPUs again"""
+        with self._lock:
+            self._pinned.pop(lab, None)
+            self.repository.delete(lab)
+        domains, _, conn = self._lab_domains(self.lab_service.members.get(lab, []))
+        if not domains:
+            return {"success": False, "message": f"Lab '{lab}' has no routers"}
+        try:
+            self._unpin(domains, conn)
+        except libvirt.libvirtError as e:
+            return {"success": False, "message": f"Could not unpin lab '{lab}': {e}"}
+        return {"success": True, "message": f"Unpinned lab '{lab}'"}
+
+    def status(self) -> Dict:
+        return {
+            "idle_quota": self.idle_quota,
+            "throttled": sorted(self._throttled or ()),
+            "pinned": self._pinned
+        }
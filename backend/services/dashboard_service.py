@@ -0,0 +1,167 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, Optional
+
+from backend.services.listing_index import ListingIndex
+
+# Key and indexed fields of the listing index kept for each part
+INDEX_SPECS = {
+    "routers": ("name", {
+        "state": lambda r: [r["state"]],
+        "router_type": lambda r: [r["router_type"]],
+        "lab": lambda r: [r["lab"] or ""],
+        "node": lambda r: [r.get("node") or ""]
+    }),
+    "links": ("id", {
+        "status": lambda l: [l["status"]],
+        "lab": lambda l: [l["lab"] or ""],
+        "router": lambda l: [l["source_router"], l["target_router"]]
+    })
+}
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (an explicit q=0 refuses it)"""
+    qualities = {}
+    for entry in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in entry.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+class DashboardService:
+    """Routers, links and stats as one versioned, pre-serialized document.
+
+    Each part is rebuilt only when the event bus reports a change to it (stats:
+    at most once per stats_interval), and the version only moves when the
+    serialized bytes actually differ. Polls in between get the cached bytes,
+    already gzipped, or a 304 when the client's ETag still matches. The ETag
+    is a hash of the body, so it stays valid across restarts (the version
+    counter does not). Stats
+    count domains from the inventory cache, so refreshing them never sweeps
+    libvirt.
+    """
+
+    def __init__(self, router_service, lab_service, link_service, stats_service, event_bus,
+                 inventory, stats_interval: float = 5.0):
+        self.router_service = router_service
+        self.lab_service = lab_service
+        self.link_service = link_service
+        self.stats_service = stats_service
+        self.event_bus = event_bus
+        self.inventory = inventory
+        self.stats_interval = stats_interval
+
+        self._lock = threading.Lock()
+        self._parts: Dict = {}
+        self._indexes: Dict[str, ListingIndex] = {}
+        # Change counters bumped by events vs. the counter each part was built at;
+        # an event during a rebuild leaves the part dirty for the next call
+        self._changes = {"routers": 0, "links": 0}
+        self._built = {"routers": -1, "links": -1}
+        self._stats_at = 0.0
+        self._snapshot_stats_at = -1.0
+        self._snapshot: Optional[Dict] = None
+        self.version = 0
+
+        event_bus.add_listener(self._on_event)
+
+    def _on_event(self, event: Dict):
+        if event["type"] in ("router", "router_deleted"):
+            self._changes["routers"] += 1
+        elif event["type"] in ("link", "link_deleted"):
+            self._changes["links"] += 1
+        elif event["type"] == "stats":
+            self._parts["stats"] = event["data"]
+            self._stats_at = time.monotonic()
+
+    def mark_dirty(self):
+        """Something changed that no event covers (e.g. lab membership)"""
+        self._changes["routers"] += 1
+        self._changes["links"] += 1
+
+    def _stale(self) -> bool:
+        return (self._changes != self._built
+                or self._stats_at != self._snapshot_stats_at
+                or time.monotonic() - self._stats_at > self.stats_interval)
+
+    def _build_routers(self):
+        routers = self.router_service.list_routers()
+        for router in routers:
+            router["lab"] = self.lab_service.get_router_lab(router["name"])
+        return sorted(routers, key=lambda r: r["name"])
+
+    def _refresh_parts(self):
+        """Rebuild the routers/links parts that changed (caller holds the lock)"""
+        for part, build in (("routers", self._build_routers), ("links", self.link_service.list_links)):
+            changes = self._changes[part]
+            if changes != self._built[part]:
+                self._parts[part] = build()
+                self._built[part] = changes
+                self._indexes.pop(part, None)
+
+    def index(self, part: str) -> ListingIndex:
+        """Listing index over the current routers or links, rebuilt only after a change"""
+        with self._lock:
+            self._refresh_parts()
+            if part not in self._indexes:
+                key, indexed = INDEX_SPECS[part]
+                self._indexes[part] = ListingIndex(self._parts[part], key, indexed)
+            return self._indexes[part]
+
+    def peek(self) -> Optional[Dict]:
+        """The cached snapshot if nothing changed since it was built"""
+        snapshot = self._snapshot
+        if snapshot is None or self._stale():
+            return None
+        return snapshot
+
+    def get(self) -> Dict:
+        """Current snapshot: version, etag, JSON body and its gzipped form"""
+        with self._lock:
+            if not self._stale():
+                return self._snapshot
+
+            self._refresh_parts()
+            if time.monotonic() - self._stats_at > self.stats_interval:
+                self._parts["stats"] = self.stats_service.get_dashboard_stats(self.inventory.domains())
+                self._stats_at = time.monotonic()
+            self._snapshot_stats_at = self._stats_at
+
+            data = {"routers": self._parts["routers"], "links": self._parts["links"],
+                    "stats": self._parts["stats"]}
+            body = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+            if self._snapshot and body == self._snapshot["body"]:
+                return self._snapshot
+
+            self.version += 1
+            self._snapshot = {
+                "version": self.version,
+                "seq": self.event_bus.seq,
+                "etag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+                "data": data,
+                "body": body,
+                "gzip": gzip.compress(body, compresslevel=6)
+            }
+            return self._snapshot
+
+    def state(self) -> Dict:
+        """The snapshot as a plain document (initial state for /api/events)"""
+        snapshot = self.get()
+        return {"version": snapshot["version"], "seq": snapshot["seq"], **snapshot["data"]}
@@ -0,0 +1,125 @@
+from typing import Dict, Iterator
+
+from backend.models.link import LinkCreate
+from backend.models.topology import Topology
+from backend.services.task_graph import TaskGraph
+
+
+class DeployService:
+    """Deploy a saved topology as a parallel dependency graph of provisioning steps"""
+
+    def __init__(self, router_service, link_service, lab_service, max_parallel: int = 4,
+                 ready_timeout: int = 600):
+        self.router_service = router_service
+        self.link_service = link_service
+        self.lab_service = lab_service
+        self.max_parallel = max_parallel
+        self.ready_timeout = ready_timeout
+
+    def _create_step(self, router, lab_name: str) -> Dict:
+        """Create disk + domain via the mk* script, unless the router already exists"""
+        if self.router_service.router_exists(router.name):
+            owner = self.lab_service.get_router_lab(router.name)
+            if owner and owner != lab_name:
+                # Adopting it would silently take it away from the other lab
+                return {"success": False, "message": f"{router.name} already exists in lab '{owner}'"}
+            result = {"success": True, "message": f"{router.name} already exists"}
+        else:
+            # No boot wait in the provisioning slot: the ready step waits for it
+            result = self.router_service.create_router(
+                name=router.name,
+                ip=router.ip,
+                router_type=router.router_type,
+                ram=router.ram_gb,
+                vcpus=router.vcpus,
+                lab=lab_name,
+                wait=False
+            )
+        if result["success"]:
+            self.lab_service.add_router(lab_name, router.name)
+        return result
+
+    def _link_step(self, link: LinkCreate) -> Dict:
+        """Create a link, treating an existing identical link as success"""
+        result = self.link_service.create_link(link, self.router_service)
+        if not result["success"] and "already exists" in result["message"]:
+            return {"success": True, "message": result["message"]}
+        return result
+
+    def _start_step(self, name: str) -> Dict:
+        """Start a router (virt-install normally leaves it running) and refresh its links"""
+        details = self.router_service.get_router_details(name)
+        if details.get("state") != "running":
+            result = self.router_service.start_router(name)
+            if not result["success"]:
+                return result
+        self.link_service.update_links_for_router(name, "running", self.router_service)
+        return {"success": True, "message": f"{name} running"}
+
+    def build_graph(self, topology: Topology, max_parallel: int = None,
+                    wait_ready: bool = True) -> TaskGraph:
+        """Build the create → link → start → ready graph for a topology"""
+        graph = TaskGraph(
+            max_workers=max(len(topology.routers) * 2, 1) + len(topology.links),
+            limits={"provision": max_parallel or self.max_parallel}
+        )
+        names = {router.name for router in topology.routers}
+
+        for router in topology.routers:
+            graph.add(
+                f"create:{router.name}",
+                lambda router=router: self._create_step(router, topology.name),
+                pool="provision",
+                description=f"Create {router.router_type} {router.name}"
+            )
+
+        links_by_router = {name: [] for name in names}
+        for link in topology.links:
+            if link.lab is None:
+                link = LinkCreate(**{**link.dict(), "lab": topology.name})
+            step_id = (f"link:{link.source_router}:{link.source_interface}"
+                       f"-{link.target_router}:{link.target_interface}")
+            endpoints = [r for r in (link.source_router, link.target_router) if r in names]
+            graph.add(
+                step_id,
+                lambda link=link: self._link_step(link),
+                depends_on=[f"create:{name}" for name in endpoints],
+                description=f"Link {link.source_router} {link.source_interface} ↔ "
+                            f"{link.target_router} {link.target_interface}"
+            )
+            for name in endpoints:
+                links_by_router[name].append(step_id)
+
+        for router in topology.routers:
+            graph.add(
+                f"start:{router.name}",
+                lambda name=router.name: self._start_step(name),
+                depends_on=[f"create:{router.name}"] + links_by_router[router.name],
+                description=f"Start {router.name}"
+            )
+            if wait_ready:
+                graph.add(
+                    f"ready:{router.name}",
+                    lambda router=router: self.router_service.wait_for_ready(
+                        router.name, router.ip, timeout=self.ready_timeout
+                    ),
+                    depends_on=[f"start:{router.name}"],
+                    description=f"Wait for {router.name} to be reachable"
+                )
+
+        return graph
+
+    def deploy(self, topology: Topology, max_parallel: int = None,
+               wait_ready: bool = True) -> Iterator[Dict]:
+        """Deploy a topology, yielding per-step progress events"""
+        # Routers deployed from a topology are members of the lab of the same name
+        self.lab_service.ensure_lab(topology.name, topology.description or "")
+        # The whole lab goes to one node so its links stay local
+        node = self.router_service.place_lab(topology.name, sum(
+            self.router_service.footprint(r.router_type, r.ram_gb, r.vcpus)["memory_mb"]
+            for r in topology.routers
+        ))
+        graph = self.build_graph(topology, max_parallel, wait_ready)
+        yield {"step": None, "status": "planned", "topology": topology.name, "node": node,
+               "steps": graph.plan()}
+        yield from graph.run()
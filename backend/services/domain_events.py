@@ -0,0 +1,135 @@
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+import libvirt
+
+LIFECYCLE_EVENTS = {
+    libvirt.VIR_DOMAIN_EVENT_DEFINED: "defined",
+    libvirt.VIR_DOMAIN_EVENT_UNDEFINED: "undefined",
+    libvirt.VIR_DOMAIN_EVENT_STARTED: "started",
+    libvirt.VIR_DOMAIN_EVENT_SUSPENDED: "suspended",
+    libvirt.VIR_DOMAIN_EVENT_RESUMED: "resumed",
+    libvirt.VIR_DOMAIN_EVENT_STOPPED: "stopped",
+    libvirt.VIR_DOMAIN_EVENT_SHUTDOWN: "shutdown",
+    libvirt.VIR_DOMAIN_EVENT_PMSUSPENDED: "pmsuspended",
+    libvirt.VIR_DOMAIN_EVENT_CRASHED: "crashed",
+}
+
+# Lifecycle events kept by the telemetry, under their transition names
+TIMED_EVENTS = {"defined": "defined", "started": "started", "stopped": "stopped", "undefined": "deleted"}
+
+
+_event_loop_started = False
+
+
+def start_event_loop():
+    """Run libvirt's default event loop in a daemon thread (must happen before libvirt.open)"""
+    global _event_loop_started
+    if _event_loop_started:
+        return
+    _event_loop_started = True
+    libvirt.virEventRegisterDefaultImpl()
+
+    def run():
+        while True:
+            libvirt.virEventRunDefaultImpl()
+
+    threading.Thread(target=run, name="libvirt-events", daemon=True).start()
+
+
+class DomainEventMonitor:
+    """Turn libvirt lifecycle events into router/link change events on the event bus.
+
+    The libvirt callback only queues the domain name; a worker thread coalesces
+    bursts (a vQFX start fires events for both RE and PFE), refreshes the
+    inventory entry and publishes the router's new summary. Link status follows,
+    so changes made outside the API (virsh, guest shutdown) show up too.
+    Defined/started/stopped/undefined transitions are also timestamped for the
+    lifecycle telemetry, at the time libvirt reported them.
+    """
+
+    def __init__(self, conn, router_service, lab_service, link_service, event_bus, inventory,
+                 telemetry=None):
+        self.conn = conn
+        self.router_service = router_service
+        self.lab_service = lab_service
+        self.link_service = link_service
+        self.event_bus = event_bus
+        self.inventory = inventory
+        self.telemetry = telemetry
+        self._pending: "queue.Queue" = queue.Queue()
+        self._callback_id = None
+
+    def start(self):
+        threading.Thread(target=self._worker, name="domain-events", daemon=True).start()
+
+    def register(self):
+        """Subscribe to lifecycle events on the current connection (again after a reconnect)"""
+        self._callback_id = self.conn.domainEventRegisterAny(
+            None, libvirt.VIR_DOMAIN_EVENT_ID_LIFECYCLE, self._on_lifecycle, None
+        )
+
+    def stop(self):
+        if self._callback_id is not None:
+            try:
+                self.conn.domainEventDeregisterAny(self._callback_id)
+            except Exception:
+                pass  # The connection is already gone
+            self._callback_id = None
+        self._pending.put(None)
+
+    def _on_lifecycle(self, conn, domain, event, detail, opaque):
+        # Runs on the libvirt event thread: do no libvirt calls here
+        self._pending.put((domain.name(), LIFECYCLE_EVENTS.get(event, "unknown"), time.monotonic()))
+
+    def _worker(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            routers = {}
+            transitions = []
+            for entry in batch:
+                if entry is None:
+                    return
+                domain_name, event, at = entry
+                self.inventory.refresh_domain(domain_name)
+                router = domain_name
+                if self.router_service._is_vqfx_component(domain_name):
+                    router = self.router_service._get_vqfx_base_name(domain_name)
+                routers[router] = event
+                if event in TIMED_EVENTS:
+                    transitions.append((router, TIMED_EVENTS[event], at))
+
+            summaries = {}
+            for router, event in routers.items():
+                try:
+                    summaries[router] = self._publish_router(router, event)
+                except Exception as e:
+                    print(f"⚠ Could not publish change of {router}: {e}")
+
+            if self.telemetry:
+                for router, event, at in transitions:
+                    summary = summaries.get(router)
+                    self.telemetry.record(router, event, summary and summary["router_type"], at=at)
+
+    def _publish_router(self, name: str, event: str) -> Optional[Dict]:
+        summary = self.router_service.get_router_summary(name)
+        if summary is None:
+            self.event_bus.publish("router_deleted", {"name": name, "event": event})
+            return None
+
+        summary["lab"] = self.lab_service.get_router_lab(name)
+        self.event_bus.publish("router", {**summary, "event": event})
+        self.link_service.update_links_for_router(name, summary["state"], self.router_service)
+        return summary
@@ -0,0 +1,72 @@
+import asyncio
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+class EventBus:
+    """Fan out change events from any thread to asyncio subscribers.
+
+    Services publish from worker threads (or the libvirt event thread); each
+    subscriber owns a bounded asyncio.Queue on its event loop, filled with
+    call_soon_threadsafe. A subscriber that falls too far behind gets its queue
+    replaced by a single "resync" event instead of blocking publishers.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self.seq = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a queue on the running event loop"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def add_listener(self, callback: Callable[[Dict], None]):
+        """Synchronous callback run in the publishing thread (keep it cheap)"""
+        self._listeners.append(callback)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: Dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"type": "resync", "seq": event["seq"], "data": None})
+
+    def publish(self, event_type: str, data) -> Dict:
+        """Send an event to every subscriber; safe to call from any thread"""
+        with self._lock:
+            self.seq = next(self._seq)
+            event = {"type": event_type, "seq": self.seq, "time": time.time(), "data": data}
+            subscribers = list(self._subscribers.items())
+
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"⚠ Event listener failed: {e}")
+
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # Loop already closed - the subscriber is gone
+                self.unsubscribe(queue)
+        return event
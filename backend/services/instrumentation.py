@@ -0,0 +1,267 @@
+"""Per-request accounting of libvirt calls, subprocesses and storage I/O.
+
+Every timed call is attributed to the request being served (through a context
+variable, so worker threads must be started from a copied context) and folded
+into per-endpoint latency histograms when the request ends.
+"""
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import random
+import subprocess
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import libvirt
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+BUCKETS_MS = [0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return None
+        seen = 0
+        for bound, count in zip(BUCKETS_MS + [self.max_ms], self.counts):
+            seen += count
+            if seen >= fraction * self.count:
+                return round(min(bound, self.max_ms), 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(
+                [(f"le_{bound}", count) for bound, count in zip(BUCKETS_MS, self.counts)]
+                + [("inf", self.counts[-1])]
+            )
+        }
+
+
+class RequestStats:
+    """Calls made while serving one request (shared by the threads working for it)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, List[float]] = {}
+
+    def add(self, kind: str, ms: float):
+        with self._lock:
+            self.calls.setdefault(kind, []).append(ms)
+
+    def totals(self) -> Dict[str, Dict]:
+        """Count and time per call category (the part of the kind before ':')"""
+        totals: Dict[str, Dict] = {}
+        with self._lock:
+            for kind, samples in self.calls.items():
+                entry = totals.setdefault(kind.split(":", 1)[0], {"count": 0, "ms": 0.0})
+                entry["count"] += len(samples)
+                entry["ms"] += sum(samples)
+        return totals
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "vrhost_request_stats", default=None
+)
+
+
+class Registry:
+    """Per-endpoint request and call histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, Dict] = {}
+
+    def _endpoint(self, endpoint: str) -> Dict:
+        return self.endpoints.setdefault(endpoint, {"requests": Histogram(), "calls": {}})
+
+    def record_request(self, endpoint: str, ms: float, stats: RequestStats):
+        with self._lock:
+            entry = self._endpoint(endpoint)
+            entry["requests"].add(ms)
+            for kind, samples in stats.calls.items():
+                histogram = entry["calls"].setdefault(kind, Histogram())
+                for sample in samples:
+                    histogram.add(sample)
+
+    def record_background(self, kind: str, ms: float):
+        with self._lock:
+            self._endpoint("background")["calls"].setdefault(kind, Histogram()).add(ms)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            result = {}
+            for endpoint, entry in sorted(self.endpoints.items()):
+                requests = entry["requests"].count
+                result[endpoint] = {
+                    "requests": entry["requests"].to_dict(),
+                    "calls": {
+                        kind: {**histogram.to_dict(),
+                               "per_request": round(histogram.count / requests, 2) if requests else None}
+                        for kind, histogram in sorted(entry["calls"].items())
+                    }
+                }
+            return result
+
+
+registry = Registry()
+
+
+def record(kind: str, ms: float):
+    """Attribute a timed call to the current request, or to 'background'"""
+    stats = _current.get()
+    if stats is not None:
+        stats.add(kind, ms)
+    else:
+        registry.record_background(kind, ms)
+
+
+@contextmanager
+def timed(kind: str):
+    """Time a block as one call of the given kind"""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(kind, (time.perf_counter() - started_at) * 1000)
+
+
+def start_request() -> contextvars.Token:
+    return _current.set(RequestStats())
+
+
+def finish_request(token: contextvars.Token, endpoint: str, ms: float) -> RequestStats:
+    stats = _current.get()
+    _current.reset(token)
+    registry.record_request(endpoint, ms, stats)
+    return stats
+
+
+def bind_context(fn: Callable) -> Callable:
+    """fn bound to a copy of the caller's context, for running in another thread"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def run(cmd, **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run, timed as a 'subprocess:<program>' call"""
+    with timed(f"subprocess:{os.path.basename(str(cmd[0]))}"):
+        return subprocess.run(cmd, **kwargs)
+
+
+class _Instrumented:
+    """Proxy timing every method call of a libvirt object"""
+
+    def __init__(self, target):
+        object.__setattr__(self, "_target", target)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            with timed(f"libvirt:{name}"):
+                result = attribute(*args, **kwargs)
+            return _wrap(result)
+
+        return call
+
+    def unwrap(self):
+        return self._target
+
+
+class InstrumentedDomain(_Instrumented):
+    pass
+
+
+class InstrumentedConnection(_Instrumented):
+    pass
+
+
+def _wrap(result):
+    """Keep domains handed out by the connection instrumented"""
+    if isinstance(result, libvirt.virDomain):
+        return InstrumentedDomain(result)
+    if isinstance(result, list) and result and isinstance(result[0], libvirt.virDomain):
+        return [InstrumentedDomain(domain) for domain in result]
+    return result
+
+
+class SlowRequestProfiler:
+    """Opt-in cProfile sampling: keep the profiles of sampled requests that turn out slow.
+
+    Enabled by VRHOST_PROFILE_SLOW_MS; VRHOST_PROFILE_SAMPLE is the fraction of
+    requests profiled (default 0.1). Only one request is profiled at a time, and
+    only work on the event loop thread is seen.
+    """
+
+    def __init__(self, slow_ms: Optional[float] = None, sample: float = 0.1, keep: int = 20):
+        self.slow_ms = slow_ms
+        self.sample = sample
+        self.profiles = deque(maxlen=keep)
+        self._busy = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SlowRequestProfiler":
+        slow_ms = os.environ.get("VRHOST_PROFILE_SLOW_MS")
+        return cls(float(slow_ms) if slow_ms else None,
+                   float(os.environ.get("VRHOST_PROFILE_SAMPLE", "0.1")))
+
+    def start(self) -> Optional[cProfile.Profile]:
+        if self.slow_ms is None or random.random() >= self.sample:
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already active in this interpreter
+            self._busy.release()
+            return None
+        return profile
+
+    def finish(self, profile: cProfile.Profile, endpoint: str, ms: float):
+        profile.disable()
+        self._busy.release()
+        if ms < self.slow_ms:
+            return
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(30)
+        self.profiles.append({
+            "endpoint": endpoint,
+            "elapsed_ms": round(ms, 2),
+            "at": time.time(),
+            "profile": output.getvalue()
+        })
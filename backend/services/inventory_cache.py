@@ -0,0 +1,76 @@
+import threading
+import time
+from typing import Dict, Optional
+
+import libvirt
+
+
+class InventoryCache:
+    """Short-lived snapshot of every domain's state and size.
+
+    One listAllDomains() + info() sweep serves every read until the TTL expires or
+    invalidate() is called after a change, so capacity questions are answered from
+    memory instead of a round of libvirt calls per router.
+    """
+
+    def __init__(self, conn: libvirt.virConnect, ttl: float = 5.0):
+        self.conn = conn
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._domains: Dict[str, Dict] = {}
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        """Force the next read to refresh from libvirt"""
+        self._loaded_at = 0.0
+
+    @staticmethod
+    def _entry(domain) -> Dict:
+        info = domain.info()
+        return {
+            "name": domain.name(),
+            "active": info[0] in (libvirt.VIR_DOMAIN_RUNNING, libvirt.VIR_DOMAIN_PAUSED,
+                                  libvirt.VIR_DOMAIN_BLOCKED),
+            "state": info[0],
+            "memory_mb": int(info[1] / 1024),
+            "vcpus": info[3]
+        }
+
+    def _refresh(self):
+        self._domains = {domain.name(): self._entry(domain) for domain in self.conn.listAllDomains()}
+        self._loaded_at = time.monotonic()
+
+    def refresh_domain(self, name: str):
+        """Update one domain after a lifecycle event, without a full sweep"""
+        with self._lock:
+            if not self._loaded_at:
+                return
+            domains = dict(self._domains)  # Copy on write: readers may be iterating the old dict
+            try:
+                domains[name] = self._entry(self.conn.lookupByName(name))
+            except libvirt.libvirtError:
+                domains.pop(name, None)
+            self._domains = domains
+
+    def domains(self) -> Dict[str, Dict]:
+        """All domains by name, refreshed at most once per TTL"""
+        with self._lock:
+            if time.monotonic() - self._loaded_at > self.ttl:
+                self._refresh()
+            return self._domains
+
+    def router(self, name: str) -> Optional[Dict]:
+        """A router's footprint, combining both halves of a vQFX"""
+        domains = self.domains()
+        if name in domains:
+            return domains[name]
+
+        halves = [domains.get(f"{name}-re"), domains.get(f"{name}-pfe")]
+        if not all(halves):
+            return None
+        return {
+            "name": name,
+            "active": any(h["active"] for h in halves),
+            "memory_mb": sum(h["memory_mb"] for h in halves),
+            "vcpus": sum(h["vcpus"] for h in halves)
+        }
@@ -1,96 +1,140 @@
-import json
-import os
-from typing import List, Dict
+import sqlite3
+from typing import List, Dict, Optional
 from datetime import datetime
+from backend.repositories.lab_repository import LabRepository
 
 class LabService:
-    def __init__(self, storage_path: str = "/opt/vrhost-lab/labs"):
-        self.storage_path = storage_path
-        os.makedirs(storage_path, exist_ok=True)
-    
-    def create_lab(self, name: str, description: str = "") -> Dict:
+    def __init__(self, repository: LabRepository):
+        self.repository = repository
+
+    @property
+    def members(self) -> Dict[str, List[str]]:
+        """Lab name -> member routers"""
+        members = {lab['name']: [] for lab in self.repository.list()}
+        members.update(self.repository.members())
+        return members
+
+    def add_router(self, lab_name: str, router_name: str) -> Dict:
+        """Record that a router belongs to a lab (a router is in at most one lab)"""
+        try:
+            self.repository.add_router(lab_name, router_name)
+        except sqlite3.IntegrityError:
+            return {"success": False, "message": f"Lab '{lab_name}' not found"}
+        return {"success": True, "message": f"{router_name} added to lab '{lab_name}'"}
+
+    def remove_router(self, router_name: str):
+        """Drop a deleted router from whichever lab it belonged to"""
+        self.repository.remove_router(router_name)
+
+    def transaction(self):
+        """Database transaction that membership and link changes can share"""
+        return self.repository.db.transaction()
+
+    def ensure_lab(self, name: str, description: str = "") -> Dict:
+        """Create a lab if it does not exist yet"""
+        if self.repository.exists(name):
+            return {"success": True, "message": f"Lab '{name}' exists"}
+        return self.create_lab(name, description)
+
+    def set_quota(self, name: str, quota: Dict) -> Dict:
+        """Replace a lab's resource budget"""
+        quota = {k: v for k, v in quota.items() if v is not None}
+        if not self.repository.update_quota(name, quota, datetime.now().isoformat()):
+            return {"success": False, "message": f"Lab '{name}' not found"}
+        return {"success": True, "message": f"Quota of lab '{name}' updated", "quota": quota}
+
+    def get_router_lab(self, router_name: str) -> Optional[str]:
+        """Lab a router belongs to, if any"""
+        return self.repository.router_lab(router_name)
+
+    def migrate_prefix_membership(self, router_service) -> int:
+        """One-time import of the old '<lab>-' name prefix convention into explicit membership"""
+        db = self.repository.db
+        if db.get_meta("prefix_membership_migrated"):
+            return 0
+
+        assigned = 0
+        # Longest lab name first, so 'lab-2-r1' lands in 'lab-2' rather than 'lab'
+        labs = sorted((lab['name'] for lab in self.repository.list()), key=len, reverse=True)
+        with db.transaction():
+            for router in router_service.list_routers():
+                if self.repository.router_lab(router['name']):
+                    continue
+                for lab_name in labs:
+                    if router['name'].startswith(lab_name + "-"):
+                        self.repository.add_router(lab_name, router['name'])
+                        assigned += 1
+                        break
+            db.set_meta("prefix_membership_migrated", datetime.now().isoformat())
+
+        if assigned:
+            print(f"✓ Migrated {assigned} router(s) to explicit lab membership")
+        return assigned
+
+    def create_lab(self, name: str, description: str = "", quota: Optional[Dict] = None) -> Dict:
         """Create a new lab"""
         lab = {
             "name": name,
             "description": description,
             "routers": [],
+            "quota": {k: v for k, v in (quota or {}).items() if v is not None},
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat()
         }
-        
-        file_path = os.path.join(self.storage_path, f"{name}.json")
-        
-        if os.path.exists(file_path):
-            return {"success": False, "message": f"Lab '{name}' already exists"}
-        
+
         try:
-            with open(file_path, 'w') as f:
-                json.dump(lab, f, indent=2)
+            self.repository.create(lab)
             return {"success": True, "message": f"Lab '{name}' created", "lab": lab}
+        except sqlite3.IntegrityError:
+            return {"success": False, "message": f"Lab '{name}' already exists"}
         except Exception as e:
             return {"success": False, "message": str(e)}
-    
+
     def list_labs(self, router_service) -> List[Dict]:
         """List all labs with router counts"""
         labs = []
-        
-        if not os.path.exists(self.storage_path):
-            return labs
-        
-        all_routers = router_service.list_routers()
-        
-        for filename in os.listdir(self.storage_path):
-            if filename.endswith('.json'):
-                file_path = os.path.join(self.storage_path, filename)
-                try:
-                    with open(file_path, 'r') as f:
-                        lab = json.load(f)
-                    
-                    # Count routers in this lab
-                    lab_prefix = lab['name'] + "-"
-                    lab_routers = [r for r in all_routers if r['name'].startswith(lab_prefix)]
-                    running_routers = [r for r in lab_routers if r['state'] == 'running']
-                    
-                    labs.append({
-                        "name": lab['name'],
-                        "description": lab.get('description', ''),
-                        "router_count": len(lab_routers),
-                        "running_count": len(running_routers),
-                        "created_at": lab.get('created_at', '')
-                    })
-                except:
-                    continue
-        
+
+        for lab in self.repository.list():
+            # Only this lab's members are looked up - no hypervisor-wide scan
+            lab_routers = self._lookup_routers(lab['name'], lab['routers'], router_service)
+            running_routers = [r for r in lab_routers if r['state'] == 'running']
+
+            labs.append({
+                "name": lab['name'],
+                "description": lab['description'],
+                "router_count": len(lab_routers),
+                "running_count": len(running_routers),
+                "created_at": lab['created_at']
+            })
+
         return labs
-    
+
     def get_lab(self, name: str) -> Dict:
         """Get lab details"""
-        file_path = os.path.join(self.storage_path, f"{name}.json")
-        
-        if not os.path.exists(file_path):
+        lab = self.repository.get(name)
+        if lab is None:
             return {"error": f"Lab '{name}' not found"}
-        
-        try:
-            with open(file_path, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            return {"error": str(e)}
-    
+        return lab
+
     def delete_lab(self, name: str) -> Dict:
         """Delete a lab (doesn't delete routers)"""
-        file_path = os.path.join(self.storage_path, f"{name}.json")
-        
-        if not os.path.exists(file_path):
-            return {"success": False, "message": f"Lab '{name}' not found"}
-        
         try:
-            os.remove(file_path)
+            if not self.repository.delete(name):
+                return {"success": False, "message": f"Lab '{name}' not found"}
             return {"success": True, "message": f"Lab '{name}' deleted"}
         except Exception as e:
             return {"success": False, "message": str(e)}
-    
+
+    @staticmethod
+    def _lookup_routers(lab_name: str, router_names: List[str], router_service) -> List[Dict]:
+        routers = []
+        for router_name in router_names:
+            summary = router_service.get_router_summary(router_name)
+            if summary:
+                summary['lab'] = lab_name
+                routers.append(summary)
+        return routers
+
     def get_lab_routers(self, lab_name: str, router_service) -> List[Dict]:
         """Get all routers belonging to a lab"""
-        all_routers = router_service.list_routers()
-        lab_prefix = lab_name + "-"
-        return [r for r in all_routers if r['name'].startswith(lab_prefix)]
+        return self._lookup_routers(lab_name, self.repository.routers(lab_name), router_service)
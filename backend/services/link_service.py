@@ -1,50 +1,18 @@
 from typing import List, Dict, Optional
 from backend.models.link import Link, LinkCreate
-import json
-import os
+from backend.repositories.link_repository import LinkRepository
 
 class LinkService:
     """Service for managing network links between routers"""
 
-    def __init__(self, data_dir: str = "/opt/vrhost-lab/data"):
-        self.data_dir = data_dir
-        self.links_file = os.path.join(data_dir, "links.json")
-        self.links: Dict[str, Link] = {}
-        self._load_links()
+    def __init__(self, repository: LinkRepository, event_bus=None):
+        self.repository = repository
+        self.event_bus = event_bus
 
-    def _load_links(self):
-        """Load links from JSON file, create empty file if missing"""
-        try:
-            # Ensure data directory exists
-            os.makedirs(self.data_dir, exist_ok=True)
-            
-            # Create empty links file if it doesn't exist
-            if not os.path.exists(self.links_file):
-                print(f"ℹ Creating empty links file: {self.links_file}")
-                with open(self.links_file, 'w') as f:
-                    json.dump({}, f)
-                self.links = {}
-                return
-            
-            # Load existing links
-            with open(self.links_file, 'r') as f:
-                data = json.load(f)
-                self.links = {k: Link(**v) for k, v in data.items()}
-            print(f"✓ Loaded {len(self.links)} links from {self.links_file}")
-        except Exception as e:
-            print(f"⚠ Could not load links: {e}")
-            print(f"ℹ Starting with empty links")
-            self.links = {}
-
-    def _save_links(self):
-        """Save links to JSON file"""
-        try:
-            os.makedirs(self.data_dir, exist_ok=True)
-            with open(self.links_file, 'w') as f:
-                data = {k: v.dict() for k, v in self.links.items()}
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"⚠ Could not save links: {e}")
+    def _publish(self, event_type: str, data):
+        """Publish once the change is committed (callers may be inside a wider transaction)"""
+        if self.event_bus:
+            self.repository.db.after_commit(lambda: self.event_bus.publish(event_type, data))
 
     def _generate_link_id(self, source_router: str, source_interface: str,
                           target_router: str, target_interface: str) -> str:
@@ -65,7 +33,7 @@ class LinkService:
             )
 
             # Check if link already exists
-            if link_id in self.links:
+            if self.repository.get(link_id):
                 return {
                     "success": False,
                     "message": f"Link already exists: {link_id}"
@@ -101,9 +69,14 @@ class LinkService:
                 lab=link_create.lab
             )
 
-            self.links[link_id] = link
-            self._save_links()
+            # The primary key settles concurrent creates of the same link
+            if not self.repository.insert(link.dict()):
+                return {
+                    "success": False,
+                    "message": f"Link already exists: {link_id}"
+                }
 
+            self._publish("link", link.dict())
             return {
                 "success": True,
                 "message": f"Link created: {link_id}",
@@ -118,15 +91,13 @@ class LinkService:
 
     def delete_link(self, link_id: str) -> Dict:
         """Delete a network link"""
-        if link_id not in self.links:
+        if not self.repository.delete(link_id):
             return {
                 "success": False,
                 "message": f"Link not found: {link_id}"
             }
 
-        del self.links[link_id]
-        self._save_links()
-
+        self._publish("link_deleted", {"id": link_id})
         return {
             "success": True,
             "message": f"Link deleted: {link_id}"
@@ -134,38 +105,26 @@ class LinkService:
 
     def get_link(self, link_id: str) -> Optional[Link]:
         """Get a specific link"""
-        return self.links.get(link_id)
+        link = self.repository.get(link_id)
+        return Link(**link) if link else None
 
     def list_links(self, lab: Optional[str] = None) -> List[Dict]:
         """List all links, optionally filtered by lab"""
-        links_list = list(self.links.values())
-
-        if lab:
-            links_list = [link for link in links_list if link.lab == lab]
-
-        return [link.dict() for link in links_list]
+        return self.repository.list(lab)
 
     def get_router_links(self, router_name: str) -> List[Dict]:
         """Get all links connected to a specific router"""
-        router_links = []
-
-        for link in self.links.values():
-            if link.source_router == router_name or link.target_router == router_name:
-                router_links.append(link.dict())
-
-        return router_links
+        return self.repository.for_router(router_name)
 
     def update_link_status(self, link_id: str, status: str) -> Dict:
         """Update link status (up/down)"""
-        if link_id not in self.links:
+        if not self.repository.set_status({link_id: status}):
             return {
                 "success": False,
                 "message": f"Link not found: {link_id}"
             }
 
-        self.links[link_id].status = status
-        self._save_links()
-
+        self._publish("link", self.repository.get(link_id))
         return {
             "success": True,
             "message": f"Link status updated: {link_id} -> {status}"
@@ -173,55 +132,50 @@ class LinkService:
 
     def update_links_for_router(self, router_name: str, router_state: str, router_service=None):
         """Update all links for a router based on its state - checks BOTH routers"""
-        updated_count = 0
+        changes = {}
+        changed = []
         
-        for link in self.links.values():
-            if link.source_router == router_name or link.target_router == router_name:
-                # Determine the other router in this link
-                other_router = link.target_router if link.source_router == router_name else link.source_router
-                
-                # Check if BOTH routers are running
-                if router_service:
-                    try:
-                        other_details = router_service.get_router_details(other_router)
-                        other_state = other_details.get('state', 'unknown')
-                        
-                        # Link is up only if BOTH routers are running
-                        old_status = link.status
-                        if router_state == 'running' and other_state == 'running':
-                            link.status = 'up'
-                        else:
-                            link.status = 'down'
-                        
-                        if old_status != link.status:
-                            print(f"✓ Link {link.id}: {old_status} -> {link.status} ({router_name}: {router_state}, {other_router}: {other_state})")
-                            updated_count += 1
-                    except Exception as e:
-                        print(f"⚠ Could not check state of {other_router}: {e}")
-                        link.status = 'down'
-                        updated_count += 1
-                else:
-                    # Fallback: simple logic if router_service not available
-                    old_status = link.status
-                    link.status = 'up' if router_state == 'running' else 'down'
-                    if old_status != link.status:
-                        updated_count += 1
-
-        if updated_count > 0:
-            self._save_links()
-            print(f"✓ Updated {updated_count} link(s) for router {router_name}")
+        for link in self.repository.for_router(router_name):
+            # Determine the other router in this link
+            other_router = link['target_router'] if link['source_router'] == router_name else link['source_router']
+            old_status = link['status']
+
+            # Check if BOTH routers are running
+            if router_service:
+                try:
+                    other_details = router_service.get_router_details(other_router)
+                    other_state = other_details.get('state', 'unknown')
+                    
+                    # Link is up only if BOTH routers are running
+                    if router_state == 'running' and other_state == 'running':
+                        status = 'up'
+                    else:
+                        status = 'down'
+                    
+                    if old_status != status:
+                        print(f"✓ Link {link['id']}: {old_status} -> {status} ({router_name}: {router_state}, {other_router}: {other_state})")
+                except Exception as e:
+                    print(f"⚠ Could not check state of {other_router}: {e}")
+                    status = 'down'
+            else:
+                # Fallback: simple logic if router_service not available
+                status = 'up' if router_state == 'running' else 'down'
+
+            if old_status != status:
+                changes[link['id']] = status
+                link['status'] = status
+                changed.append(link)
+
+        if changes:
+            self.repository.set_status(changes)
+            for link in changed:
+                self._publish("link", link)
+            print(f"✓ Updated {len(changes)} link(s) for router {router_name}")
 
     def delete_router_links(self, router_name: str) -> int:
         """Delete all links connected to a router (when router is deleted)"""
-        links_to_delete = [
-            link_id for link_id, link in self.links.items()
-            if link.source_router == router_name or link.target_router == router_name
-        ]
-
-        for link_id in links_to_delete:
-            del self.links[link_id]
-
-        if links_to_delete:
-            self._save_links()
-
-        return len(links_to_delete)
+        link_ids = [link['id'] for link in self.repository.for_router(router_name)] if self.event_bus else []
+        deleted = self.repository.delete_for_router(router_name)
+        for link_id in link_ids:
+            self._publish("link_deleted", {"id": link_id})
+        return deleted
@@ -0,0 +1,71 @@
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Sorts after any real character, so [prefix, prefix + _MAX) covers every key with that prefix
+_MAX = chr(0x10FFFF)
+
+
+class ListingIndex:
+    """Sorted, indexed view of a list of records for filtered, paginated listings.
+
+    Records are sorted by their key; each indexed field maps a value to the
+    sorted positions of the records having it. A query starts from the shortest
+    matching posting list (or the key range for a name prefix), checks the other
+    filters per candidate and pages with the last key seen as the cursor.
+    """
+
+    def __init__(self, records: List[Dict], key: str,
+                 indexed: Dict[str, Callable[[Dict], Iterable]]):
+        self.key = key
+        self.records = sorted(records, key=lambda r: r[key])
+        self.keys = [r[key] for r in self.records]
+        self.extractors = indexed
+        self.postings: Dict[str, Dict[str, List[int]]] = {field: {} for field in indexed}
+        for position, record in enumerate(self.records):
+            for field, extract in indexed.items():
+                for value in set(extract(record)):
+                    self.postings[field].setdefault(value, []).append(position)
+
+    def _positions(self, field: str, values: List[str]) -> List[int]:
+        postings = self.postings[field]
+        if len(values) == 1:
+            return postings.get(values[0], [])
+        return sorted({p for value in values for p in postings.get(value, [])})
+
+    def query(self, filters: Optional[Dict[str, List[str]]] = None, prefix: Optional[str] = None,
+              cursor: Optional[str] = None, limit: Optional[int] = None,
+              fields: Optional[List[str]] = None) -> Dict:
+        """Matching records after cursor, at most limit of them, projected to fields"""
+        filters = {f: v for f, v in (filters or {}).items() if v}
+        lo, hi = 0, len(self.keys)
+        if prefix:
+            lo, hi = bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + _MAX)
+
+        if filters:
+            # Drive the scan from the most selective filter, verify the rest per record
+            lists = {field: self._positions(field, values) for field, values in filters.items()}
+            driver = min(lists, key=lambda field: len(lists[field]))
+            positions = lists[driver]
+            candidates = positions[bisect_left(positions, lo):bisect_left(positions, hi)]
+            checks = {field: set(values) for field, values in filters.items() if field != driver}
+            matches = [
+                p for p in candidates
+                if all(checks[field] & set(self.extractors[field](self.records[p])) for field in checks)
+            ]
+        else:
+            matches = range(lo, hi)
+
+        total = len(matches)
+        start = bisect_left(matches, bisect_right(self.keys, cursor)) if cursor else 0
+        page = matches[start:start + limit] if limit else matches[start:]
+        more = limit is not None and start + limit < total
+
+        items = [self.records[p] for p in page]
+        if fields:
+            wanted = set(fields) | {self.key}
+            items = [{k: v for k, v in item.items() if k in wanted} for item in items]
+        return {
+            "items": items,
+            "total": total,
+            "next_cursor": items[-1][self.key] if more and items else None
+        }
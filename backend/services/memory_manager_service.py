@@ -0,0 +1,87 @@
+import threading
+import time
+from typing import Dict
+
+import libvirt
+
+
+class MemoryManagerService:
+    """Give idle routers' memory back to the host.
+
+    Kernel same-page merging (KSM) is switched on for every node, so routers
+    booted from the same base image share identical pages (guest RAM is
+    mergeable unless a domain asks for <nosharepages/>). On each activity sample,
+    routers that have been idle are shrunk through the virtio balloon to
+    idle_fraction of their memory (never below min_mb), and grown back to their
+    full size as soon as they are active again. Guests whose balloon does not
+    move are left alone.
+    """
+
+    def __init__(self, tracker, idle_fraction: float = 0.5, min_mb: int = 1024,
+                 ksm_pages_to_scan: int = 1000, ksm_sleep_ms: int = 20):
+        self.tracker = tracker
+        self.idle_fraction = idle_fraction
+        self.min_mb = min_mb
+        self.ksm_pages_to_scan = ksm_pages_to_scan
+        self.ksm_sleep_ms = ksm_sleep_ms
+        self._requested: Dict[str, Dict] = {}  # domain -> balloon target and when it was set
+        self._unresponsive = set()
+        self._lock = threading.Lock()
+
+    def enable_ksm(self, conn):
+        """Turn on page merging on a node (run on every (re)connect)"""
+        try:
+            conn.setMemoryParameters({
+                "shm_run": 1,
+                "shm_pages_to_scan": self.ksm_pages_to_scan,
+                "shm_sleep_millisecs": self.ksm_sleep_ms
+            }, 0)
+        except libvirt.libvirtError as e:
+            print(f"⚠ Could not enable KSM: {e}")
+
+    def _set_memory(self, domain, kib: int):
+        domain.setMemoryFlags(kib, libvirt.VIR_DOMAIN_AFFECT_LIVE)
+
+    def on_sample(self, routers: Dict, domains: Dict):
+        """Balloon idle routers down and active ones back up"""
+        now = time.monotonic()
+        with self._lock:
+            for name in list(self._requested):
+                if name not in domains:
+                    del self._requested[name]  # Stopped or deleted
+
+            for name, (domain, stats) in domains.items():
+                maximum, current = stats.get("balloon.maximum"), stats.get("balloon.current")
+                if not maximum or not current or name in self._unresponsive:
+                    continue
+                active = routers.get(self.tracker._router_of(name), {}).get("active", True)
+                try:
+                    if active:
+                        if current < maximum:
+                            self._set_memory(domain, maximum)
+                            self._requested.pop(name, None)
+                        continue
+
+                    requested = self._requested.get(name)
+                    if requested is None:
+                        target = max(self.min_mb * 1024, int(maximum * self.idle_fraction))
+                        if target < current:
+                            self._set_memory(domain, target)
+                            self._requested[name] = {"target": target, "at": now}
+                    elif current > requested["target"] and now - requested["at"] > 2 * self.tracker.interval:
+                        # No balloon driver in the guest: give the memory back and stop trying
+                        print(f"⚠ {name} does not respond to the memory balloon, leaving it at full size")
+                        self._unresponsive.add(name)
+                        self._set_memory(domain, maximum)
+                        del self._requested[name]
+                except libvirt.libvirtError as e:
+                    print(f"⚠ Could not resize {name}: {e}")
+                    self._unresponsive.add(name)
+
+    def status(self) -> Dict:
+        return {
+            "idle_fraction": self.idle_fraction,
+            "min_mb": self.min_mb,
+            "ballooning": sorted(self._requested),
+            "unresponsive": sorted(self._unresponsive)
+        }
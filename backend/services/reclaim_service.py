@@ -0,0 +1,135 @@
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from backend.services import instrumentation
+
+MIB = 1024 * 1024
+
+
+def reclaim_file(path: str, chunk_bytes: int = 0, throttle: Optional[Callable[[int], bool]] = None) -> Optional[int]:
+    """Free a file's blocks and unlink it; returns the bytes freed.
+
+    With chunk_bytes the file is shrunk from the end one chunk at a time and
+    throttle(freed) is called after each step, so the filesystem frees extents
+    gradually instead of in one long unlink. A throttle returning False stops
+    early (None is returned and the file is left, shorter, for a later run).
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return 0
+    allocated = stat.st_blocks * 512
+    size = stat.st_size
+
+    if chunk_bytes:
+        while size > 0:
+            before = os.stat(path).st_blocks * 512
+            size = max(0, size - chunk_bytes)
+            with instrumentation.timed("file:truncate"):
+                os.truncate(path, size)
+            if throttle and not throttle(before - os.stat(path).st_blocks * 512):
+                return None
+
+    with instrumentation.timed("file:remove"):
+        os.remove(path)
+    return allocated
+
+
+def remove_network(name: str, uri: Optional[str] = None):
+    """Stop and undefine a libvirt network if it still exists"""
+    virsh = ["virsh", "-c", uri] if uri else ["virsh"]
+    if instrumentation.run(virsh + ["net-info", name], capture_output=True, text=True).returncode != 0:
+        return
+    instrumentation.run(virsh + ["net-destroy", name], capture_output=True, text=True)
+    result = instrumentation.run(virsh + ["net-undefine", name], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"Could not undefine network {name}")
+
+
+class ReclaimService:
+    """Background cleanup of deleted routers' disks and networks.
+
+    Deleting a router only undefines its domains; the files it leaves (moved
+    aside under unique names first) and its networks are queued as jobs in the
+    database. One worker thread works through
+    them in order, freeing disk blocks at no more than rate_mb MB/s so a large
+    lab teardown does not saturate the storage. Jobs survive a restart and are
+    picked up again when the worker starts.
+    """
+
+    def __init__(self, repository, rate_mb: int = 128, chunk_mb: int = 64, event_bus=None):
+        self.repository = repository
+        self.rate_mb = rate_mb
+        self.chunk_mb = chunk_mb
+        self.event_bus = event_bus
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._current: Optional[Dict] = None
+
+    def start(self):
+        pending = self.repository.summary()["counts"].get("pending", 0)
+        if pending:
+            print(f"ℹ Resuming {pending} disk/network reclaim jobs")
+        threading.Thread(target=self._worker, name="reclaim", daemon=True).start()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def enqueue(self, router: str, jobs: List[Dict]) -> int:
+        """Hand a deleted router's leftovers to the worker"""
+        count = self.repository.add(router, jobs)
+        self._wake.set()
+        return count
+
+    def pending_files(self, router: str) -> List[str]:
+        return self.repository.pending_files(router)
+
+    def status(self) -> Dict:
+        summary = self.repository.summary()
+        return {
+            "rate_mb": self.rate_mb,
+            "current": self._current,
+            "counts": summary["counts"],
+            "reclaimed_bytes": summary["reclaimed_bytes"],
+            "jobs": self.repository.recent()
+        }
+
+    def _throttle(self, freed: int) -> bool:
+        """Sleep long enough to keep freeing at rate_mb; False when shutting down"""
+        if self.rate_mb and freed > 0:
+            return not self._stopping.wait(freed / (self.rate_mb * MIB))
+        return not self._stopping.is_set()
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            self._wake.clear()
+            job = self.repository.next_pending()
+            if job is None:
+                self._wake.wait()
+                continue
+
+            self._current = job
+            try:
+                if job["kind"] == "network":
+                    remove_network(job["target"], job["uri"])
+                    reclaimed = 0
+                else:
+                    reclaimed = reclaim_file(job["target"], self.chunk_mb * MIB, self._throttle)
+                    if reclaimed is None:
+                        return  # Shutting down; the job stays pending
+                self.repository.finish(job["id"], "done", reclaimed)
+                status, error = "done", None
+            except Exception as e:
+                print(f"⚠ Could not reclaim {job['target']}: {e}")
+                self.repository.finish(job["id"], "failed", error=str(e))
+                status, error, reclaimed = "failed", str(e), 0
+            finally:
+                self._current = None
+
+            if self.event_bus:
+                self.event_bus.publish("reclaim", {
+                    "router": job["router"], "kind": job["kind"], "target": job["target"],
+                    "status": status, "bytes": reclaimed, "error": error
+                })
@@ -0,0 +1,229 @@
+from typing import Dict, Iterator, List
+
+from backend.models.link import LinkCreate
+from backend.models.topology import Topology
+from backend.services.router_service import DEVICE_FOOTPRINTS
+from backend.services.task_graph import TaskGraph
+
+
+class ReconcileService:
+    """Compare a desired topology with live state and apply only the difference"""
+
+    def __init__(self, router_service, link_service, lab_service, max_parallel: int = 4,
+                 ready_timeout: int = 600):
+        self.router_service = router_service
+        self.link_service = link_service
+        self.lab_service = lab_service
+        self.max_parallel = max_parallel
+        self.ready_timeout = ready_timeout
+
+    def _desired_links(self, topology: Topology) -> Dict[str, LinkCreate]:
+        """Desired links keyed by the id LinkService would generate"""
+        desired = {}
+        for link in topology.links:
+            link = LinkCreate(**{**link.dict(), "lab": link.lab or topology.name})
+            link_id = self.link_service._generate_link_id(
+                link.source_router, link.source_interface,
+                link.target_router, link.target_interface
+            )
+            desired[link_id] = link
+        return desired
+
+    def _scope(self, topology: Topology) -> set:
+        """Routers previously deployed from this topology (candidates for pruning)"""
+        scope = {r["name"] for r in self.lab_service.get_lab_routers(topology.name, self.router_service)}
+        for link in self.link_service.list_links(lab=topology.name):
+            scope.add(link["source_router"])
+            scope.add(link["target_router"])
+        return scope
+
+    def plan(self, topology: Topology, prune: bool = False) -> List[Dict]:
+        """Compute the minimal list of actions that brings live state to the topology"""
+        desired = {r.name: r for r in topology.routers}
+        scope = self._scope(topology) if prune else set()
+        # Only the routers this topology can touch are looked up, not the whole hypervisor
+        actual = {}
+        for name in sorted(set(desired) | scope):
+            summary = self.router_service.get_router_summary(name)
+            if summary is not None:
+                actual[name] = summary
+        actions = []
+
+        for name, router in desired.items():
+            current = actual.get(name)
+            if current is None:
+                actions.append({"action": "create", "target": name, "reason": "missing"})
+                continue
+
+            # Existing routers outside any lab join this one; another lab's routers stay there
+            if self.lab_service.get_router_lab(name) is None:
+                actions.append({"action": "adopt", "target": name, "reason": "not a lab member"})
+
+            wanted_type = self.router_service.normalize_router_type(router.router_type)
+            if current["router_type"] != wanted_type:
+                actions.append({
+                    "action": "recreate", "target": name,
+                    "reason": f"type {current['router_type']} → {wanted_type}"
+                })
+                continue
+
+            # The mk* scripts fix the size of these types (vQFX RE/PFE, CSR1000v, IOSvL2)
+            if wanted_type in DEVICE_FOOTPRINTS:
+                continue
+
+            if current["memory_mb"] != router.ram_gb * 1024 or current["vcpus"] != router.vcpus:
+                actions.append({
+                    "action": "resize", "target": name,
+                    "reason": f"{current['memory_mb']}MB/{current['vcpus']} vCPUs → "
+                              f"{router.ram_gb * 1024}MB/{router.vcpus} vCPUs",
+                    "restart": current["state"] == "running"
+                })
+
+        if prune:
+            for name in sorted(scope - set(desired)):
+                if name in actual:
+                    actions.append({"action": "delete", "target": name, "reason": "not in topology"})
+
+        desired_links = self._desired_links(topology)
+        actual_links = {link["id"]: link for link in self.link_service.list_links(lab=topology.name)}
+
+        for link_id in sorted(set(actual_links) - set(desired_links)):
+            actions.append({"action": "unlink", "target": link_id, "reason": "not in topology"})
+        for link_id in sorted(set(desired_links) - set(actual_links)):
+            actions.append({"action": "link", "target": link_id, "reason": "missing"})
+
+        # Deleting a router drops its links, so desired links of recreated routers are relinked
+        recreated = {a["target"] for a in actions if a["action"] == "recreate"}
+        for link_id in sorted(set(desired_links) & set(actual_links)):
+            link = desired_links[link_id]
+            if link.source_router in recreated or link.target_router in recreated:
+                actions.append({"action": "link", "target": link_id, "reason": "relink after recreate"})
+
+        return actions
+
+    def _delete_step(self, name: str) -> Dict:
+        result = self.router_service.delete_router(name)
+        if result["success"]:
+            with self.lab_service.transaction():
+                self.link_service.delete_router_links(name)
+                self.lab_service.remove_router(name)
+        return result
+
+    def _create_step(self, router, lab_name: str) -> Dict:
+        result = self.router_service.create_router(
+            name=router.name,
+            ip=router.ip,
+            router_type=router.router_type,
+            ram=router.ram_gb,
+            vcpus=router.vcpus,
+            lab=lab_name
+        )
+        if result["success"]:
+            self.lab_service.add_router(lab_name, router.name)
+        return result
+
+    def _resize_step(self, router, restart: bool) -> Dict:
+        result = self.router_service.resize_router(router.name, router.ram_gb, router.vcpus)
+        if result["success"] and restart:
+            return self.router_service.power_cycle_router(router.name)
+        return result
+
+    def _ready_step(self, router) -> Dict:
+        result = self.router_service.wait_for_ready(router.name, router.ip, timeout=self.ready_timeout)
+        if result["success"]:
+            self.link_service.update_links_for_router(router.name, "running", self.router_service)
+        return result
+
+    def build_graph(self, topology: Topology, actions: List[Dict],
+                    max_parallel: int = None) -> TaskGraph:
+        """Turn a plan into a dependency graph: unlink → delete → create/resize → link → ready"""
+        graph = TaskGraph(
+            max_workers=max(len(actions) * 2, 1),
+            limits={"provision": max_parallel or self.max_parallel}
+        )
+        routers = {r.name: r for r in topology.routers}
+        desired_links = self._desired_links(topology)
+        unlink_steps = [f"unlink:{a['target']}" for a in actions if a["action"] == "unlink"]
+        changed = {}
+
+        for action in actions:
+            if action["action"] == "unlink":
+                graph.add(
+                    f"unlink:{action['target']}",
+                    lambda link_id=action["target"]: self.link_service.delete_link(link_id),
+                    description=f"Delete link {action['target']}"
+                )
+
+        for action in actions:
+            name = action["target"]
+            if action["action"] == "delete":
+                graph.add(f"delete:{name}", lambda name=name: self._delete_step(name),
+                          depends_on=unlink_steps, pool="provision",
+                          description=f"Delete {name}")
+            elif action["action"] == "create":
+                graph.add(f"create:{name}", lambda router=routers[name]: self._create_step(router, topology.name),
+                          depends_on=unlink_steps, pool="provision",
+                          description=f"Create {routers[name].router_type} {name}")
+                changed[name] = f"create:{name}"
+            elif action["action"] == "recreate":
+                graph.add(f"delete:{name}", lambda name=name: self._delete_step(name),
+                          depends_on=unlink_steps, pool="provision",
+                          description=f"Delete {name} for recreation")
+                graph.add(f"create:{name}", lambda router=routers[name]: self._create_step(router, topology.name),
+                          depends_on=[f"delete:{name}"], pool="provision",
+                          description=f"Recreate {name} as {routers[name].router_type}")
+                changed[name] = f"create:{name}"
+            elif action["action"] == "adopt":
+                graph.add(f"adopt:{name}",
+                          lambda name=name: self.lab_service.add_router(topology.name, name),
+                          description=f"Add {name} to lab '{topology.name}'")
+            elif action["action"] == "resize":
+                graph.add(f"resize:{name}",
+                          lambda router=routers[name], restart=action["restart"]:
+                              self._resize_step(router, restart),
+                          depends_on=unlink_steps, pool="provision",
+                          description=f"Resize {name}" + (" and restart" if action["restart"] else ""))
+                if action["restart"]:
+                    changed[name] = f"resize:{name}"
+
+        for action in actions:
+            if action["action"] != "link":
+                continue
+            link = desired_links[action["target"]]
+            endpoints = [r for r in (link.source_router, link.target_router) if r in changed]
+            graph.add(
+                f"link:{action['target']}",
+                lambda link=link: self.link_service.create_link(link, self.router_service),
+                depends_on=unlink_steps + [changed[r] for r in endpoints],
+                description=f"Create link {action['target']}"
+            )
+
+        for name, step_id in changed.items():
+            graph.add(
+                f"ready:{name}",
+                lambda router=routers[name]: self._ready_step(router),
+                depends_on=[step_id] + [
+                    f"link:{link_id}" for link_id, link in desired_links.items()
+                    if f"link:{link_id}" in graph.steps and name in (link.source_router, link.target_router)
+                ],
+                description=f"Wait for {name} to be reachable"
+            )
+
+        return graph
+
+    def reconcile(self, topology: Topology, prune: bool = False,
+                  max_parallel: int = None) -> Iterator[Dict]:
+        """Plan and execute, yielding per-step progress events"""
+        actions = self.plan(topology, prune)
+        yield {"step": None, "status": "planned", "topology": topology.name, "actions": actions}
+        if not actions:
+            yield {"step": None, "status": "complete", "success": True, "counts": {},
+                   "elapsed_seconds": 0}
+            return
+        self.lab_service.ensure_lab(topology.name, topology.description or "")
+        # New routers join the node already hosting the lab (or the emptiest one)
+        self.router_service.place_lab(topology.name, sum(
+            self.router_service.footprint(r.router_type, r.ram_gb, r.vcpus)["memory_mb"]
+            for r in topology.routers
+        ))
+        yield from self.build_graph(topology, actions, max_parallel).run()
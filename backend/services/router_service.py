@@ -1,11 +1,105 @@
 import subprocess
+import socket
+import time
 import libvirt
-from typing import List, Dict
+from typing import List, Dict, Optional, Set, Tuple
 import os
+import struct
+import threading
+import uuid
+import xml.etree.ElementTree as ET
+
+from backend.services import instrumentation
+from backend.services.reclaim_service import reclaim_file, remove_network
+
+# Canonical router types, as reported by list_routers()
+ROUTER_TYPE_ALIASES = {
+    "juniper": "juniper", "vsrx": "juniper",
+    "cisco": "cisco", "csr1000v": "cisco", "csr": "cisco",
+    "cisco-switch": "cisco-switch", "iosvl2": "cisco-switch", "viosl2": "cisco-switch",
+    "juniper-switch": "juniper-switch", "vqfx": "juniper-switch",
+}
+
+# Fixed sizes set by the mk* scripts; vSRX/vRR take RAM and vCPUs from the request
+DEVICE_FOOTPRINTS = {
+    "cisco": {"memory_mb": 4096, "vcpus": 2},
+    "cisco-switch": {"memory_mb": 2048, "vcpus": 2},
+    "juniper-switch": {"memory_mb": 4096, "vcpus": 2},  # RE + PFE
+}
+
+IMAGES_PATH = os.environ.get("VRHOST_IMAGES_PATH", "/var/lib/libvirt/images")
+# Deleted routers' files are moved here until the reclaimer frees them, so a new
+# router with the same name never shares a path with a pending job
+RECLAIM_PATH = f"{IMAGES_PATH}/.reclaim"
+
+# Base image behind each disk the mk* scripts attach, keyed by disk name suffix
+# (must match the scripts' BASE_IMAGE settings)
+BASE_IMAGES = {
+    "juniper": {"": f"{IMAGES_PATH}/vsrx-23.2R2.21.qcow2"},
+    "cisco": {"": f"{IMAGES_PATH}/cisco/csr1000v-17.03.04a.qcow2"},
+    "cisco-switch": {"": f"{IMAGES_PATH}/cisco/viosl2-20180619.qcow2"},
+    "juniper-switch": {
+        "-re": f"{IMAGES_PATH}/juniper/vqfx-20.2R1.10-re-qemu.qcow2",
+        "-pfe": f"{IMAGES_PATH}/juniper/vqfx-20.2R1-2019010209-pfe-qemu.qcow",
+    },
+}
+
+# Disk I/O settings applied at define time (see storage_env); "legacy" keeps the
+# mk* scripts' own defaults. 128k clusters let qemu's default 1 MiB L2 cache map
+# a 16 GiB overlay without misses.
+STORAGE_PROFILES = {
+    "legacy": {},
+    "native": {"cache": "none", "io": "native", "cluster_size": "128k"},
+    "io_uring": {"cache": "none", "io": "io_uring", "iothreads": 1, "cluster_size": "128k"},
+}
+DEFAULT_STORAGE_PROFILE = os.environ.get("VRHOST_STORAGE_PROFILE", "native")
+
+# Disk bus under a tuned profile: virtio wherever the guest has the driver (vQFX boots from IDE only)
+DISK_BUSES = {"juniper": "virtio", "cisco": "virtio", "cisco-switch": "virtio", "juniper-switch": "ide"}
+
+# NIC settings applied at define time (see nic_env); "legacy" keeps the mk* scripts' models
+NIC_PROFILES = {
+    "legacy": {},
+    "vhost": {"vhost": True, "multiqueue": True},
+    "vhost-jumbo": {"vhost": True, "multiqueue": True, "mtu": 9000},
+}
+DEFAULT_NIC_PROFILE = os.environ.get("VRHOST_NIC_PROFILE", "vhost")
+NIC_MODEL_CHOICES = ("virtio", "e1000", "e1000e", "vmxnet3")
+
+# Fastest NIC model each image has a driver for, and whether that driver uses
+# virtio multiqueue. IOSvL2 only supports e1000; for vQFX this covers the data
+# ports (em0/em1 must stay e1000).
+NIC_MODELS = {
+    "juniper": {"model": "virtio", "multiqueue": True},
+    "cisco": {"model": "virtio", "multiqueue": True},
+    "cisco-switch": {"model": "e1000", "multiqueue": False},
+    "juniper-switch": {"model": "virtio", "multiqueue": False},
+}
 
 class RouterService:
-    def __init__(self, conn: libvirt.virConnect):
+    def __init__(self, conn: libvirt.virConnect, config_drive_service=None, uri: str = None,
+                 reclaimer=None, telemetry=None):
         self.conn = conn
+        self.config_drive_service = config_drive_service
+        self.uri = uri
+        self.reclaimer = reclaimer
+        self.telemetry = telemetry
+        # Domain UUID -> (name, every file its disks sit on), for _backing_dependents
+        self._chains: Dict[str, Tuple[str, Set[str]]] = {}
+        self._chains_lock = threading.Lock()
+
+    def _record(self, name: str, event: str, router_type: Optional[str] = None):
+        """Timestamp a lifecycle transition (no-op without telemetry)"""
+        if self.telemetry:
+            self.telemetry.record(name, event, router_type and self.normalize_router_type(router_type))
+
+    def _script_env(self) -> Dict:
+        """Environment for the mk* scripts, pointing virsh/virt-install at this service's hypervisor"""
+        env = os.environ.copy()
+        env["VRHOST_IMAGES_PATH"] = IMAGES_PATH
+        if self.uri:
+            env["LIBVIRT_DEFAULT_URI"] = self.uri
+        return env
 
     def _is_vqfx_component(self, name: str) -> bool:
         """Check if this is a vQFX component VM (RE or PFE)"""
@@ -62,6 +156,35 @@ class RouterService:
         except Exception:
             return 'juniper'
 
+    def _summarize_vqfx(self, base_name: str) -> Optional[Dict]:
+        """Combined RE + PFE entry for a vQFX switch"""
+        state_name, re_domain, pfe_domain = self._get_vqfx_status(base_name)
+        if not (re_domain and pfe_domain):
+            return None
+
+        re_info = re_domain.info()
+        pfe_info = pfe_domain.info()
+        return {
+            "name": base_name,
+            "state": state_name,
+            "memory_mb": int((re_info[1] + pfe_info[1]) / 1024),  # Combined memory
+            "vcpus": re_info[3] + pfe_info[3],  # Combined vCPUs
+            "id": re_domain.ID() if re_domain.ID() != -1 else None,
+            "router_type": "juniper-switch"
+        }
+
+    def _summarize_domain(self, domain) -> Dict:
+        """List entry for a regular router or Cisco switch"""
+        info = domain.info()
+        return {
+            "name": domain.name(),
+            "state": self._get_state_name(info[0]),
+            "memory_mb": int(info[1] / 1024),
+            "vcpus": info[3],
+            "id": domain.ID() if domain.ID() != -1 else None,
+            "router_type": self.get_router_type(domain)
+        }
+
     def list_routers(self) -> List[Dict]:
         """List all routers/VMs with router type"""
         routers = []
@@ -80,41 +203,127 @@ class RouterService:
                     continue
                 
                 processed_vqfx.add(base_name)
-                
-                # Get combined status
-                state_name, re_domain, pfe_domain = self._get_vqfx_status(base_name)
-                
-                if re_domain and pfe_domain:
-                    re_info = re_domain.info()
-                    pfe_info = pfe_domain.info()
-                    
-                    routers.append({
-                        "name": base_name,
-                        "state": state_name,
-                        "memory_mb": int((re_info[1] + pfe_info[1]) / 1024),  # Combined memory
-                        "vcpus": re_info[3] + pfe_info[3],  # Combined vCPUs
-                        "id": re_domain.ID() if re_domain.ID() != -1 else None,
-                        "router_type": "juniper-switch"
-                    })
+                summary = self._summarize_vqfx(base_name)
+                if summary:
+                    routers.append(summary)
             else:
-                # Regular router or Cisco switch
-                info = domain.info()
-                router_type = self.get_router_type(domain)
-
-                routers.append({
-                    "name": name,
-                    "state": self._get_state_name(info[0]),
-                    "memory_mb": int(info[1] / 1024),
-                    "vcpus": info[3],
-                    "id": domain.ID() if domain.ID() != -1 else None,
-                    "router_type": router_type
-                })
+                routers.append(self._summarize_domain(domain))
 
         return routers
 
+    def get_router_summary(self, name: str) -> Optional[Dict]:
+        """List entry for a single router, looked up by name (None if it does not exist)"""
+        try:
+            return self._summarize_domain(self.conn.lookupByName(name))
+        except libvirt.libvirtError:
+            return self._summarize_vqfx(name)
+
+    @staticmethod
+    def overlay_paths(name: str, router_type: str) -> Dict[str, str]:
+        """Overlay disk path -> base image for a new device"""
+        images = BASE_IMAGES.get(RouterService.normalize_router_type(router_type), {})
+        return {f"{IMAGES_PATH}/{name}{suffix}.qcow2": base for suffix, base in images.items()}
+
+    @staticmethod
+    def storage_env(router_type: str, profile: Optional[str] = None) -> Dict[str, str]:
+        """mk* script environment (DISK_BUS, DISK_OPTS, QCOW2_OPTS, VIRT_INSTALL_EXTRA) for a storage profile"""
+        profile = profile or DEFAULT_STORAGE_PROFILE
+        if profile not in STORAGE_PROFILES:
+            raise ValueError(f"Unknown storage profile: {profile}")
+        settings = STORAGE_PROFILES[profile]
+        if not settings:
+            return {}
+
+        bus = DISK_BUSES.get(RouterService.normalize_router_type(router_type), "virtio")
+        env = {"DISK_BUS": bus}
+        disk_opts = [f"{key}={settings[key]}" for key in ("cache", "io") if settings.get(key)]
+        if settings.get("iothreads") and bus == "virtio":
+            disk_opts.append("driver.iothread=1")
+            env["VIRT_INSTALL_EXTRA"] = f"--iothreads {settings['iothreads']}"
+        if disk_opts:
+            env["DISK_OPTS"] = ",".join(disk_opts)
+        if settings.get("cluster_size"):
+            env["QCOW2_OPTS"] = f"cluster_size={settings['cluster_size']}"
+        return env
+
+    @classmethod
+    def nic_env(cls, router_type: str, vcpus: int = 2, profile: Optional[str] = None,
+                model: Optional[str] = None) -> Dict[str, str]:
+        """mk* script environment (NIC_MODEL, NIC_OPTS) for a NIC profile, optionally forcing the model"""
+        profile = profile or DEFAULT_NIC_PROFILE
+        if profile not in NIC_PROFILES:
+            raise ValueError(f"Unknown NIC profile: {profile}")
+        if model and model not in NIC_MODEL_CHOICES:
+            raise ValueError(f"Unknown NIC model: {model}")
+        settings = NIC_PROFILES[profile]
+        if not settings and not model:
+            return {}
+
+        device = NIC_MODELS.get(cls.normalize_router_type(router_type), {"model": "virtio", "multiqueue": False})
+        env = {"NIC_MODEL": model or device["model"]}
+        opts = []
+        if env["NIC_MODEL"] == "virtio":
+            if settings.get("vhost"):
+                opts.append("driver.name=vhost")
+            # One queue pair per vCPU so receive work spreads over all of them
+            queues = cls.footprint(router_type, vcpus=vcpus)["vcpus"]
+            if settings.get("multiqueue") and device["multiqueue"] and queues > 1:
+                opts.append(f"driver.queues={queues}")
+        if settings.get("mtu"):
+            opts.append(f"mtu.size={settings['mtu']}")
+        if opts:
+            env["NIC_OPTS"] = ",".join(opts)
+        return env
+
+    @staticmethod
+    def preload_base_images(router_types: Optional[List[str]] = None) -> Dict:
+        """Ask the kernel to read base images into the page cache ahead of a boot storm"""
+        types = {RouterService.normalize_router_type(t) for t in router_types} if router_types else BASE_IMAGES
+        preloaded, total = [], 0
+        for router_type in types:
+            for base in BASE_IMAGES.get(router_type, {}).values():
+                try:
+                    fd = os.open(base, os.O_RDONLY)
+                except OSError:
+                    continue
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                    total += os.fstat(fd).st_size
+                    preloaded.append(base)
+                finally:
+                    os.close(fd)
+        return {"success": True, "images": preloaded, "bytes": total}
+
+    def prepare_disks(self, name: str, router_type: str, storage_profile: Optional[str] = None) -> Dict:
+        """Create a device's qcow2 overlays ahead of its mk* script (run with DISK_PREPARED=1)"""
+        busy = self._pending_reclaim(name)
+        if busy:
+            return {"success": False, "message": self._reclaim_busy_message(name, busy)}
+        created = []
+        qcow2_opts = self.storage_env(router_type, storage_profile).get("QCOW2_OPTS")
+        self._record(name, "create_requested", router_type)
+        try:
+            for path, base in self.overlay_paths(name, router_type).items():
+                instrumentation.run(
+                    ["qemu-img", "create", "-q", "-f", "qcow2", "-F", "qcow2", "-b", base]
+                    + (["-o", qcow2_opts] if qcow2_opts else []) + [path],
+                    capture_output=True, text=True, timeout=30, check=True
+                )
+                created.append(path)
+            self._record(name, "disk_created")
+            return {"success": True, "disks": created}
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            for path in created:
+                os.remove(path)
+            self._record(name, "create_failed")
+            return {"success": False, "message": f"Failed to create overlay: {getattr(e, 'stderr', e)}"}
+
     def create_router(self, name: str, ip: str = None, router_type: str = "juniper",
-                     ram: int = 4, vcpus: int = 2) -> Dict:
+                     ram: int = 4, vcpus: int = 2, disk_prepared: bool = False,
+                     wait: bool = True, storage_profile: Optional[str] = None,
+                     nic_profile: Optional[str] = None, nic_model: Optional[str] = None) -> Dict:
         """Create router or switch - supports multiple vendors and device types"""
+        prepared_here = False
         try:
             if router_type.lower() in ["juniper", "vsrx"]:
                 # Juniper vSRX - use mkjuniper script
@@ -133,84 +342,257 @@ class RouterService:
                     "success": False,
                     "message": f"Unsupported router type: {router_type}. Use 'juniper', 'cisco', 'cisco-switch', or 'juniper-switch'"
                 }
-
-            result = subprocess.run(
+            busy = self._pending_reclaim(name)
+            if busy:
+                return {"success": False, "message": self._reclaim_busy_message(name, busy)}
+
+            # Create the overlays here as well, so the disk step is timed on its own;
+            # an existing device or leftover disk is left for the script to judge
+            if not disk_prepared:
+                overlays = self.overlay_paths(name, router_type)
+                if not self.router_exists(name) and not any(os.path.exists(path) for path in overlays):
+                    prepared = self.prepare_disks(name, router_type, storage_profile)
+                    if not prepared["success"]:
+                        return prepared
+                    disk_prepared = prepared_here = True
+                else:
+                    self._record(name, "create_requested", router_type)
+            if self.telemetry and ip:
+                self.telemetry.watch(name, ip)
+
+            # Day-0 config drive, attached by the mk* script at define time
+            env = self._script_env()
+            env.update(self.storage_env(router_type, storage_profile))
+            env.update(self.nic_env(router_type, vcpus, nic_profile, nic_model))
+            config_drive = day0_password = None
+            if self.config_drive_service and ip:
+                try:
+                    built = self.config_drive_service.build_config_drive(name, ip, router_type)
+                    if built:
+                        config_drive, day0_password = built["path"], built["password"]
+                except Exception as e:
+                    print(f"⚠ Could not build config drive for {name}: {e}")
+            if config_drive:
+                env["CONFIG_DRIVE"] = config_drive
+            if disk_prepared:
+                env["DISK_PREPARED"] = "1"
+            if not wait:
+                env["NO_WAIT"] = "1"
+
+            result = instrumentation.run(
                 cmd,
                 capture_output=True,
                 text=True,
                 timeout=120,
-                check=True
+                check=True,
+                env=env
             )
 
             return {
                 "success": True,
                 "message": f"{router_type.capitalize()} device {name} created successfully",
                 "output": result.stdout,
-                "router_type": router_type
+                "router_type": router_type,
+                "config_drive": config_drive,
+                "day0_password": day0_password
             }
         except subprocess.CalledProcessError as e:
+            self._discard_failed_create(name, router_type, prepared_here)
             return {
                 "success": False,
                 "message": f"Failed to create device: {e.stderr}",
                 "error": e.stderr
             }
         except subprocess.TimeoutExpired:
+            self._discard_failed_create(name, router_type, prepared_here)
             return {
                 "success": False,
                 "message": "Device creation timed out after 120 seconds"
             }
         except Exception as e:
+            self._discard_failed_create(name, router_type, prepared_here)
             return {
                 "success": False,
                 "message": f"Error creating device: {str(e)}"
             }
 
-    def delete_router(self, name: str) -> Dict:
-        """Delete router or switch (works for all device types)"""
-        try:
-            # Check if this is a vQFX switch (look for -re component)
-            try:
-                re_domain = self.conn.lookupByName(f"{name}-re")
-                # This is a vQFX, use mkvqfx-delete script
-                cmd = ["mkvqfx-delete", name]
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-                
-                if result.returncode == 0:
-                    return {
-                        "success": True,
-                        "message": f"vQFX switch {name} deleted successfully"
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "message": f"Failed to delete vQFX: {result.stderr}"
-                    }
-            except libvirt.libvirtError:
-                # Not a vQFX, handle as regular device
-                pass
+    def _discard_failed_create(self, name: str, router_type: str, remove_disks: bool):
+        """Record a failed create and drop the overlays made for it, unless a domain took them"""
+        self._record(name, "create_failed")
+        if remove_disks and not self.router_exists(name):
+            for path in self.overlay_paths(name, router_type):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _leftovers(self, domain) -> List[str]:
+        """Files a domain leaves behind: its writable disks plus external snapshot
+        overlays and memory files (never the shared base images)"""
+        files = {f"{IMAGES_PATH}/{domain.name()}.qcow2"}
+        root = ET.fromstring(domain.XMLDesc(libvirt.VIR_DOMAIN_XML_INACTIVE))
+        for disk in root.findall("./devices/disk[@device='disk']/source"):
+            files.add(disk.get("file"))
+        for snapshot in domain.listAllSnapshots():
+            snapshot_root = ET.fromstring(snapshot.getXMLDesc())
+            for source in snapshot_root.findall("./disks/disk/source"):
+                files.add(source.get("file"))
+            memory = snapshot_root.find("memory")
+            if memory is not None:
+                files.add(memory.get("file"))
+
+        base_images = {base for images in BASE_IMAGES.values() for base in images.values()}
+        return sorted(f for f in files if f and f.startswith(f"{IMAGES_PATH}/") and f not in base_images)
 
-            # Regular router or Cisco switch deletion
+    @staticmethod
+    def backing_chain(path: str) -> List[str]:
+        """Backing files under a qcow2 image, nearest first (read from the qcow2 headers)"""
+        chain = []
+        while len(chain) < 64:
             try:
-                domain = self.conn.lookupByName(name)
-                
-                # Stop the VM if running
-                if domain.isActive():
-                    domain.destroy()
+                with open(path, "rb") as f:
+                    header = f.read(20)
+                    if len(header) < 20 or header[:4] != b"QFI\xfb":
+                        break
+                    offset, size = struct.unpack(">QI", header[8:20])
+                    if not offset or not size:
+                        break
+                    f.seek(offset)
+                    backing = f.read(size).decode(errors="replace")
+            except OSError:
+                break
+            path = os.path.normpath(os.path.join(os.path.dirname(path), backing))
+            if path in chain:
+                break
+            chain.append(path)
+        return chain
+
+    def _disk_chains(self, domain) -> Set[str]:
+        """Every backing file under a domain's disks"""
+        chained = set()
+        root = ET.fromstring(domain.XMLDesc(0))
+        for source in root.findall("./devices/disk[@device='disk']/source"):
+            if source.get("file"):
+                chained.update(self.backing_chain(source.get("file")))
+        return chained
+
+    def _backing_dependents(self, files: List[str], excluded: List[str]) -> Dict[str, List[str]]:
+        """Other domains whose disks sit on top of any of these files -> the files they need
+
+        Chains are read once per domain (by UUID, so a re-created name is read
+        again) and kept; a delete only parses domains defined since the last
+        one. A remembered chain can only be too long (snapshots merged since),
+        so the domains it points at are re-read before they block a delete.
+        """
+        files = set(files)
+        with self._chains_lock:
+            known = {}
+            for domain in self.conn.listAllDomains():
+                key = domain.UUIDString()
+                known[key] = self._chains.get(key) or (domain.name(), self._disk_chains(domain))
+            self._chains = known  # Undefined domains drop out
+
+            dependents = {}
+            for key, (name, chained) in known.items():
+                if name in excluded or not files & chained:
+                    continue
+                try:
+                    chained = self._disk_chains(self.conn.lookupByUUIDString(key))
+                except libvirt.libvirtError:
+                    continue
+                known[key] = (name, chained)
+                if files & chained:
+                    dependents[name] = sorted(files & chained)
+        return dependents
 
-                # Undefine (delete) the VM
-                domain.undefine()
+    @staticmethod
+    def _move_to_reclaim(path: str) -> Optional[str]:
+        """Rename a file into the reclaim directory under a unique name; None if it is gone"""
+        os.makedirs(RECLAIM_PATH, exist_ok=True)
+        trash = f"{RECLAIM_PATH}/{uuid.uuid4().hex[:12]}-{os.path.basename(path)}"
+        try:
+            os.rename(path, trash)
+        except FileNotFoundError:
+            return None
+        return trash
+
+    def _pending_reclaim(self, name: str) -> List[str]:
+        """Files of a deleted router of this name still queued for reclaim at their
+        original paths (jobs queued before files were moved aside on delete)"""
+        if not self.reclaimer:
+            return []
+        return [path for path in self.reclaimer.pending_files(name)
+                if not path.startswith(f"{RECLAIM_PATH}/")]
 
-            except libvirt.libvirtError:
-                pass  # VM doesn't exist in libvirt
+    @staticmethod
+    def _reclaim_busy_message(name: str, paths: List[str]) -> str:
+        return (f"A deleted device named {name} still has disks waiting to be reclaimed "
+                f"({', '.join(paths)}); try again once they are freed")
 
-            # Remove disk image
-            disk_path = f"/var/lib/libvirt/images/{name}.qcow2"
-            if os.path.exists(disk_path):
-                os.remove(disk_path)
+    def delete_router(self, name: str) -> Dict:
+        """Delete router or switch (works for all device types)
+
+        The domains are destroyed and undefined right away; their files are moved
+        into RECLAIM_PATH and, with a vQFX's internal network, handed to the
+        reclaimer, which frees them in the background (or are removed here when
+        there is no reclaimer). A router whose disks are the backing files of
+        other domains (linked clones) is not deleted.
+        """
+        try:
+            # Look each part up on its own so a half-created vQFX is cleaned up too
+            domains = {}
+            for domain_name in (name, f"{name}-re", f"{name}-pfe"):
+                try:
+                    domains[domain_name] = self.conn.lookupByName(domain_name)
+                except libvirt.libvirtError:
+                    pass
+
+            files = {f"{IMAGES_PATH}/{name}.qcow2"}
+            for domain in domains.values():
+                files.update(self._leftovers(domain))
+            dependents = self._backing_dependents(sorted(files), list(domains))
+            if dependents:
+                return {
+                    "success": False,
+                    "message": f"Cannot delete {name}: its disks are the backing files of "
+                               f"{', '.join(sorted(dependents))}; delete those first",
+                    "dependents": dependents
+                }
+
+            for domain in domains.values():
+                if domain.isActive():
+                    domain.destroy()
+                # Managed-save images and snapshot metadata would otherwise block the undefine
+                domain.undefineFlags(libvirt.VIR_DOMAIN_UNDEFINE_MANAGED_SAVE |
+                                     libvirt.VIR_DOMAIN_UNDEFINE_SNAPSHOTS_METADATA)
+            if self.config_drive_service:
+                self.config_drive_service.remove(name)
+
+            jobs = []
+            for path in sorted(files):
+                try:
+                    moved = self._move_to_reclaim(path)
+                except OSError as e:
+                    print(f"⚠ Could not move {path} aside for reclaim, leaving it: {e}")
+                    continue
+                if moved:
+                    jobs.append({"kind": "file", "target": moved, "uri": self.uri})
+            if f"{name}-re" in domains or f"{name}-pfe" in domains:
+                jobs.append({"kind": "network", "target": f"{name}-internal", "uri": self.uri})
+            pending_bytes = sum(os.stat(job["target"]).st_blocks * 512 for job in jobs if job["kind"] == "file")
+
+            if self.reclaimer:
+                self.reclaimer.enqueue(name, jobs)
+            else:
+                for job in jobs:
+                    if job["kind"] == "network":
+                        remove_network(job["target"], job["uri"])
+                    else:
+                        reclaim_file(job["target"])
 
             return {
                 "success": True,
-                "message": f"Device {name} deleted successfully"
+                "message": f"Device {name} deleted successfully",
+                "reclaim_jobs": len(jobs) if self.reclaimer else 0,
+                "pending_bytes": pending_bytes if self.reclaimer else 0
             }
         except Exception as e:
             return {
@@ -396,6 +778,100 @@ class RouterService:
         except libvirt.libvirtError as e:
             return {"error": str(e)}
 
+    @staticmethod
+    def normalize_router_type(router_type: str) -> str:
+        """Map any accepted router type alias to its canonical name"""
+        return ROUTER_TYPE_ALIASES.get(router_type.lower(), router_type.lower())
+
+    @classmethod
+    def footprint(cls, router_type: str, ram_gb: int = 4, vcpus: int = 2) -> Dict:
+        """Memory and vCPUs a new device of this type will take"""
+        fixed = DEVICE_FOOTPRINTS.get(cls.normalize_router_type(router_type))
+        if fixed:
+            return dict(fixed)
+        return {"memory_mb": ram_gb * 1024, "vcpus": vcpus}
+
+    def resize_router(self, name: str, ram_gb: int, vcpus: int) -> Dict:
+        """Change the persistent memory/vCPU allocation (applies on next cold start)"""
+        try:
+            domain = self.conn.lookupByName(name)
+            memory_kib = ram_gb * 1024 * 1024
+            config = libvirt.VIR_DOMAIN_AFFECT_CONFIG
+
+            domain.setMemoryFlags(memory_kib, config | libvirt.VIR_DOMAIN_MEM_MAXIMUM)
+            domain.setMemoryFlags(memory_kib, config)
+
+            # Maximum must never drop below current, so order depends on direction
+            current_vcpus = domain.vcpusFlags(config)
+            if vcpus > current_vcpus:
+                domain.setVcpusFlags(vcpus, config | libvirt.VIR_DOMAIN_VCPU_MAXIMUM)
+                domain.setVcpusFlags(vcpus, config)
+            elif vcpus < current_vcpus:
+                domain.setVcpusFlags(vcpus, config)
+                domain.setVcpusFlags(vcpus, config | libvirt.VIR_DOMAIN_VCPU_MAXIMUM)
+
+            return {"success": True, "message": f"Device {name} resized to {ram_gb}GB / {vcpus} vCPUs"}
+        except libvirt.libvirtError as e:
+            return {"success": False, "message": str(e)}
+
+    def power_cycle_router(self, name: str, timeout: int = 120) -> Dict:
+        """Shut a device down and start it again so persistent config changes take effect"""
+        result = self.stop_router(name)
+        if not result["success"] and "already stopped" not in result["message"]:
+            return result
+
+        deadline = time.monotonic() + timeout
+        while self.get_router_details(name).get("state") not in ("shutoff", "unknown"):
+            if time.monotonic() >= deadline:
+                self.stop_router(name, force=True)
+                break
+            time.sleep(2)
+
+        return self.start_router(name)
+
+    def get_domains(self, name: str) -> List:
+        """Return the libvirt domains backing a device (RE + PFE for vQFX)"""
+        try:
+            return [self.conn.lookupByName(f"{name}-re"), self.conn.lookupByName(f"{name}-pfe")]
+        except libvirt.libvirtError:
+            return [self.conn.lookupByName(name)]
+
+    def router_exists(self, name: str) -> bool:
+        """Check whether a router (or vQFX RE/PFE pair) is defined"""
+        for domain_name in (name, f"{name}-re"):
+            try:
+                self.conn.lookupByName(domain_name)
+                return True
+            except libvirt.libvirtError:
+                continue
+        return False
+
+    def wait_for_ready(self, name: str, ip: str = None, timeout: int = 600,
+                       interval: int = 5) -> Dict:
+        """Wait until a device is running and, if it has a management IP, accepts SSH"""
+        address = ip.split('/')[0] if ip else None
+        deadline = time.monotonic() + timeout
+        started_at = time.monotonic()
+
+        while time.monotonic() < deadline:
+            details = self.get_router_details(name)
+            if details.get("state") == "running":
+                if not address:
+                    return {"success": True, "message": f"Device {name} is running"}
+                try:
+                    with socket.create_connection((address, 22), timeout=2):
+                        self._record(name, "console_ready")
+                        return {
+                            "success": True,
+                            "message": f"Device {name} is reachable on {address}",
+                            "seconds": round(time.monotonic() - started_at, 1)
+                        }
+                except OSError:
+                    pass
+            time.sleep(interval)
+
+        return {"success": False, "message": f"Device {name} not ready after {timeout} seconds"}
+
     def start_all_routers(self) -> Dict:
         """Start all stopped devices"""
         domains = self.conn.listAllDomains()
@@ -0,0 +1,230 @@
+import os
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+import libvirt
+
+from backend.services.task_graph import parallel_map
+
+# Oldest libvirt that can revert to / delete external snapshots (getLibVersion() encoding)
+MIN_EXTERNAL_REVERT_VERSION = 9009000
+MIN_EXTERNAL_DELETE_VERSION = 9007000
+
+
+class SnapshotService:
+    """Coordinated external disk + memory snapshots of every router in a lab.
+
+    Reverting to and deleting external snapshots need libvirt 9.9 and 9.7 on
+    the node; older versions get a clear refusal instead of a libvirt error.
+    """
+
+    def __init__(self, router_service, lab_service,
+                 images_path: str = "/var/lib/libvirt/images", max_parallel: int = 8):
+        self.router_service = router_service
+        self.lab_service = lab_service
+        self.images_path = images_path
+        self.max_parallel = max_parallel
+
+    def _get_lab_domains(self, lab_name: str) -> List:
+        """All libvirt domains of a lab (both halves of each vQFX)"""
+        domains = []
+        for router in self.lab_service.get_lab_routers(lab_name, self.router_service):
+            domains.extend(self.router_service.get_domains(router['name']))
+        return domains
+
+    @staticmethod
+    def _too_old(domain, minimum: int, action: str) -> Optional[str]:
+        """Why the node's libvirt can't do this to external snapshots (None when it can)"""
+        try:
+            version = domain.connect().getLibVersion()
+        except libvirt.libvirtError:
+            return None  # Let the operation itself report the problem
+        if version >= minimum:
+            return None
+
+        def dotted(v):
+            return f"{v // 1000000}.{v // 1000 % 1000}.{v % 1000}"
+        return (f"Cannot {action} external snapshots with libvirt {dotted(version)}; "
+                f"libvirt {dotted(minimum)} or newer is required")
+
+    @staticmethod
+    def get_disks(domain) -> List[Dict]:
+        """Writable and read-only disks of a domain, from its persistent XML"""
+        root = ET.fromstring(domain.XMLDesc(libvirt.VIR_DOMAIN_XML_INACTIVE))
+        disks = []
+        for disk in root.findall("./devices/disk"):
+            target = disk.find("target")
+            source = disk.find("source")
+            if target is None:
+                continue
+            disks.append({
+                "target": target.get("dev"),
+                "device": disk.get("device", "disk"),
+                "source": source.get("file") if source is not None else None,
+                "readonly": disk.find("readonly") is not None or disk.get("device") == "cdrom"
+            })
+        return disks
+
+    def _snapshot_xml(self, domain, snapshot_name: str, description: str, with_memory: bool) -> str:
+        """External snapshot definition: a new qcow2 overlay per disk, plus memory state"""
+        domain_name = domain.name()
+        disks = []
+        for disk in self.get_disks(domain):
+            if disk["readonly"] or disk["device"] != "disk":
+                disks.append(f"<disk name='{disk['target']}' snapshot='no'/>")
+            else:
+                overlay = os.path.join(self.images_path, f"{domain_name}-{snapshot_name}.qcow2")
+                disks.append(
+                    f"<disk name='{disk['target']}' snapshot='external'>"
+                    f"<driver type='qcow2'/><source file='{escape(overlay)}'/></disk>"
+                )
+
+        memory = "<memory snapshot='no'/>"
+        if with_memory:
+            memory_file = os.path.join(self.images_path, f"{domain_name}-{snapshot_name}.mem")
+            memory = f"<memory snapshot='external' file='{escape(memory_file)}'/>"
+
+        return (
+            "<domainsnapshot>"
+            f"<name>{escape(snapshot_name)}</name>"
+            f"<description>{escape(description)}</description>"
+            f"{memory}<disks>{''.join(disks)}</disks>"
+            "</domainsnapshot>"
+        )
+
+    def snapshot_domain(self, domain, snapshot_name: str, description: str = "",
+                        include_memory: bool = True, extra_flags: int = 0) -> Dict:
+        """Take an external snapshot of one domain (memory only if it is live)"""
+        try:
+            live = domain.isActive()
+            with_memory = include_memory and live
+            flags = libvirt.VIR_DOMAIN_SNAPSHOT_CREATE_ATOMIC | extra_flags
+            if not with_memory:
+                flags |= libvirt.VIR_DOMAIN_SNAPSHOT_CREATE_DISK_ONLY
+            domain.snapshotCreateXML(
+                self._snapshot_xml(domain, snapshot_name, description, with_memory), flags
+            )
+            return {"success": True, "domain": domain.name(), "memory": with_memory}
+        except libvirt.libvirtError as e:
+            return {"success": False, "domain": domain.name(), "message": str(e)}
+
+    def create_lab_snapshot(self, lab_name: str, snapshot_name: Optional[str] = None,
+                            description: str = "", include_memory: bool = True) -> Dict:
+        """Snapshot every router in a lab at the same instant"""
+        domains = self._get_lab_domains(lab_name)
+        if not domains:
+            return {"success": False, "message": f"Lab '{lab_name}' has no routers"}
+
+        snapshot_name = snapshot_name or datetime.now().strftime("snap-%Y%m%d-%H%M%S")
+        if not re.match(r'^[A-Za-z0-9_.-]+$', snapshot_name):
+            return {"success": False, "message": f"Invalid snapshot name: {snapshot_name}"}
+
+        # Pause everything first so the lab is captured at one consistent point in time
+        running = [d for d in domains if d.state()[0] == libvirt.VIR_DOMAIN_RUNNING]
+        parallel_map(lambda d: d.suspend(), running, self.max_parallel)
+        try:
+            results = parallel_map(
+                lambda d: self.snapshot_domain(d, snapshot_name, description, include_memory),
+                domains, self.max_parallel
+            )
+        finally:
+            parallel_map(lambda d: d.resume(), running, self.max_parallel)
+
+        failed = [r for r in results if not r["success"]]
+        return {
+            "success": not failed,
+            "message": f"Snapshot '{snapshot_name}' of lab '{lab_name}' "
+                       + ("created" if not failed else f"failed for {len(failed)} domain(s)"),
+            "snapshot": snapshot_name,
+            "domains": results
+        }
+
+    def list_lab_snapshots(self, lab_name: str) -> List[Dict]:
+        """Snapshots of a lab, grouped by name across its domains"""
+        domains = self._get_lab_domains(lab_name)
+        snapshots: Dict[str, Dict] = {}
+
+        for domain in domains:
+            for snapshot in domain.listAllSnapshots():
+                root = ET.fromstring(snapshot.getXMLDesc())
+                name = snapshot.getName()
+                entry = snapshots.setdefault(name, {
+                    "name": name,
+                    "description": root.findtext("description", ""),
+                    "created_at": datetime.fromtimestamp(
+                        int(root.findtext("creationTime", "0"))
+                    ).isoformat(),
+                    "parent": root.findtext("./parent/name"),
+                    "has_memory": root.find("memory") is not None
+                                  and root.find("memory").get("snapshot") == "external",
+                    "domains": []
+                })
+                entry["domains"].append(domain.name())
+
+        for entry in snapshots.values():
+            entry["complete"] = len(entry["domains"]) == len(domains)
+
+        return sorted(snapshots.values(), key=lambda s: s["created_at"])
+
+    def restore_lab_snapshot(self, lab_name: str, snapshot_name: str) -> Dict:
+        """Revert every router in a lab to a snapshot, in parallel"""
+        domains = self._get_lab_domains(lab_name)
+        if not domains:
+            return {"success": False, "message": f"Lab '{lab_name}' has no routers"}
+        unsupported = self._too_old(domains[0], MIN_EXTERNAL_REVERT_VERSION, "revert to")
+        if unsupported:
+            return {"success": False, "message": unsupported, "unsupported": True}
+
+        def revert(domain):
+            try:
+                snapshot = domain.snapshotLookupByName(snapshot_name)
+                root = ET.fromstring(snapshot.getXMLDesc())
+                flags = 0
+                if root.findtext("state") in ("running", "paused"):
+                    flags = libvirt.VIR_DOMAIN_SNAPSHOT_REVERT_RUNNING
+                domain.revertToSnapshot(snapshot, flags)
+                return {"success": True, "domain": domain.name()}
+            except libvirt.libvirtError as e:
+                return {"success": False, "domain": domain.name(), "message": str(e)}
+
+        results = parallel_map(revert, domains, self.max_parallel)
+        failed = [r for r in results if not r["success"]]
+        return {
+            "success": not failed,
+            "message": f"Lab '{lab_name}' restored to '{snapshot_name}'" if not failed
+                       else f"Restore failed for {len(failed)} domain(s)",
+            "domains": results
+        }
+
+    def delete_lab_snapshot(self, lab_name: str, snapshot_name: str) -> Dict:
+        """Delete a snapshot from every router in a lab (libvirt merges the overlays)"""
+        domains = self._get_lab_domains(lab_name)
+        if not domains:
+            return {"success": False, "message": f"Lab '{lab_name}' has no routers"}
+        unsupported = self._too_old(domains[0], MIN_EXTERNAL_DELETE_VERSION, "delete")
+        if unsupported:
+            return {"success": False, "message": unsupported, "unsupported": True}
+
+        def delete(domain):
+            try:
+                snapshot = domain.snapshotLookupByName(snapshot_name)
+                snapshot.delete(0)
+            except libvirt.libvirtError as e:
+                return {"success": False, "domain": domain.name(), "message": str(e)}
+
+            memory_file = os.path.join(self.images_path, f"{domain.name()}-{snapshot_name}.mem")
+            if os.path.exists(memory_file):
+                os.remove(memory_file)
+            return {"success": True, "domain": domain.name()}
+
+        results = parallel_map(delete, domains, self.max_parallel)
+        failed = [r for r in results if not r["success"]]
+        return {
+            "success": not failed,
+            "message": f"Snapshot '{snapshot_name}' deleted" if not failed
+                       else f"Delete failed for {len(failed)} domain(s)",
+            "domains": results
+        }
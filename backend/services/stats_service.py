@@ -1,6 +1,8 @@
 import libvirt
 import os
-from typing import Dict
+from typing import Dict, Optional
+
+from backend.services.router_service import IMAGES_PATH
 
 class StatsService:
     def __init__(self, conn: libvirt.virConnect):
@@ -41,6 +43,71 @@ class StatsService:
             "disk": disk_usage
         }
     
+    def get_host_memory(self) -> Dict:
+        """Host RAM from the kernel's view (page cache counts as reclaimable)"""
+        stats = self.conn.getMemoryStats(libvirt.VIR_NODE_MEMORY_STATS_ALL_CELLS)
+        total_mb = int(stats["total"] / 1024)
+        available_mb = int((stats["free"] + stats.get("buffers", 0) + stats.get("cached", 0)) / 1024)
+        return {
+            "total_mb": total_mb,
+            "available_mb": available_mb,
+            "used_mb": total_mb - available_mb,
+            "used_percent": round((total_mb - available_mb) / total_mb * 100, 2) if total_mb else 0
+        }
+
+    def get_memory_savings(self) -> Dict:
+        """Host memory saved by page sharing (KSM) and by ballooned-down idle routers"""
+        ksm = {"enabled": False, "pages_shared": 0, "pages_sharing": 0, "saved_mb": 0}
+        try:
+            params = self.conn.getMemoryParameters(0)
+            ksm = {
+                "enabled": bool(params.get("shm_run")),
+                "pages_shared": params.get("shm_pages_shared", 0),
+                "pages_sharing": params.get("shm_pages_sharing", 0),
+                # Each sharing page is a 4 KiB page that no longer needs its own copy
+                "saved_mb": int(params.get("shm_pages_sharing", 0) * 4 / 1024)
+            }
+        except libvirt.libvirtError:
+            pass  # Hypervisor without KSM support
+
+        ballooned = []
+        for domain, stats in self.conn.getAllDomainStats(
+                libvirt.VIR_DOMAIN_STATS_BALLOON, libvirt.VIR_CONNECT_GET_ALL_DOMAINS_STATS_ACTIVE):
+            maximum, current = stats.get("balloon.maximum", 0), stats.get("balloon.current", 0)
+            if current and current < maximum:
+                ballooned.append({"name": domain.name(), "reclaimed_mb": int((maximum - current) / 1024)})
+        reclaimed_mb = sum(entry["reclaimed_mb"] for entry in ballooned)
+
+        return {
+            "ksm": ksm,
+            "balloon": {"domains": ballooned, "reclaimed_mb": reclaimed_mb},
+            "saved_mb": ksm["saved_mb"] + reclaimed_mb
+        }
+
+    def get_dashboard_stats(self, domains: Optional[Dict[str, Dict]] = None) -> Dict:
+        """Simplified system statistics for the dashboard
+
+        domains: an InventoryCache snapshot to count instead of querying every domain
+        """
+        if domains is None:
+            system_stats = self.get_system_stats()
+        else:
+            running = sum(1 for domain in domains.values() if domain["active"])
+            system_stats = {"vms": {"running": running, "total": len(domains)},
+                            "disk": self._get_disk_usage()}
+
+        # Host RAM actually in use, not the sum of guest allocations
+        memory_percent = self.get_host_memory()['used_percent']
+
+        cpu_percent = system_stats.get('disk', {}).get('used_percent', 0)
+
+        return {
+            "running_routers": system_stats.get('vms', {}).get('running', 0),
+            "total_routers": system_stats.get('vms', {}).get('total', 0),
+            "cpu_percent": cpu_percent,
+            "memory_percent": memory_percent
+        }
+
     def get_router_stats(self, name: str) -> Dict:
         """Get real-time stats for a specific router"""
         try:
@@ -68,7 +135,7 @@ class StatsService:
     
     def _get_disk_usage(self) -> Dict:
         """Get disk usage for libvirt images directory"""
-        path = "/var/lib/libvirt/images"
+        path = IMAGES_PATH
         
         if not os.path.exists(path):
             return {"error": "Path not found"}
@@ -0,0 +1,118 @@
+import time
+from typing import Dict, List
+
+import libvirt
+
+from backend.services.task_graph import parallel_map
+
+
+class SuspendService:
+    """Suspend a lab to disk with libvirt managed-save, freeing its RAM, and resume it later"""
+
+    def __init__(self, router_service, lab_service, max_parallel: int = 8):
+        self.router_service = router_service
+        self.lab_service = lab_service
+        self.max_parallel = max_parallel
+
+    def _suspend_router(self, name: str) -> Dict:
+        """Managed-save every running domain of a router (vQFX: RE first, then PFE)"""
+        started_at = time.monotonic()
+        freed_kib = 0
+        saved = []
+        try:
+            for domain in self.router_service.get_domains(name):
+                if not domain.isActive():
+                    continue
+                freed_kib += domain.info()[2]
+                domain.managedSave(0)
+                saved.append(domain.name())
+        except libvirt.libvirtError as e:
+            return {"success": False, "name": name, "message": str(e), "saved": saved}
+
+        if not saved:
+            return {"success": True, "name": name, "message": f"{name} is not running",
+                    "saved": [], "memory_freed_mb": 0, "elapsed_seconds": 0}
+        return {
+            "success": True,
+            "name": name,
+            "message": f"{name} suspended",
+            "saved": saved,
+            "memory_freed_mb": int(freed_kib / 1024),
+            "elapsed_seconds": round(time.monotonic() - started_at, 2)
+        }
+
+    def _resume_router(self, name: str) -> Dict:
+        """Restore a router from its managed-save image (vQFX: PFE first, then RE)"""
+        started_at = time.monotonic()
+        restored = []
+        try:
+            for domain in reversed(self.router_service.get_domains(name)):
+                if domain.isActive() or not domain.hasManagedSaveImage(0):
+                    continue
+                # create() restores from the managed-save image instead of booting
+                domain.create()
+                restored.append(domain.name())
+        except libvirt.libvirtError as e:
+            return {"success": False, "name": name, "message": str(e), "restored": restored}
+
+        if not restored:
+            return {"success": True, "name": name, "message": f"{name} has no saved state",
+                    "restored": [], "resume_seconds": 0}
+        return {
+            "success": True,
+            "name": name,
+            "message": f"{name} resumed",
+            "restored": restored,
+            "resume_seconds": round(time.monotonic() - started_at, 2)
+        }
+
+    def _lab_router_names(self, lab_name: str) -> List[str]:
+        return [r["name"] for r in self.lab_service.get_lab_routers(lab_name, self.router_service)]
+
+    def saved_routers(self, lab_name: str) -> List[Dict]:
+        """Routers of a lab that resume_lab() would restore (summaries, for the quota check)"""
+        saved = []
+        for router in self.lab_service.get_lab_routers(lab_name, self.router_service):
+            if router["state"] == "running":
+                continue
+            try:
+                if any(not domain.isActive() and domain.hasManagedSaveImage(0)
+                       for domain in self.router_service.get_domains(router["name"])):
+                    saved.append(router)
+            except libvirt.libvirtError:
+                continue
+        return saved
+
+    def suspend_lab(self, lab_name: str) -> Dict:
+        """Save every running router of a lab to disk in parallel"""
+        if "error" in self.lab_service.get_lab(lab_name):
+            return {"success": False, "message": f"Lab '{lab_name}' not found"}
+
+        started_at = time.monotonic()
+        results = parallel_map(self._suspend_router, self._lab_router_names(lab_name), self.max_parallel)
+        failed = [r for r in results if not r["success"]]
+        freed = sum(r.get("memory_freed_mb", 0) for r in results)
+        return {
+            "success": not failed,
+            "message": f"Lab '{lab_name}' suspended, {freed} MB freed" if not failed
+                       else f"Suspend failed for {len(failed)} router(s)",
+            "memory_freed_mb": freed,
+            "elapsed_seconds": round(time.monotonic() - started_at, 2),
+            "routers": results
+        }
+
+    def resume_lab(self, lab_name: str) -> Dict:
+        """Restore every saved router of a lab in parallel"""
+        if "error" in self.lab_service.get_lab(lab_name):
+            return {"success": False, "message": f"Lab '{lab_name}' not found"}
+
+        started_at = time.monotonic()
+        results = parallel_map(self._resume_router, self._lab_router_names(lab_name), self.max_parallel)
+        failed = [r for r in results if not r["success"]]
+        return {
+            "success": not failed,
+            "message": f"Lab '{lab_name}' resumed" if not failed
+                       else f"Resume failed for {len(failed)} router(s)",
+            "elapsed_seconds": round(time.monotonic() - started_at, 2),
+            "routers": results
+        }
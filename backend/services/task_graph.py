@@ -0,0 +1,141 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+
+def parallel_map(fn: Callable, items: Iterable, max_workers: int = 8) -> List:
+    """Apply fn to every item in parallel, preserving order.
+
+    Exceptions are returned as ``{"success": False, "message": ...}`` results so one
+    failing router never aborts work on the rest of a lab.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def call(item):
+        try:
+            return fn(item)
+        except Exception as e:
+            return {"success": False, "message": str(e)}
+
+    # Each item runs in its own copy of the caller's context (request accounting)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, call, item) for item in items]
+        return [future.result() for future in futures]
+
+
+class TaskGraph:
+    """Run dependent steps in parallel, yielding a progress event per state change.
+
+    Steps are plain callables returning the usual ``{"success": bool, "message": str}``
+    dict. A step starts once all of its dependencies succeeded; if any dependency
+    failed, the step is skipped. Steps can be assigned to a named pool so that
+    heavy work (e.g. provisioning) is capped independently of cheap polling steps.
+    """
+
+    def __init__(self, max_workers: int = 16, limits: Optional[Dict[str, int]] = None):
+        self.max_workers = max_workers
+        self.steps: Dict[str, Dict] = {}
+        self._semaphores = {
+            pool: threading.BoundedSemaphore(limit) for pool, limit in (limits or {}).items()
+        }
+
+    def add(self, step_id: str, fn: Callable[[], Dict], depends_on: Optional[List[str]] = None,
+            pool: Optional[str] = None, description: str = ""):
+        """Register a step"""
+        if step_id in self.steps:
+            raise ValueError(f"Duplicate step: {step_id}")
+        self.steps[step_id] = {
+            "fn": fn,
+            "depends_on": list(depends_on or []),
+            "pool": pool,
+            "description": description or step_id,
+            "status": "pending"
+        }
+
+    def plan(self) -> List[Dict]:
+        """Describe the graph without running it"""
+        return [
+            {"step": step_id, "description": step["description"], "depends_on": step["depends_on"]}
+            for step_id, step in self.steps.items()
+        ]
+
+    def _run_step(self, step: Dict) -> Dict:
+        semaphore = self._semaphores.get(step["pool"])
+        if semaphore:
+            semaphore.acquire()
+        try:
+            result = step["fn"]()
+            if not isinstance(result, dict):
+                result = {"success": True, "result": result}
+            return result
+        except Exception as e:
+            return {"success": False, "message": str(e)}
+        finally:
+            if semaphore:
+                semaphore.release()
+
+    def run(self) -> Iterator[Dict]:
+        """Execute the graph, yielding events as steps start, finish, fail or are skipped"""
+        for step_id, step in self.steps.items():
+            missing = [dep for dep in step["depends_on"] if dep not in self.steps]
+            if missing:
+                raise ValueError(f"Step {step_id} depends on unknown steps: {missing}")
+
+        started_at = time.monotonic()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                # Resolve pending steps whose dependencies are settled
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for step_id, step in self.steps.items():
+                        if step["status"] != "pending":
+                            continue
+                        dep_states = [self.steps[dep]["status"] for dep in step["depends_on"]]
+                        if any(state in ("failed", "skipped") for state in dep_states):
+                            step["status"] = "skipped"
+                            progressed = True
+                            yield {"step": step_id, "status": "skipped",
+                                   "message": "A dependency did not complete"}
+                        elif all(state == "done" for state in dep_states):
+                            step["status"] = "running"
+                            step["started_at"] = time.monotonic()
+                            future = executor.submit(contextvars.copy_context().run, self._run_step, step)
+                            running[future] = step_id
+                            yield {"step": step_id, "status": "running",
+                                   "description": step["description"]}
+
+                if not running:
+                    break
+
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step_id = running.pop(future)
+                    step = self.steps[step_id]
+                    result = future.result()
+                    step["status"] = "done" if result.get("success", True) else "failed"
+                    step["result"] = result
+                    yield {
+                        "step": step_id,
+                        "status": step["status"],
+                        "elapsed_seconds": round(time.monotonic() - step["started_at"], 2),
+                        "message": result.get("message", "")
+                    }
+
+        counts = {}
+        for step in self.steps.values():
+            counts[step["status"]] = counts.get(step["status"], 0) + 1
+
+        yield {
+            "step": None,
+            "status": "complete",
+            "success": counts.get("failed", 0) == 0 and counts.get("skipped", 0) == 0,
+            "counts": counts,
+            "elapsed_seconds": round(time.monotonic() - started_at, 2)
+        }
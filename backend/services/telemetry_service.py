@@ -0,0 +1,177 @@
+import socket
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Latencies measured between lifecycle transitions: span -> (from, to)
+LIFECYCLE_SPANS = {
+    "disk_created": ("create_requested", "disk_created"),
+    "defined": ("create_requested", "defined"),
+    "running": ("create_requested", "started"),
+    "ready": ("create_requested", "console_ready"),
+    "boot": ("started", "console_ready"),
+}
+# Transitions that abandon a router's open spans (nothing is measured)
+CANCELLING_EVENTS = {"create_failed", "stopped", "deleted"}
+BUCKETS_S = [0.1, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 180, 300, 600, 900, 1800]
+
+
+def current_boot_id() -> str:
+    """Identifies this host boot; monotonic times are only comparable within one"""
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip()
+    except OSError:
+        return str(round(time.time() - time.monotonic()))
+
+
+def span_durations(events: List[Dict]) -> Dict[str, Dict[str, List[float]]]:
+    """router type -> span -> seconds, from transitions in the order they were recorded"""
+    opened: Dict[str, Dict[str, Dict]] = {}  # router -> from-event -> {"at", "boot_id", "done"}
+    types: Dict[str, str] = {}
+    durations: Dict[str, Dict[str, List[float]]] = {}
+
+    for entry in events:
+        router, event = entry["router"], entry["event"]
+        if entry["router_type"]:
+            types[router] = entry["router_type"]
+        spans = opened.setdefault(router, {})
+
+        for span, (start, end) in LIFECYCLE_SPANS.items():
+            began = spans.get(start)
+            if end != event or began is None or span in began["done"]:
+                continue
+            began["done"].add(span)
+            if began["boot_id"] == entry["boot_id"]:
+                durations.setdefault(types.get(router, "unknown"), {}).setdefault(span, []).append(
+                    entry["monotonic"] - began["at"])
+
+        if event in CANCELLING_EVENTS or event == "create_requested":
+            spans.clear()
+        # A vQFX fires each transition for its RE and its PFE: the first one counts
+        if event not in spans and any(start == event for start, _ in LIFECYCLE_SPANS.values()):
+            spans[event] = {"at": entry["monotonic"], "boot_id": entry["boot_id"], "done": set()}
+    return durations
+
+
+def histogram(seconds: List[float]) -> Dict:
+    ordered = sorted(seconds)
+    counts = [0] * (len(BUCKETS_S) + 1)
+    for value in ordered:
+        counts[bisect_left(BUCKETS_S, value)] += 1
+    return {
+        "count": len(ordered),
+        "mean_s": round(sum(ordered) / len(ordered), 2),
+        "p50_s": round(ordered[len(ordered) // 2], 2),
+        "p95_s": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "max_s": round(ordered[-1], 2),
+        "buckets": dict(
+            [(f"le_{bound}", count) for bound, count in zip(BUCKETS_S, counts)]
+            + [("inf", counts[-1])]
+        )
+    }
+
+
+class TelemetryService:
+    """How long routers take to get through their lifecycle, per router type.
+
+    Transitions are stored with a monotonic timestamp (and the host boot it
+    belongs to): create requested, disk created and create failed come from the
+    router service, defined/started/stopped/deleted from libvirt lifecycle
+    events, and console ready from a probe started whenever a router with a
+    known management IP starts (the same SSH check as wait_for_ready, which
+    records it too). Latencies are the time between pairs of transitions, see
+    LIFECYCLE_SPANS.
+    """
+
+    def __init__(self, repository, ready_timeout: int = 900, probe_interval: int = 5):
+        self.repository = repository
+        self.ready_timeout = ready_timeout
+        self.probe_interval = probe_interval
+        self.boot_id = current_boot_id()
+        self._types: Dict[str, Optional[str]] = {}
+        self._addresses: Dict[str, str] = {}  # router -> management address to probe
+        self._probing = set()
+        self._lock = threading.Lock()
+
+    def record(self, router: str, event: str, router_type: Optional[str] = None, at: Optional[float] = None):
+        """Store a transition (at: time.monotonic() when it happened, default now)"""
+        at = time.monotonic() if at is None else at
+        with self._lock:
+            if router_type:
+                self._types[router] = router_type
+            elif router not in self._types:
+                self._types[router] = self.repository.router_type(router)
+            router_type = self._types[router]
+        try:
+            self.repository.add(router, router_type, event, at, self.boot_id)
+        except Exception as e:
+            print(f"⚠ Could not record {event} of {router}: {e}")
+
+        if event == "started":
+            self._probe(router)
+        elif event in ("create_failed", "deleted"):
+            with self._lock:
+                self._addresses.pop(router, None)
+
+    def watch(self, router: str, ip: str):
+        """Probe this router for readiness every time it starts"""
+        with self._lock:
+            self._addresses[router] = ip.split('/')[0]
+
+    def _probe(self, router: str):
+        with self._lock:
+            address = self._addresses.get(router)
+            if not address or router in self._probing:
+                return
+            self._probing.add(router)
+        threading.Thread(target=self._wait_ready, args=(router, address),
+                         name=f"ready-{router}", daemon=True).start()
+
+    def _wait_ready(self, router: str, address: str):
+        deadline = time.monotonic() + self.ready_timeout
+        try:
+            while time.monotonic() < deadline and self._addresses.get(router) == address:
+                try:
+                    with socket.create_connection((address, 22), timeout=2):
+                        self.record(router, "console_ready")
+                        return
+                except OSError:
+                    time.sleep(self.probe_interval)
+        finally:
+            with self._lock:
+                self._probing.discard(router)
+
+    def lifecycle(self, router_type: Optional[str] = None, days: int = 30) -> Dict:
+        """Latency histograms per router type over the last days"""
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        durations = span_durations(self.repository.since(since))
+        return {
+            "days": days,
+            "spans": {span: {"from": start, "to": end} for span, (start, end) in LIFECYCLE_SPANS.items()},
+            "types": {
+                name: {span: histogram(seconds) for span, seconds in spans.items()}
+                for name, spans in sorted(durations.items())
+                if router_type is None or name == router_type
+            }
+        }
+
+    def timeline(self, router: str) -> Dict:
+        """A router's recent transitions, with seconds since the create request that preceded each"""
+        events = self.repository.for_router(router)
+        requested = None
+        for entry in events:
+            if entry["event"] == "create_requested":
+                requested = entry
+            same_boot = requested is not None and requested["boot_id"] == entry["boot_id"]
+            entry["since_create_s"] = round(entry["monotonic"] - requested["monotonic"], 2) if same_boot else None
+        spans = span_durations(events)
+        return {
+            "name": router,
+            "events": [{key: entry[key] for key in ("event", "router_type", "recorded_at", "since_create_s")}
+                       for entry in events],
+            "spans": {span: [round(s, 2) for s in seconds]
+                      for by_span in spans.values() for span, seconds in by_span.items()}
+        }
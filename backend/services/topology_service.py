@@ -1,33 +1,29 @@
-import json
-import os
 from typing import List, Dict
 from datetime import datetime
+from backend.repositories.topology_repository import TopologyRepository
 
 class TopologyService:
-    def __init__(self, storage_path: str = "/opt/vrhost-lab/topologies"):
-        self.storage_path = storage_path
-        os.makedirs(storage_path, exist_ok=True)
+    def __init__(self, repository: TopologyRepository):
+        self.repository = repository
     
-    def save_topology(self, name: str, description: str, routers: List[Dict]) -> Dict:
+    def save_topology(self, name: str, description: str, routers: List[Dict],
+                      links: List[Dict] = None) -> Dict:
         """Save current lab topology"""
         topology = {
             "name": name,
             "description": description,
             "routers": routers,
+            "links": links or [],
             "created_at": datetime.now().isoformat(),
             "version": "1.0"
         }
         
-        file_path = os.path.join(self.storage_path, f"{name}.json")
-        
         try:
-            with open(file_path, 'w') as f:
-                json.dump(topology, f, indent=2)
+            self.repository.save(topology)
             
             return {
                 "success": True,
-                "message": f"Topology '{name}' saved successfully",
-                "path": file_path
+                "message": f"Topology '{name}' saved successfully"
             }
         except Exception as e:
             return {
@@ -37,51 +33,24 @@ class TopologyService:
     
     def load_topology(self, name: str) -> Dict:
         """Load a saved topology"""
-        file_path = os.path.join(self.storage_path, f"{name}.json")
-        
-        if not os.path.exists(file_path):
-            return {"error": f"Topology '{name}' not found"}
-        
         try:
-            with open(file_path, 'r') as f:
-                topology = json.load(f)
-            return topology
-        except Exception as e:
+            topology = self.repository.get(name)
+        except ValueError as e:
             return {"error": f"Failed to load topology: {str(e)}"}
+
+        if topology is None:
+            return {"error": f"Topology '{name}' not found"}
+        return topology
     
     def list_topologies(self) -> List[Dict]:
-        """List all saved topologies"""
-        topologies = []
-        
-        if not os.path.exists(self.storage_path):
-            return topologies
-        
-        for filename in os.listdir(self.storage_path):
-            if filename.endswith('.json'):
-                file_path = os.path.join(self.storage_path, filename)
-                try:
-                    with open(file_path, 'r') as f:
-                        topo = json.load(f)
-                    topologies.append({
-                        "name": topo.get("name"),
-                        "description": topo.get("description", ""),
-                        "router_count": len(topo.get("routers", [])),
-                        "created_at": topo.get("created_at")
-                    })
-                except:
-                    continue
-        
-        return topologies
+        """List all saved topologies (listing columns only)"""
+        return self.repository.list()
     
     def delete_topology(self, name: str) -> Dict:
         """Delete a saved topology"""
-        file_path = os.path.join(self.storage_path, f"{name}.json")
-        
-        if not os.path.exists(file_path):
-            return {"success": False, "message": f"Topology '{name}' not found"}
-        
         try:
-            os.remove(file_path)
+            if not self.repository.delete(name):
+                return {"success": False, "message": f"Topology '{name}' not found"}
             return {
                 "success": True,
                 "message": f"Topology '{name}' deleted successfully"
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Measure host CPU cost per Gbps of lab traffic under a NIC profile.
+
+Runs a traffic command (iperf3 with -J, e.g. between two hosts behind a chain of
+vSRX routers) while sampling host CPU time from /proc/stat and guest CPU time of
+the lab's domains from libvirt. The result is recorded under --label in a JSON
+file, and every label recorded so far is printed side by side. Typical use:
+deploy the lab with one profile, run this with --label legacy, redeploy with
+VRHOST_NIC_PROFILE=vhost (or nic_profile on each router), run with --label vhost.
+
+Usage: python -m benchmarks.bench_network --label vhost --domains r1,r2,r3
+           --command "iperf3 -c 10.20.0.2 -t 30 -P 4 -J" [--results bench-network.json]
+"""
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import time
+
+import libvirt
+
+
+def host_cpu_seconds() -> tuple:
+    """(busy, total) CPU seconds over all host CPUs since boot"""
+    with open("/proc/stat") as f:
+        fields = [int(v) for v in f.readline().split()[1:]]
+    ticks = os.sysconf("SC_CLK_TCK")
+    idle = fields[3] + fields[4]  # idle + iowait
+    return (sum(fields) - idle) / ticks, sum(fields) / ticks
+
+
+def guest_cpu_seconds(domains) -> float:
+    """vCPU + emulator time of the domains (vhost threads are only in the host figure)"""
+    return sum(domain.getCPUStats(True)[0]["cpu_time"] for domain in domains) / 1e9
+
+
+def throughput_gbps(report: dict) -> float:
+    """Receiver-side throughput from iperf3 -J output (TCP or UDP)"""
+    end = report["end"]
+    summary = end.get("sum_received") or end.get("sum")
+    return summary["bits_per_second"] / 1e9
+
+
+def measure(args) -> dict:
+    conn = libvirt.open(args.uri)
+    try:
+        domains = [conn.lookupByName(name) for name in args.domains.split(",")] if args.domains else []
+        host_before, total_before = host_cpu_seconds()
+        guest_before = guest_cpu_seconds(domains)
+        started_at = time.monotonic()
+
+        output = subprocess.run(shlex.split(args.command), capture_output=True, text=True, check=True).stdout
+
+        elapsed = time.monotonic() - started_at
+        host_after, total_after = host_cpu_seconds()
+        guest_after = guest_cpu_seconds(domains)
+    finally:
+        conn.close()
+
+    gbps = throughput_gbps(json.loads(output))
+    host_cores = (host_after - host_before) / elapsed
+    return {
+        "gbps": round(gbps, 3),
+        "seconds": round(elapsed, 1),
+        "host_cores_busy": round(host_cores, 2),
+        "host_utilization": round((host_after - host_before) / (total_after - total_before), 3),
+        "guest_cores_busy": round((guest_after - guest_before) / elapsed, 2),
+        "host_cores_per_gbps": round(host_cores / gbps, 3) if gbps else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--label", required=True, help="Name of the profile this run measures")
+    parser.add_argument("--command", required=True, help="Traffic command printing iperf3 JSON (-J)")
+    parser.add_argument("--domains", default="", help="Comma-separated libvirt domains carrying the traffic")
+    parser.add_argument("--uri", default="qemu:///system")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--results", default="bench-network.json")
+    args = parser.parse_args()
+
+    runs = [measure(args) for _ in range(args.repeat)]
+    best = max(runs, key=lambda run: run["gbps"])
+
+    results = {}
+    if os.path.exists(args.results):
+        with open(args.results) as f:
+            results = json.load(f)
+    results[args.label] = {"command": args.command, "best": best, "runs": runs}
+    with open(args.results, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"  {'profile':<14} {'Gbps':>8} {'host cores':>11} {'guest cores':>12} {'cores/Gbps':>11}")
+    for label, result in results.items():
+        r = result["best"]
+        per_gbps = "-" if r["host_cores_per_gbps"] is None else r["host_cores_per_gbps"]
+        print(f"  {label:<14} {r['gbps']:>8} {r['host_cores_busy']:>11} {r['guest_cores_busy']:>12} {per_gbps:>11}")
+
+
+if __name__ == "__main__":
+    main()
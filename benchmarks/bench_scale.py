@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Benchmark the API at 10, 100 and 1000 devices against libvirt's test driver.
+
+The app is started in-process (lifespan included) on a generated test:/// node
+holding a mix of vSRX, CSR1000v, IOSvL2 and vQFX RE/PFE domains, with labs and
+links seeded through the services. Images, config drives and the database live
+in a temporary workdir, so no root access is needed. Each operation's latency
+(p50/p95) and throughput are printed; with --baseline they are compared to a
+JSON baseline recorded on the same machine (--update-baseline writes it), and
+the run fails when an operation got slower than the baseline by more than
+--threshold.
+
+Requires the packages in benchmarks/requirements.txt (backend requirements plus
+httpx) and libvirt's test driver.
+
+Usage: python -m benchmarks.bench_scale [--sizes 10,100,1000]
+           [--baseline scale.json [--update-baseline]]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Share of each device type in a generated node (vQFX counts once for its RE/PFE pair)
+DEVICE_MIX = [("vsrx", 0.4), ("csr1000v", 0.25), ("viosl2", 0.15), ("vqfx", 0.2)]
+DEVICE_SPECS = {
+    "vsrx": (4096, 2),
+    "csr1000v": (4096, 2),
+    "viosl2": (2048, 2),
+    "vqfx-re": (2048, 1),
+    "vqfx-pfe": (2048, 1)
+}
+
+DOMAIN_TEMPLATE = """  <domain type="test" xmlns:test="http://libvirt.org/schemas/domain/test/1.0">
+    <name>{name}</name>
+    <memory unit="MiB">{memory}</memory>
+    <vcpu>{vcpus}</vcpu>
+    <os><type>hvm</type></os>
+    <devices>
+      <disk type="file" device="disk">
+        <source file="{images}/{image}-{name}.qcow2"/>
+        <target dev="vda" bus="virtio"/>
+      </disk>
+    </devices>
+    <test:runstate>{runstate}</test:runstate>
+  </domain>
+"""
+
+
+def device_names(count: int):
+    """(router name, image) pairs for count devices in the DEVICE_MIX proportions"""
+    devices = []
+    for image, share in DEVICE_MIX:
+        prefix = {"vsrx": "vsrx", "csr1000v": "csr", "viosl2": "sw", "vqfx": "vqfx"}[image]
+        for i in range(max(1, round(count * share))):
+            devices.append((f"{prefix}{i}", image))
+    return devices[:count]
+
+
+def node_xml(devices, images: str) -> str:
+    """test:/// node definition; every other device starts out running"""
+    domains = []
+    for position, (name, image) in enumerate(devices):
+        runstate = 1 if position % 2 == 0 else 5  # VIR_DOMAIN_RUNNING / VIR_DOMAIN_SHUTOFF
+        parts = [(f"{name}-re", "vqfx-re"), (f"{name}-pfe", "vqfx-pfe")] if image == "vqfx" else [(name, image)]
+        for domain_name, spec in parts:
+            memory, vcpus = DEVICE_SPECS[spec]
+            domains.append(DOMAIN_TEMPLATE.format(name=domain_name, memory=memory, vcpus=vcpus,
+                                                  image=image, runstate=runstate, images=images))
+    return (
+        "<node>\n"
+        "  <cpu><mhz>2400</mhz><nodes>2</nodes><sockets>2</sockets><cores>16</cores>"
+        "<threads>2</threads><active>64</active><model>x86_64</model></cpu>\n"
+        "  <memory>536870912</memory>\n"
+        + "".join(domains) +
+        "</node>\n"
+    )
+
+
+def seed(app, devices, lab_size: int):
+    """Group devices into labs and chain each lab's devices with links"""
+    from backend.models.link import LinkCreate
+
+    labs = {}
+    for position, (name, _) in enumerate(devices):
+        labs.setdefault(f"lab{position // lab_size:03d}", []).append(name)
+
+    for lab, routers in labs.items():
+        app.state.lab_service.create_lab(lab, "benchmark")
+        for router in routers:
+            app.state.lab_service.add_router(lab, router)
+        for source, target in zip(routers, routers[1:]):
+            app.state.link_service.create_link(
+                LinkCreate(source_router=source, source_interface="ge-0/0/1",
+                           target_router=target, target_interface="ge-0/0/2", lab=lab),
+                app.state.router_service
+            )
+    return labs
+
+
+def summarize(samples, calls, elapsed: float):
+    samples = sorted(samples)
+    return {
+        "requests": len(samples),
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "libvirt_calls": round(statistics.mean(calls), 1) if calls else None
+    }
+
+
+async def measure_http(client, method: str, paths, repeat: int, concurrency: int):
+    """Issue repeat requests (concurrency at a time) cycling over paths"""
+    samples, calls, errors = [], [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(path):
+        nonlocal errors
+        async with semaphore:
+            started_at = time.perf_counter()
+            response = await client.request(method, path)
+            samples.append((time.perf_counter() - started_at) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+            if "x-libvirt-calls" in response.headers:
+                calls.append(int(response.headers["x-libvirt-calls"]))
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(paths[i % len(paths)]) for i in range(repeat)))
+    result = summarize(samples, calls, time.perf_counter() - started_at)
+    result["errors"] = errors
+    return result
+
+
+def measure_call(fn, args, repeat: int):
+    samples = []
+    started_at = time.perf_counter()
+    for i in range(repeat):
+        call_started_at = time.perf_counter()
+        fn(*args[i % len(args)])
+        samples.append((time.perf_counter() - call_started_at) * 1000)
+    result = summarize(samples, [], time.perf_counter() - started_at)
+    result["errors"] = 0
+    return result
+
+
+async def run_size(size: int, args, root: str) -> dict:
+    import httpx
+
+    workdir = tempfile.mkdtemp(prefix=f"size{size}-", dir=root)
+    devices = device_names(size)
+    node_path = os.path.join(workdir, "node.xml")
+    with open(node_path, "w") as f:
+        f.write(node_xml(devices, os.environ["VRHOST_IMAGES_PATH"]))
+
+    # main reads its URI and database path at import time
+    os.environ["VRHOST_LIBVIRT_URI"] = args.uri or f"test://{node_path}"
+    os.environ["VRHOST_DATABASE"] = os.path.join(workdir, "vrhost.db")
+    sys.modules.pop("backend.main", None)
+    from backend.main import app
+
+    quiet = open(os.devnull, "w")
+    results = {}
+    try:
+        async with app.router.lifespan_context(app):
+            if not hasattr(app.state, "dashboard_service"):
+                raise RuntimeError(f"App did not start against {os.environ['VRHOST_LIBVIRT_URI']}")
+
+            with contextlib.redirect_stdout(quiet):
+                labs = seed(app, devices, args.lab_size)
+
+            rng = random.Random(size)
+            names = [name for name, _ in devices]
+            sample_names = rng.sample(names, min(len(names), 50))
+            repeat = args.repeat
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                with contextlib.redirect_stdout(quiet):
+                    await client.get("/api/routers")  # warm the listing index
+                    results["list_routers"] = await measure_http(
+                        client, "GET", ["/api/routers"], repeat, args.concurrency)
+                    results["get_router_details"] = await measure_http(
+                        client, "GET", [f"/api/routers/{n}" for n in sample_names], repeat, args.concurrency)
+                    results["list_labs"] = await measure_http(
+                        client, "GET", ["/api/labs"], max(1, repeat // 4), args.concurrency)
+                    results["get_stats"] = await measure_http(
+                        client, "GET", ["/api/stats"], repeat, args.concurrency)
+
+                    states = [(n, state, app.state.router_service) for n in sample_names
+                              for state in ("stopped", "running")]
+                    results["link_updates"] = measure_call(
+                        app.state.link_service.update_links_for_router, states, repeat)
+
+                    lab = rng.choice(sorted(labs))
+                    cycles = []
+                    started_at = time.perf_counter()
+                    errors = 0
+                    for _ in range(args.lab_cycles):
+                        cycle_started_at = time.perf_counter()
+                        for path in (f"/api/labs/{lab}/start", f"/api/labs/{lab}/stop?force=true"):
+                            response = await client.post(path)
+                            errors += response.status_code >= 400
+                        cycles.append((time.perf_counter() - cycle_started_at) * 1000)
+                    results["lab_start_stop"] = summarize(cycles, [], time.perf_counter() - started_at)
+                    results["lab_start_stop"]["errors"] = errors
+    finally:
+        quiet.close()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """Regressions: p50 latency more than threshold above the baseline's"""
+    regressions = []
+    for size, operations in results.items():
+        for operation, current in operations.items():
+            previous = baseline.get(size, {}).get(operation)
+            if not previous:
+                continue
+            limit = previous["p50_ms"] * (1 + threshold)
+            if current["p50_ms"] > limit:
+                regressions.append(f"{operation} @ {size} devices: p50 {current['p50_ms']} ms "
+                                   f"> {limit:.3f} ms (baseline {previous['p50_ms']} ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--lab-size", type=int, default=10)
+    parser.add_argument("--lab-cycles", type=int, default=3)
+    parser.add_argument("--uri", help="libvirt URI to use instead of a generated test:/// node")
+    parser.add_argument("--baseline", help="JSON baseline to compare with (or write, with --update-baseline)")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed p50 slowdown over the baseline (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write these results as the new baseline instead of comparing")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline needs --baseline")
+
+    # Module-level paths are read on first import, so point them at the workdir up front
+    root = tempfile.mkdtemp(prefix="vrhost-bench-")
+    os.environ["VRHOST_IMAGES_PATH"] = os.path.join(root, "images")
+    os.environ["VRHOST_CONFIG_DRIVE_PATH"] = os.path.join(root, "config-drives")
+    os.makedirs(os.environ["VRHOST_IMAGES_PATH"])
+
+    results = {}
+    try:
+        for size in [int(s) for s in args.sizes.split(",")]:
+            results[str(size)] = asyncio.run(run_size(size, args, root))
+            print(f"\n{size} devices")
+            print(f"  {'operation':<20} {'p50 ms':>10} {'p95 ms':>10} {'req/s':>10} {'libvirt':>8} {'errors':>7}")
+            for operation, r in results[str(size)].items():
+                calls = "-" if r["libvirt_calls"] is None else r["libvirt_calls"]
+                print(f"  {operation:<20} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} "
+                      f"{r['throughput_rps']:>10.1f} {calls:>8} {r['errors']:>7}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if not args.baseline:
+        return
+    if args.update_baseline or not os.path.exists(args.baseline):
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Compare router boot-storm time-to-ready across storage profiles.
+
+For each profile, --count devices of one type are created at once on a real
+hypervisor (the mk* scripts and base images must be installed) and timed until
+ready: SSH answering when --ip-base is given, otherwise disk reads settled (no
+new bytes read for --settle seconds, i.e. the guest finished booting from
+disk). The devices are deleted between profiles; --drop-caches makes every
+profile start cold, --preload warms the base images first.
+
+Usage: sudo python -m benchmarks.bench_storage [--type vsrx] [--count 20]
+           [--profiles legacy,native,io_uring] [--ip-base 10.10.50.100]
+"""
+import argparse
+import ipaddress
+import json
+import statistics
+import time
+
+import libvirt
+
+from backend.services.router_service import STORAGE_PROFILES, RouterService
+from backend.services.snapshot_service import SnapshotService
+from backend.services.task_graph import parallel_map
+
+
+def drop_caches():
+    with open("/proc/sys/vm/drop_caches", "w") as f:
+        f.write("3\n")
+
+
+def disk_read_bytes(service: RouterService, name: str) -> int:
+    """Bytes read so far from every disk of a device's domains"""
+    total = 0
+    for domain in service.get_domains(name):
+        for disk in SnapshotService.get_disks(domain):
+            if disk["device"] == "disk":
+                total += domain.blockStats(disk["target"])[1]
+    return total
+
+
+def wait_settled(service: RouterService, name: str, started_at: float, timeout: int, settle: int) -> dict:
+    """Running, then no new disk reads for settle seconds"""
+    deadline = started_at + timeout
+    last_bytes, last_change = -1, time.monotonic()
+    while time.monotonic() < deadline:
+        try:
+            read = disk_read_bytes(service, name)
+        except libvirt.libvirtError:
+            read = -1
+        now = time.monotonic()
+        if read != last_bytes:
+            last_bytes, last_change = read, now
+        elif read > 0 and now - last_change >= settle:
+            return {"success": True, "seconds": last_change - started_at, "read_bytes": read}
+        time.sleep(1)
+    return {"success": False, "message": f"{name} still reading after {timeout} seconds"}
+
+
+def run_profile(service: RouterService, profile: str, args) -> dict:
+    names = [f"bench-{profile.replace('_', '')}-{i}" for i in range(args.count)]
+    ips = [None] * args.count
+    if args.ip_base:
+        base = ipaddress.ip_address(args.ip_base)
+        ips = [f"{base + i}/24" for i in range(args.count)]
+
+    if args.drop_caches:
+        drop_caches()
+    if args.preload:
+        service.preload_base_images([args.type])
+
+    started_at = time.monotonic()
+
+    def boot(item):
+        name, ip = item
+        created = service.create_router(name, ip, args.type, args.ram, args.vcpus,
+                                        wait=False, storage_profile=profile)
+        if not created["success"]:
+            return created
+        if ip:
+            ready = service.wait_for_ready(name, ip, timeout=args.timeout)
+            ready["seconds"] = time.monotonic() - started_at
+            return ready
+        return wait_settled(service, name, started_at, args.timeout, args.settle)
+
+    try:
+        results = parallel_map(boot, list(zip(names, ips)), max_workers=args.count)
+    finally:
+        for name in names:
+            service.delete_router(name)
+
+    seconds = sorted(r["seconds"] for r in results if r.get("success"))
+    failures = [r.get("message") for r in results if not r.get("success")]
+    summary = {"ready": len(seconds), "failed": len(failures), "failures": failures[:3]}
+    if seconds:
+        summary.update({
+            "p50_s": round(statistics.median(seconds), 1),
+            "p95_s": round(seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))], 1),
+            "max_s": round(seconds[-1], 1)
+        })
+    reads = [r["read_bytes"] for r in results if "read_bytes" in r]
+    if reads:
+        summary["read_mb_per_device"] = round(statistics.mean(reads) / 1024 / 1024, 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="qemu:///system")
+    parser.add_argument("--type", default="vsrx")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--ram", type=int, default=4)
+    parser.add_argument("--vcpus", type=int, default=2)
+    parser.add_argument("--profiles", default=",".join(STORAGE_PROFILES))
+    parser.add_argument("--ip-base", help="First management IP; enables the SSH readiness check")
+    parser.add_argument("--timeout", type=int, default=900)
+    parser.add_argument("--settle", type=int, default=20,
+                        help="Seconds without disk reads that count as booted (no --ip-base)")
+    parser.add_argument("--drop-caches", action="store_true", help="Start every profile with a cold page cache")
+    parser.add_argument("--preload", action="store_true", help="Preload the base image before each boot storm")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    conn = libvirt.open(args.uri)
+    service = RouterService(conn, uri=args.uri)
+    results = {}
+    try:
+        for profile in args.profiles.split(","):
+            if profile not in STORAGE_PROFILES:
+                parser.error(f"Unknown storage profile: {profile}")
+            print(f"Booting {args.count} x {args.type} with the {profile} profile...")
+            results[profile] = run_profile(service, profile, args)
+    finally:
+        conn.close()
+
+    print(f"\n{args.count} x {args.type}" + (" (cold cache)" if args.drop_caches else ""))
+    print(f"  {'profile':<10} {'p50 s':>8} {'p95 s':>8} {'max s':>8} {'read MB':>8} {'failed':>7}")
+    for profile, r in results.items():
+        print(f"  {profile:<10} {r.get('p50_s', '-'):>8} {r.get('p95_s', '-'):>8} {r.get('max_s', '-'):>8} "
+              f"{r.get('read_mb_per_device', '-'):>8} {r['failed']:>7}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"type": args.type, "count": args.count, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark topology listing and loading from the SQLite store versus parsing JSON files.
+
+Usage: python -m benchmarks.bench_topology_store [--sizes 10,100,1000,10000]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from backend.repositories.database import Database
+from backend.repositories.topology_repository import TopologyRepository
+from backend.services.topology_service import TopologyService
+
+
+def naive_list(path):
+    """The JSON-file implementation: open and parse every file on each call"""
+    topologies = []
+    for filename in os.listdir(path):
+        if filename.endswith('.json'):
+            with open(os.path.join(path, filename)) as f:
+                topo = json.load(f)
+            topologies.append({
+                "name": topo.get("name"),
+                "description": topo.get("description", ""),
+                "router_count": len(topo.get("routers", [])),
+                "created_at": topo.get("created_at")
+            })
+    return topologies
+
+
+def seed(path, service, count):
+    routers = [
+        {"name": f"r{i}", "ip": f"10.10.50.{10 + i}", "router_type": "vsrx", "ram_gb": 4, "vcpus": 2}
+        for i in range(10)
+    ]
+    for n in range(count):
+        with open(os.path.join(path, f"topo-{n}.json"), 'w') as f:
+            json.dump({"name": f"topo-{n}", "description": "benchmark", "routers": routers,
+                       "links": [], "created_at": "2025-01-01T00:00:00", "version": "1.0"}, f)
+        service.save_topology(f"topo-{n}", "benchmark", routers)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10,100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'topologies':>10}  {'json ms':>10}  {'sqlite ms':>10}  {'load ms':>10}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        path = tempfile.mkdtemp(prefix="vrhost-bench-")
+        try:
+            service = TopologyService(TopologyRepository(Database(os.path.join(path, "vrhost.db"))))
+            seed(path, service, size)
+
+            naive = timed(lambda: naive_list(path), max(1, args.repeat // 4))
+            listed = timed(service.list_topologies, args.repeat)
+            loaded = timed(lambda: service.load_topology(f"topo-{size // 2}"), args.repeat)
+            assert len(service.list_topologies()) == size
+
+            print(f"{size:>10}  {naive:>10.2f}  {listed:>10.3f}  {loaded:>10.3f}")
+        finally:
+            shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,17 +16,83 @@ function App() {
   const [success, setSuccess] = useState('');
 
   useEffect(() => {
-    fetchRouters();
-    fetchLinks();
-    fetchStats();
-    const interval = setInterval(() => {
-      fetchRouters();
-      fetchLinks();
-      fetchStats();
-    }, 5000);
-    return () => clearInterval(interval);
+    let interval = null;
+
+    // Fallback when the event stream is unavailable: poll the dashboard snapshot
+    // every 5 seconds (the browser revalidates it by ETag, so unchanged polls are 304s)
+    const startPolling = () => {
+      if (interval) return;
+      fetchDashboard();
+      interval = setInterval(fetchDashboard, 5000);
+    };
+
+    if (!window.EventSource) {
+      startPolling();
+      return () => clearInterval(interval);
+    }
+
+    // Push updates: a snapshot on connect, then only what changed
+    const events = new EventSource(`${API_BASE}/api/events`);
+    let connected = false;
+
+    events.addEventListener('snapshot', (e) => {
+      const snapshot = JSON.parse(e.data);
+      connected = true;
+      clearInterval(interval);
+      interval = null;
+      setRouters(snapshot.routers);
+      setLinks(snapshot.links);
+      setStats(snapshot.stats);
+    });
+    events.addEventListener('router', (e) => {
+      const router = JSON.parse(e.data).data;
+      setRouters((prev) => {
+        const others = prev.filter((r) => r.name !== router.name);
+        return [...others, router].sort((a, b) => a.name.localeCompare(b.name));
+      });
+    });
+    events.addEventListener('router_deleted', (e) => {
+      const { name } = JSON.parse(e.data).data;
+      setRouters((prev) => prev.filter((r) => r.name !== name));
+    });
+    events.addEventListener('link', (e) => {
+      const link = JSON.parse(e.data).data;
+      setLinks((prev) => [...prev.filter((l) => l.id !== link.id), link]);
+    });
+    events.addEventListener('link_deleted', (e) => {
+      const { id } = JSON.parse(e.data).data;
+      setLinks((prev) => prev.filter((l) => l.id !== id));
+    });
+    events.addEventListener('stats', (e) => {
+      setStats(JSON.parse(e.data).data);
+    });
+    events.onerror = () => {
+      // EventSource reconnects by itself and gets a fresh snapshot; if the first
+      // retry fails too, poll until the stream is back
+      if (connected && events.readyState !== EventSource.CLOSED) {
+        connected = false;
+        return;
+      }
+      startPolling();
+    };
+
+    return () => {
+      events.close();
+      clearInterval(interval);
+    };
   }, []);
 
+  const fetchDashboard = async () => {
+    try {
+      const response = await axios.get(`${API_BASE}/api/dashboard`);
+      setRouters(response.data.routers);
+      setLinks(response.data.links);
+      setStats(response.data.stats);
+    } catch (err) {
+      console.error('Failed to fetch dashboard:', err);
+    }
+  };
+
   const fetchRouters = async () => {
     try {
       const response = await axios.get(`${API_BASE}/api/routers`);
@@ -20,8 +20,9 @@ const api = axios.create({
 });
 
 export const routerAPI = {
-  list: () => api.get('/api/routers'),
+  list: (params) => api.get('/api/routers', { params }),
   create: (data) => api.post('/api/routers', data),
+  createBatch: (routers, maxParallel = 4) => api.post('/api/routers/batch', { routers, max_parallel: maxParallel }),
   delete: (name) => api.delete(`/api/routers/${name}`),
   get: (name) => api.get(`/api/routers/${name}`),
   start: (name) => api.post(`/api/routers/${name}/start`),
@@ -39,6 +40,7 @@ export const topologyAPI = {
   save: (data) => api.post('/api/topologies', data),
   load: (name) => api.get(`/api/topologies/${name}`),
   delete: (name) => api.delete(`/api/topologies/${name}`),
+  deploy: (name, params) => api.post(`/api/topologies/${name}/deploy`, null, { params }),
 };
 
 export const labAPI = {
@@ -49,6 +51,20 @@ export const labAPI = {
   routers: (name) => api.get(`/api/labs/${name}/routers`),
   start: (name) => api.post(`/api/labs/${name}/start`),
   stop: (name) => api.post(`/api/labs/${name}/stop`),
+  setQuota: (name, quota) => api.put(`/api/labs/${name}/quota`, quota),
+  snapshots: (name) => api.get(`/api/labs/${name}/snapshots`),
+  snapshot: (name, data) => api.post(`/api/labs/${name}/snapshots`, data),
+  restoreSnapshot: (name, snapshot) => api.post(`/api/labs/${name}/snapshots/${snapshot}/restore`),
+  deleteSnapshot: (name, snapshot) => api.delete(`/api/labs/${name}/snapshots/${snapshot}`),
+  suspend: (name) => api.post(`/api/labs/${name}/suspend`),
+  resume: (name) => api.post(`/api/labs/${name}/resume`),
+  clone: (name, count, prefix) => api.post(`/api/labs/${name}/clone`, null, { params: { count, prefix } }),
+  exportUrl: (name) => `${API_BASE_URL}/api/labs/${name}/export`,
+  import: (file) => api.post('/api/labs/import', file, { headers: { 'Content-Type': 'application/gzip' } }),
+};
+
+export const capacityAPI = {
+  plan: (topology) => api.post('/api/capacity/plan', topology),
 };
 
 export const consoleAPI = {
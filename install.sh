@@ -76,6 +76,8 @@ apt-get install -y \
     virt-manager \
     virtinst \
     libguestfs-tools \
+    genisoimage \
+    sqlite3 \
     guestfs-tools \
     pkg-config \
     libvirt-dev \
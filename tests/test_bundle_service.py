@@ -0,0 +1,133 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+pytest.importorskip("libvirt")
+
+from backend.services import bundle_service
+from backend.services.bundle_service import BundleService
+
+DOMAIN = """
+<domain type='kvm' xmlns:qemu='http://libvirt.org/schemas/domain/qemu/1.0'>
+  <name>exported-r1</name>
+  <uuid>0f4e7a3c-1111-2222-3333-444455556666</uuid>
+  <metadata><vrhost:lab xmlns:vrhost='http://vrhost/lab'>lab1</vrhost:lab></metadata>
+  <memory unit='KiB'>4194304</memory>
+  <vcpu>2</vcpu>
+  <os>
+    <type arch='x86_64'>hvm</type>
+    <kernel>/boot/vmlinuz</kernel>
+    <boot dev='hd'/>
+  </os>
+  <devices>
+    <emulator>/usr/bin/evil</emulator>
+    <disk type='file' device='disk'>
+      <driver name='qemu' type='raw' cache='none'/>
+      <source file='/etc/shadow'/>
+      <backingStore type='file'><source file='/etc/passwd'/></backingStore>
+      <target dev='vda' bus='virtio'/>
+    </disk>
+    <disk type='file' device='cdrom'>
+      <source file='/var/lib/libvirt/images/r1.iso'/>
+      <target dev='sda' bus='sata'/>
+    </disk>
+    <interface type='bridge'>
+      <mac address='52:54:00:00:00:01'/>
+      <source bridge='br0'/>
+      <script path='/tmp/evil.sh'/>
+      <model type='virtio'/>
+    </interface>
+    <serial type='pty'><target port='0'/></serial>
+    <serial type='file'><source path='/etc/passwd'/><target port='1'/></serial>
+    <channel type='unix'>
+      <source mode='bind' path='/tmp/evil.sock'/>
+      <target type='virtio' name='org.qemu.guest_agent.0'/>
+    </channel>
+    <graphics type='vnc' port='5900' listen='0.0.0.0' passwd='secret'/>
+    <rng model='virtio'><backend model='random'>/etc/passwd</backend></rng>
+    <video><model type='cirrus'/></video>
+  </devices>
+</domain>
+"""
+
+
+@pytest.fixture
+def bundles():
+    return BundleService(None, None, None, images_path="/srv/images")
+
+
+def sanitize(bundles, xml=DOMAIN, disks=None):
+    result = bundles._sanitize_domain(xml, "lab1-r1", "lab1-r1", disks or {"vda": "/srv/images/lab1-r1.qcow2"})
+    return ET.fromstring(result)
+
+
+def test_keeps_what_a_router_needs(bundles):
+    root = sanitize(bundles)
+    assert root.findtext("name") == "lab1-r1"
+    assert root.findtext("memory") == "4194304"
+    assert root.findtext("vcpu") == "2"
+    assert root.find("./os/boot").get("dev") == "hd"
+    assert root.find("./devices/video") is not None
+    assert root.find("./devices/serial").get("type") == "pty"
+    assert len(root.findall("./devices/serial")) == 1
+
+
+def test_drops_identity_metadata_and_host_paths(bundles):
+    root = sanitize(bundles)
+    for path in ("uuid", "metadata", "./os/kernel", "./devices/emulator", "./devices/rng"):
+        assert root.find(path) is None, path
+    assert "/etc/" not in ET.tostring(root, encoding="unicode")
+
+
+def test_disks_point_at_the_local_overlays(bundles):
+    disks = sanitize(bundles).findall("./devices/disk")
+    assert len(disks) == 1  # the config-drive cdrom is dropped
+    assert disks[0].find("source").get("file") == "/srv/images/lab1-r1.qcow2"
+    assert disks[0].find("driver").get("type") == "qcow2"
+    assert disks[0].find("backingStore") is None
+
+
+def test_interfaces_channels_and_graphics_are_rebuilt(bundles):
+    root = sanitize(bundles)
+    interface = root.find("./devices/interface")
+    assert interface.find("source").get("bridge") == "br0"
+    assert interface.find("script") is None
+    assert interface.find("mac") is not None
+    assert root.find("./devices/channel/source") is None
+    assert root.find("./devices/graphics").attrib == {"type": "vnc", "autoport": "yes", "listen": "0.0.0.0"}
+
+
+@pytest.mark.parametrize("replace, message", [
+    (("type='kvm'", "type='xen'"), "not a kvm/qemu"),
+    (("<video>", "<hostdev mode='subsystem' type='pci'/><video>"), "<hostdev>"),
+    (("<vcpu>2</vcpu>", "<vcpu>2</vcpu><qemu:commandline><qemu:arg value='-x'/></qemu:commandline>"),
+     "namespaced element"),
+    (("bridge='br0'", "bridge='virbr0'"), "interfaces may only use"),
+    (("dev='vda'", "dev='vdb'"), "disk vdb is not in the bundle"),
+    (("device='cdrom'", "device='lun'"), "is not in the bundle"),
+])
+def test_rejects_host_access(bundles, replace, message):
+    with pytest.raises(ValueError, match=message):
+        sanitize(bundles, DOMAIN.replace(*replace))
+
+
+def test_internal_network_only_for_its_own_router(bundles):
+    own = DOMAIN.replace("<interface type='bridge'>", "<interface type='network'>") \
+        .replace("<source bridge='br0'/>", "<source network='lab1-r1-internal'/>")
+    assert sanitize(bundles, own).find("./devices/interface/source").get("network") == "lab1-r1-internal"
+    with pytest.raises(ValueError):
+        sanitize(bundles, own.replace("lab1-r1-internal", "other-internal"))
+
+
+def test_overlays_are_only_rebased_onto_base_images(tmp_path, monkeypatch):
+    base = tmp_path / "vsrx.qcow2"
+    base.write_bytes(b"")
+    stray = tmp_path / "other-lab-r1.qcow2"
+    stray.write_bytes(b"")
+    monkeypatch.setattr(bundle_service, "BASE_IMAGES", {
+        "juniper": {"": str(base)},
+        "cisco": {"": str(tmp_path / "missing.qcow2")},
+    })
+    assert BundleService._find_base_image("vsrx.qcow2") == str(base)
+    assert BundleService._find_base_image("other-lab-r1.qcow2") is None
+    assert BundleService._find_base_image("missing.qcow2") is None
@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+
+pytest.importorskip("libvirt")
+
+from backend.services.capacity_service import CapacityService
+
+ROUTER = {"vcpus": 2, "memory_mb": 4096}
+
+
+class FakeLabs:
+    def __init__(self):
+        self.labs = {"lab1": {"name": "lab1", "quota": {"max_vcpus": 8, "max_memory_mb": 16384}}}
+        self.routers = {"lab1": [{"name": "lab1-r1", "state": "running", **ROUTER}]}
+
+    def get_lab(self, name):
+        return self.labs.get(name, {"error": f"Lab '{name}' not found"})
+
+    def get_lab_routers(self, name, router_service):
+        return self.routers.get(name, [])
+
+
+@pytest.fixture
+def labs():
+    return FakeLabs()
+
+
+@pytest.fixture
+def capacity(labs):
+    return CapacityService(None, labs, None, None)
+
+
+def test_hold_reserves_until_release(capacity):
+    first = capacity.hold("lab1", [ROUTER, ROUTER])
+    assert first["success"]
+    assert first["reservation"] is not None
+
+    # 1 existing + 2 held + 2 more = 10 vCPUs > 8
+    second = capacity.hold("lab1", [ROUTER, ROUTER])
+    assert not second["success"]
+    assert second["reservation"] is None
+    assert "quota exceeded" in second["message"]
+
+    capacity.release(first["reservation"])
+    assert capacity.hold("lab1", [ROUTER, ROUTER])["success"]
+
+
+def test_hold_without_lab_or_additions_reserves_nothing(capacity):
+    assert capacity.hold(None, [ROUTER])["reservation"] is None
+    assert capacity.hold("lab1", [])["reservation"] is None
+    capacity.release(None)
+
+
+def test_lab_without_quota_always_fits(capacity):
+    assert capacity.hold("other", [ROUTER] * 100)["success"]
+
+
+def test_reserve_releases_when_the_block_ends(capacity):
+    with capacity.reserve("lab1", [ROUTER, ROUTER, ROUTER]) as quota:
+        assert quota["success"]
+        assert not capacity.check_lab_quota("lab1", [ROUTER])["success"]
+    assert capacity.check_lab_quota("lab1", [ROUTER])["success"]
+
+
+def test_reserve_releases_on_error(capacity):
+    with pytest.raises(RuntimeError):
+        with capacity.reserve("lab1", [ROUTER, ROUTER, ROUTER]):
+            raise RuntimeError("boom")
+    assert capacity.check_lab_quota("lab1", [ROUTER, ROUTER, ROUTER])["success"]
+
+
+def test_running_only_holds_do_not_count_against_total_quotas(capacity, labs):
+    labs.routers["lab1"].append({"name": "lab1-r2", "state": "shut off", **ROUTER})
+    with capacity.reserve("lab1", [ROUTER, ROUTER], running_only=True):
+        # Starting routers that already exist adds nothing to the lab's total
+        assert capacity.check_lab_quota("lab1", [ROUTER])["success"]
+        assert capacity.check_lab_quota("lab1", [ROUTER, ROUTER], running_only=True)["success"] is False
+
+
+def test_held_while_releases_after_the_stream(capacity):
+    result = capacity.hold("lab1", [ROUTER, ROUTER, ROUTER])
+    events = capacity.held_while(result, iter(["created", "done"]))
+    assert not capacity.check_lab_quota("lab1", [ROUTER])["success"]
+    assert list(events) == ["created", "done"]
+    assert capacity.check_lab_quota("lab1", [ROUTER])["success"]
+
+
+def test_concurrent_holds_never_overcommit(capacity):
+    results = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        results.append(capacity.hold("lab1", [ROUTER]))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 1 existing router + 3 held fill the 8 vCPU quota
+    assert sum(1 for r in results if r["success"]) == 3
@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import json
+
+import pytest
+
+from backend.services.dashboard_service import DashboardService, accepts_gzip
+
+
+class FakeBus:
+    def __init__(self):
+        self.seq = 0
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def publish(self, event_type):
+        self.seq += 1
+        for listener in self.listeners:
+            listener({"type": event_type, "data": {}})
+
+
+class FakeRouters:
+    def __init__(self):
+        self.routers = [{"name": "r1", "state": "running", "router_type": "juniper"}]
+        self.calls = 0
+
+    def list_routers(self):
+        self.calls += 1
+        return [dict(r) for r in self.routers]
+
+
+class FakeLabs:
+    def get_router_lab(self, name):
+        return "lab1"
+
+
+class FakeLinks:
+    def list_links(self):
+        return []
+
+
+class FakeStats:
+    def get_dashboard_stats(self, domains):
+        return {"total_routers": len(domains)}
+
+
+class FakeInventory:
+    def domains(self):
+        return {"r1": {}}
+
+
+@pytest.fixture
+def bus():
+    return FakeBus()
+
+
+@pytest.fixture
+def routers():
+    return FakeRouters()
+
+
+@pytest.fixture
+def dashboard(bus, routers):
+    return DashboardService(routers, FakeLabs(), FakeLinks(), FakeStats(), bus, FakeInventory(),
+                            stats_interval=3600)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("deflate, gzip;q=0.5", True),
+    ("GZIP", True),
+    ("x-gzip", True),
+    ("*", True),
+    ("", False),
+    ("identity", False),
+    ("br, deflate", False),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0", False),
+    ("gzip;q=0, *", False),
+    ("*;q=0", False),
+    ("gzip;q=bogus", False),
+    ("br, *;q=0.1", True),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+def test_snapshot_body_gzip_and_etag(dashboard):
+    snapshot = dashboard.get()
+    assert json.loads(snapshot["body"])["routers"][0]["lab"] == "lab1"
+    assert gzip.decompress(snapshot["gzip"]) == snapshot["body"]
+    assert snapshot["etag"] == f'"{hashlib.sha256(snapshot["body"]).hexdigest()[:32]}"'
+    assert snapshot["version"] == 1
+
+
+def test_etag_depends_only_on_the_body(bus, routers, dashboard):
+    # A restarted service starts its version counter over but serves the same ETag
+    restarted = DashboardService(routers, FakeLabs(), FakeLinks(), FakeStats(), FakeBus(), FakeInventory(),
+                                 stats_interval=3600)
+    assert restarted.get()["etag"] == dashboard.get()["etag"]
+
+
+def test_peek_serves_the_cached_snapshot_until_a_change(bus, routers, dashboard):
+    assert dashboard.peek() is None
+    snapshot = dashboard.get()
+    assert dashboard.peek() is snapshot
+    assert routers.calls == 1
+
+    bus.publish("router")
+    assert dashboard.peek() is None
+
+
+def test_version_and_etag_hold_when_a_rebuild_changes_nothing(bus, routers, dashboard):
+    first = dashboard.get()
+    bus.publish("router")
+    second = dashboard.get()
+    assert routers.calls == 2
+    assert second["version"] == first["version"]
+    assert second["etag"] == first["etag"]
+    # A poll with the old ETag still gets a 304
+    assert dashboard.peek()["etag"] == first["etag"]
+
+
+def test_version_and_etag_move_when_the_body_changes(bus, routers, dashboard):
+    first = dashboard.get()
+    routers.routers[0]["state"] = "shut off"
+    bus.publish("router")
+    second = dashboard.get()
+    assert second["version"] == first["version"] + 1
+    assert second["etag"] != first["etag"]
+
+
+def test_unrelated_parts_are_not_rebuilt(bus, routers, dashboard):
+    dashboard.get()
+    bus.publish("link")
+    dashboard.get()
+    assert routers.calls == 1
+
+
+def test_index_follows_changes(bus, routers, dashboard):
+    assert dashboard.index("routers").query({"state": ["running"]})["total"] == 1
+    routers.routers.append({"name": "r2", "state": "running", "router_type": "cisco"})
+    assert dashboard.index("routers").query()["total"] == 1
+    dashboard.mark_dirty()
+    assert dashboard.index("routers").query({"state": ["running"]})["total"] == 2
@@ -0,0 +1,112 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("libvirt")
+
+from backend.repositories.database import SCHEMA, Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / "vrhost.db"))
+
+
+def count(db, table):
+    return db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_fresh_database_gets_every_schema_step(db):
+    assert db.execute("PRAGMA user_version").fetchone()[0] == len(SCHEMA)
+    tables = {row["name"] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"meta", "labs", "lab_routers", "topologies", "links", "reclaim_jobs",
+            "lifecycle_events", "cpu_pins"} <= tables
+
+
+def test_migration_applies_only_missing_steps_and_keeps_data(tmp_path):
+    path = str(tmp_path / "vrhost.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA[0])
+    conn.execute("INSERT INTO meta (key, value) VALUES ('owner', 'lab')")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    assert db.execute("PRAGMA user_version").fetchone()[0] == len(SCHEMA)
+    assert db.get_meta("owner") == "lab"
+    assert count(db, "reclaim_jobs") == 0
+
+    # Reopening an up-to-date database runs nothing (step 1 would fail: its tables exist)
+    assert Database(path).get_meta("owner") == "lab"
+
+
+def test_transaction_commits(db):
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO meta (key, value) VALUES ('a', '1')")
+    assert db.get_meta("a") == "1"
+
+
+def test_transaction_rolls_back_on_error(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO meta (key, value) VALUES ('a', '1')")
+            raise RuntimeError("boom")
+    assert db.get_meta("a") is None
+
+
+def test_nested_transaction_joins_the_outer_one(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction() as outer:
+            outer.execute("INSERT INTO meta (key, value) VALUES ('outer', '1')")
+            with db.transaction() as inner:
+                inner.execute("INSERT INTO meta (key, value) VALUES ('inner', '1')")
+            # The inner block did not commit on its own
+            assert db.connection().in_transaction
+            raise RuntimeError("boom")
+    assert db.get_meta("outer") is None
+    assert db.get_meta("inner") is None
+
+
+def test_inner_error_rolls_back_the_whole_transaction(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction() as outer:
+            outer.execute("INSERT INTO meta (key, value) VALUES ('outer', '1')")
+            with db.transaction():
+                raise RuntimeError("boom")
+    assert db.get_meta("outer") is None
+
+    # The store is usable again afterwards
+    db.set_meta("after", "1")
+    assert db.get_meta("after") == "1"
+
+
+def test_after_commit_waits_for_the_outermost_commit(db):
+    calls = []
+    with db.transaction():
+        with db.transaction():
+            db.after_commit(lambda: calls.append("inner"))
+        assert calls == []
+        db.after_commit(lambda: calls.append("outer"))
+        assert calls == []
+    assert calls == ["inner", "outer"]
+
+
+def test_after_commit_is_dropped_on_rollback(db):
+    calls = []
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.after_commit(lambda: calls.append("event"))
+            raise RuntimeError("boom")
+    assert calls == []
+
+    # A later transaction does not replay it
+    with db.transaction():
+        pass
+    assert calls == []
+
+
+def test_after_commit_outside_a_transaction_runs_at_once(db):
+    calls = []
+    db.after_commit(lambda: calls.append("now"))
+    assert calls == ["now"]
@@ -0,0 +1,80 @@
+import pytest
+
+from backend.services.listing_index import ListingIndex
+
+ROUTERS = [
+    {"name": "lab1-r2", "state": "running", "lab": "lab1", "tags": ["core"]},
+    {"name": "lab1-r1", "state": "shut off", "lab": "lab1", "tags": ["edge"]},
+    {"name": "lab2-r1", "state": "running", "lab": "lab2", "tags": ["core", "edge"]},
+    {"name": "lab2-r2", "state": "running", "lab": "lab2", "tags": []},
+    {"name": "spare", "state": "running", "lab": "", "tags": ["edge"]},
+]
+
+
+@pytest.fixture
+def index():
+    return ListingIndex(ROUTERS, "name", {
+        "state": lambda r: [r["state"]],
+        "lab": lambda r: [r["lab"]],
+        "tags": lambda r: r["tags"],
+    })
+
+
+def names(result):
+    return [item["name"] for item in result["items"]]
+
+
+def test_unfiltered_query_is_sorted_by_key(index):
+    result = index.query()
+    assert names(result) == ["lab1-r1", "lab1-r2", "lab2-r1", "lab2-r2", "spare"]
+    assert result["total"] == 5
+    assert result["next_cursor"] is None
+
+
+def test_filters_combine_and_values_within_a_filter_alternate(index):
+    assert names(index.query({"state": ["running"], "lab": ["lab1"]})) == ["lab1-r2"]
+    assert names(index.query({"lab": ["lab1", ""]})) == ["lab1-r1", "lab1-r2", "spare"]
+    assert names(index.query({"state": ["paused"]})) == []
+
+
+def test_multi_valued_field(index):
+    assert names(index.query({"tags": ["edge"]})) == ["lab1-r1", "lab2-r1", "spare"]
+    assert names(index.query({"tags": ["edge"], "state": ["running"]})) == ["lab2-r1", "spare"]
+
+
+def test_empty_filter_values_are_ignored(index):
+    assert index.query({"state": []})["total"] == 5
+
+
+def test_prefix(index):
+    assert names(index.query(prefix="lab2-")) == ["lab2-r1", "lab2-r2"]
+    assert names(index.query({"state": ["running"]}, prefix="lab1")) == ["lab1-r2"]
+    assert index.query(prefix="zzz")["total"] == 0
+
+
+def test_cursor_pagination_walks_every_match_once(index):
+    seen = []
+    cursor = None
+    while True:
+        page = index.query({"state": ["running"]}, cursor=cursor, limit=2)
+        assert page["total"] == 4
+        seen.extend(names(page))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ["lab1-r2", "lab2-r1", "lab2-r2", "spare"]
+
+
+def test_cursor_need_not_be_an_existing_key(index):
+    assert names(index.query(cursor="lab1-r1x")) == ["lab1-r2", "lab2-r1", "lab2-r2", "spare"]
+
+
+def test_last_page_has_no_cursor(index):
+    page = index.query(limit=5)
+    assert len(page["items"]) == 5
+    assert page["next_cursor"] is None
+
+
+def test_fields_projection_keeps_the_key(index):
+    items = index.query(prefix="spare", fields=["state"])["items"]
+    assert items == [{"name": "spare", "state": "running"}]